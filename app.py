@@ -1,19 +1,118 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_template, stream_with_context, abort, copy_current_request_context
 import ephem
+import gzip
 import math
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
 import os
+import threading
+import time
+
+import numpy as np
+
+import aspects
+import compression
+import ephemeris_tables
+import http_cache
+import knowledge_base
+import population_stats
+import sabian_store
+import static_assets
+import synastry
+from caching import LRUCache
+from session_store import MemorySessionStore, SQLiteSessionStore, ServerSideSessionInterface
+from report_store import ReportStore, report_id_for
+from report_jobs import ReportJobQueue
+import template_cache
+import timing
+import metrics
+from knowledge_base import SIXTEEN_ARCHETYPES, ZODIAC_SIGNS
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-for-session-management-change-in-production'
 
+# Jinja のバイトコードキャッシュ（USE_JINJA_BYTECODE_CACHE=0 で無効、保存先は JINJA_BYTECODE_CACHE_DIR）
+# 全ワーカーと再起動後のプロセスで、テンプレートのコンパイル結果をファイルで共有する
+if os.environ.get('USE_JINJA_BYTECODE_CACHE', '1') != '0':
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': template_cache.bytecode_cache()}
+
+# セッションの保存先（SESSION_BACKEND=memory|sqlite|cookie）
+# memory / sqlite では Cookie にセッションIDだけを保存し、天体データはサーバー側に置く
+# gunicorn で複数ワーカーを使う場合は sqlite を指定する（cookie は従来の署名付き Cookie）
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'memory')
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 86400))
+SESSION_SQLITE_PATH = os.environ.get(
+    'SESSION_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions.sqlite3')
+)
+if SESSION_BACKEND == 'sqlite':
+    app.session_interface = ServerSideSessionInterface(SQLiteSessionStore(SESSION_SQLITE_PATH, SESSION_TTL))
+elif SESSION_BACKEND != 'cookie':
+    app.session_interface = ServerSideSessionInterface(MemorySessionStore(SESSION_TTL))
+
+# 生成済み詳細レポートの保存先（USE_REPORT_STORE=0 で無効）
+# 同じ入力のレポートは再生成せず、/report/<レポートID> からも直接取得できる
+USE_REPORT_STORE = os.environ.get('USE_REPORT_STORE', '1') != '0'
+REPORT_STORE_PATH = os.environ.get(
+    'REPORT_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_store.sqlite3')
+)
+REPORT_STORE_MAX_MB = int(os.environ.get('REPORT_STORE_MAX_MB', 256))
+REPORT_STORE = ReportStore(REPORT_STORE_PATH, REPORT_STORE_MAX_MB * 1024 * 1024) if USE_REPORT_STORE else None
+
+# 詳細レポートを既定でバックグラウンド生成するかどうか（ASYNC_DETAILED_REPORT=1 で有効、?async=1 でリクエストごとに指定）
+ASYNC_DETAILED_REPORT = os.environ.get('ASYNC_DETAILED_REPORT', '0') == '1'
+REPORT_JOBS = ReportJobQueue(
+    workers=int(os.environ.get('REPORT_JOB_WORKERS', 2)),
+    max_queued=int(os.environ.get('REPORT_JOB_QUEUE_SIZE', 64)),
+    result_ttl=int(os.environ.get('REPORT_JOB_RESULT_TTL', 3600)),
+    max_finished=int(os.environ.get('REPORT_JOB_MAX_FINISHED', 256))
+)
+
+# 処理段階ごとの所要時間の計測（SERVER_TIMING=1 で Server-Timing ヘッダー、TIMING_LOG=1 で JSON ログを出力）
+timing.init_app(app,
+                header=os.environ.get('SERVER_TIMING', '0') == '1',
+                log=os.environ.get('TIMING_LOG', '0') == '1')
+
+# Prometheus 形式のメトリクス（/metrics）
+metrics.init_app(app)
+
+# ルートごとの Cache-Control（ETag / Last-Modified は各ルートで入力から求める）
+http_cache.init_app(app)
+
+# 結合・圧縮した CSS / JavaScript（static_assets.py build で生成。/assets/ から1年間キャッシュ可能な形で配信）
+static_assets.init_app(app)
+
+# HTML の空白の除去と gzip / brotli 圧縮（USE_COMPRESSION=0 で無効。ETag のあるページは圧縮結果を保持）
+compression.init_app(app)
+
+# 事前計算した天体暦テーブルを使うかどうか（USE_EPHEMERIS_TABLES=0 で ephem の直接計算に切り替え）
+USE_EPHEMERIS_TABLES = os.environ.get('USE_EPHEMERIS_TABLES', '1') != '0'
+
+# 詳細レポートを既定でストリーミング表示するかどうか（STREAM_DETAILED_REPORT=1 で有効）
+STREAM_DETAILED_REPORT = os.environ.get('STREAM_DETAILED_REPORT', '0') == '1'
+
+# ストリーミング時に章の区切りとして扱うタグ（detailed_report_complete.html の各章とエピローグ）
+STREAM_FLUSH_MARKER = '<article'
+
 # サビアンシンボルデータのグローバル変数
 SABIAN_SYMBOLS = None
 
+# 黄経の絶対度数（0-359）ごとのサビアンシンボル（読み取り専用）
+# コンパイル済みストア（sabian_store.SabianStore）があればそれを、なければ load_sabian_symbols で構築したリストを使う
+SABIAN_INDEX = None
+
+# 星座名 → （サビアンシンボルの sign_id、黄経0度からのオフセット）
+SABIAN_SIGN_TABLE = {
+    '牡羊座': ('aries', 0), '牡牛座': ('taurus', 30), '双子座': ('gemini', 60),
+    '蟹座': ('cancer', 90), '獅子座': ('leo', 120), '乙女座': ('virgo', 150),
+    '天秤座': ('libra', 180), '蠍座': ('scorpio', 210), '射手座': ('sagittarius', 240),
+    '山羊座': ('capricorn', 270), '水瓶座': ('aquarius', 300), '魚座': ('pisces', 330)
+}
+
 def load_sabian_symbols():
-    """サビアンシンボルをJSONファイルから読み込む"""
-    global SABIAN_SYMBOLS
+    """サビアンシンボルをJSONファイルから読み込み、360度のインデックスを構築する"""
+    global SABIAN_SYMBOLS, SABIAN_INDEX
     if SABIAN_SYMBOLS is None:
         try:
             import os
@@ -28,40 +127,77 @@ def load_sabian_symbols():
         except Exception as e:
             print(f"サビアンシンボル読み込みエラー: {e}")
             SABIAN_SYMBOLS = []
+        SABIAN_INDEX = build_sabian_index(SABIAN_SYMBOLS)
     return SABIAN_SYMBOLS
 
+def build_sabian_index(symbols):
+    """
+    サビアンシンボルを黄経の絶対度数（0-359）で引ける360要素のリストに変換
+    欠落・重複・範囲外の度数は警告を出力する（重複時は最初のシンボルを採用）
+    """
+    index = [None] * 360
+    sign_offsets = {sign_id: offset for sign_id, offset in SABIAN_SIGN_TABLE.values()}
+
+    for sign_data in symbols:
+        offset = sign_offsets.get(sign_data.get('sign_id'))
+        if offset is None:
+            print(f"サビアンシンボル: 不明な星座 {sign_data.get('sign_id')}")
+            continue
+        for symbol in sign_data.get('degrees', []):
+            degree = symbol.get('degree')
+            if not isinstance(degree, int) or not 1 <= degree <= 30:
+                print(f"サビアンシンボル: {sign_data['sign_ja']}の度数 {degree} が範囲外です")
+                continue
+            slot = offset + degree - 1
+            if index[slot] is not None:
+                print(f"サビアンシンボル: {sign_data['sign_ja']}{degree}度が重複しています")
+                continue
+            index[slot] = {
+                'sign': sign_data['sign_ja'],
+                'degree': degree,
+                'title': symbol['title_ja'],
+                'keyword': symbol['keyword']
+            }
+
+    missing = [slot for slot, entry in enumerate(index) if entry is None]
+    if symbols and missing:
+        print(f"サビアンシンボル: {len(missing)}件の度数が欠落しています（黄経 {missing[:10]} など）")
+    return index
+
+def load_sabian_index():
+    """サビアンシンボルのインデックスを取得（コンパイル済みストアを優先し、なければJSONから構築）"""
+    global SABIAN_INDEX
+    if SABIAN_INDEX is None:
+        SABIAN_INDEX = sabian_store.open_store()
+        if SABIAN_INDEX is None:
+            load_sabian_symbols()
+    return SABIAN_INDEX
+
+# 相性検索の索引（python synastry.py build で作成。初回の検索時または warm_up で読み込む）
+SYNASTRY_INDEX_PATH = os.environ.get('SYNASTRY_INDEX_PATH', synastry.INDEX_PATH)
+SYNASTRY_INDEX = None
+MAX_SYNASTRY_MATCHES = 100
+
+def load_synastry_index():
+    """相性検索の索引を取得（ファイルがなければ None）"""
+    global SYNASTRY_INDEX
+    if SYNASTRY_INDEX is None:
+        SYNASTRY_INDEX = synastry.load_index(SYNASTRY_INDEX_PATH)
+    return SYNASTRY_INDEX
+
 def get_sabian_for_position(sign, degree):
     """特定の星座と度数に対応するサビアンシンボルを取得"""
-    symbols = load_sabian_symbols()
-    
-    # 星座名を英語に変換
-    sign_mapping = {
-        '牡羊座': 'aries', '牡牛座': 'taurus', '双子座': 'gemini',
-        '蟹座': 'cancer', '獅子座': 'leo', '乙女座': 'virgo',
-        '天秤座': 'libra', '蠍座': 'scorpio', '射手座': 'sagittarius',
-        '山羊座': 'capricorn', '水瓶座': 'aquarius', '魚座': 'pisces'
-    }
-    
-    sign_id = sign_mapping.get(sign)
-    if not sign_id:
+    sabian_index = load_sabian_index()
+
+    sign_entry = SABIAN_SIGN_TABLE.get(sign)
+    if not sign_entry:
         return None
-    
+
     # サビアンシンボルは切り上げ度数を使用（例：0.1度→1度、15.7度→16度）
     sabian_degree = math.ceil(degree) if degree > 0 else 1
     sabian_degree = min(30, max(1, sabian_degree))  # 1-30の範囲に制限
-    
-    # 該当する星座のシンボルを検索
-    for sign_data in symbols:
-        if sign_data['sign_id'] == sign_id:
-            for symbol in sign_data['degrees']:
-                if symbol['degree'] == sabian_degree:
-                    return {
-                        'sign': sign_data['sign_ja'],
-                        'degree': sabian_degree,
-                        'title': symbol['title_ja'],
-                        'keyword': symbol['keyword']
-                    }
-    return None
+
+    return sabian_index[sign_entry[1] + sabian_degree - 1]
 
 def generate_sabian_talent_interpretation(planet_name, sabian_symbol, element):
     """サビアンシンボルから才能の解釈を生成（霊的な表現を避け、実践的な才能にフォーカス）"""
@@ -69,28 +205,9 @@ def generate_sabian_talent_interpretation(planet_name, sabian_symbol, element):
     if not sabian_symbol:
         return ""
     
-    # 惑星別の才能領域
-    planet_talents = {
-        '太陽': '核心的な才能と人生の目的',
-        '月': '感情的知性と適応能力', 
-        '水星': '知的能力とコミュニケーション',
-        '金星': '審美眼と人間関係の才能',
-        '火星': '実行力と達成能力',
-        '木星': '成長と発展の可能性',
-        '土星': '専門性と持続力'
-    }
-    
-    talent_domain = planet_talents.get(planet_name, '潜在能力')
-    
-    # エレメント別の表現スタイル
-    element_styles = {
-        '火': '直感的で創造的な',
-        '地': '実践的で具体的な',
-        '風': '知的で革新的な',
-        '水': '感受性豊かで洞察力のある'
-    }
+    talent_domain = knowledge_base.PLANET_TALENT_DOMAINS.get(planet_name, '潜在能力')
     
-    style = element_styles.get(element, '独特な')
+    style = knowledge_base.ELEMENT_EXPRESSION_STYLES.get(element, '独特な')
     
     interpretation = f"""
 {sabian_symbol['sign']}{sabian_symbol['degree']}度のサビアンシンボル「{sabian_symbol['title']}」は、
@@ -123,14 +240,8 @@ def get_vocational_talent(keyword, planet):
 
 def get_interpersonal_talent(keyword, element):
     """対人関係の才能を生成"""
-    element_approach = {
-        '火': '情熱的で励ましに満ちたアプローチ',
-        '地': '信頼と安定を提供する堅実なサポート',
-        '風': '知的な刺激と新鮮な視点の提供',
-        '水': '深い共感と感情的な理解'
-    }
     
-    return f"{element_approach.get(element, '独自の方法')}により、{keyword}に関連した人間関係の構築力"
+    return f"{knowledge_base.ELEMENT_INTERPERSONAL_APPROACHES.get(element, '独自の方法')}により、{keyword}に関連した人間関係の構築力"
 
 def get_creative_talent(keyword, style):
     """創造的才能を生成"""
@@ -187,192 +298,6 @@ PREFECTURE_COORDINATES = {
     "沖縄県": {"lat": 26.2124, "lon": 127.6792}
 }
 
-# 星座名の定義（黄経0度から30度区切り）
-ZODIAC_SIGNS = [
-    '牡羊座', '牡牛座', '双子座', '蟹座', '獅子座', '乙女座',
-    '天秤座', '蠍座', '射手座', '山羊座', '水瓶座', '魚座'
-]
-
-# 16原型データ
-SIXTEEN_ARCHETYPES = {
-    ("火", "火"): {
-        "name": "超新星",
-        "name_en": "The Supernova",
-        "element_combination": "火×火",
-        "tagline": "純粋で混じり気のない情熱の化身。内外のベクトルが一つの目的に完全一致する。",
-        "temperament": "純粋な情熱",
-        "body_type": "胆汁質の極致",
-        "core": "純粋で混じり気のない情熱の化身。彼らの内なる世界と外に向かう表現は、燃え盛る炎のような一つの目的に向かって完全に一致しています。",
-        "talents": "圧倒的な行動力と決断の速さ。困難を前にしても怯まず、直感に従って突き進む勇気。",
-        "challenges": "地の「現実感覚」と水の「共感性」の欠如。忍耐を学び、結果への配慮と感情の機微への感受性を育むことが課題。"
-    },
-    ("火", "地"): {
-        "name": "マグマ",
-        "name_en": "The Magma",
-        "element_combination": "火×地",
-        "tagline": "熱血のリアリスト。燃えるビジョンを現実的な忍耐で形にする建設者。",
-        "temperament": "熱血のリアリスト",
-        "body_type": "胆汁質と憂鬱質の統合",
-        "core": "燃えるようなビジョンを抱きながらも、その情熱を現実的で忍耐強い、地に足のついた感情の性質を通して表現します。",
-        "talents": "壮大なビジョンと実行力を兼備。目標設定後の粘り強さと集中力に優れる。",
-        "challenges": "風の「代替案」や水の「感情配慮」を見落としがち。柔軟性と協力の価値を学ぶことが課題。"
-    },
-    ("火", "風"): {
-        "name": "伝道師",
-        "name_en": "The Evangelist",
-        "element_combination": "火×風",
-        "tagline": "熱狂のカリスマ。情熱×知性でムーブメントを起こすストーリーテラー。",
-        "temperament": "熱狂のカリスマ",
-        "body_type": "胆汁質と多血質の結合",
-        "core": "情熱は知性によって磨かれ、伝染性の高い熱意で語られる。卓越したストーリーテラー／リーダー／プレゼンター。",
-        "talents": "斬新な発想力と魅力的な伝達力。社交性も高く、多様なネットワークを構築。",
-        "challenges": "地の「質実剛健さ」が不足。アイデアが絵に描いた餅に終わるリスク。"
-    },
-    ("火", "水"): {
-        "name": "間欠泉",
-        "name_en": "The Geyser",
-        "element_combination": "火×水",
-        "tagline": "激情の共感者。深い感情を熱して行動へ昇華するダイナモ。",
-        "temperament": "激情の共感者",
-        "body_type": "胆汁質と粘液質の調和",
-        "core": "行動は深く強力な感情の流れに突き動かされる。猛烈に守り、強烈に忠実。",
-        "talents": "並外れた共感力と爆発的行動力。豊かな感情は創造の源泉。",
-        "challenges": "感情の波に飲み込まれ客観性を失いやすい。地の現実感と風の論理を学ぶ。"
-    },
-    ("地", "火"): {
-        "name": "火山",
-        "name_en": "The Volcano",
-        "element_combination": "地×火",
-        "tagline": "現実的なる情熱家。静かな構造に熱源を秘め、決定的一手で噴火する。",
-        "temperament": "現実的な情熱家",
-        "body_type": "憂鬱質と胆汁質の統合",
-        "core": "穏やかで有能な外面の奥に、野心と情熱のマグマ。忍耐強い建設者だが、好機には決定的で力強い行動力で噴火する。",
-        "talents": "壮大な夢を現実にする計画力と実行力。リスク判断と大胆な行動を兼備。",
-        "challenges": "推進力が他者のアイデア（風）や感情（水）を軽視して見えることがある。"
-    },
-    ("地", "地"): {
-        "name": "岩盤",
-        "name_en": "The Bedrock",
-        "element_combination": "地×地",
-        "tagline": "揺るぎなき現実主義者。安定・忍耐・実用の究極形。",
-        "temperament": "揺るぎなき現実主義",
-        "body_type": "憂鬱質の完成形",
-        "core": "安定、忍耐、実用性の究極的体現者。内外の目的は測定可能な達成に完全調和。",
-        "talents": "具体化、計画、粘り強い実現力に他の追随を許さない。五感に根差した生活力。",
-        "challenges": "安定性が頑固さや視野の狭さになりうる。火の自発性と風の好奇心を意識的に取り入れる。"
-    },
-    ("地", "風"): {
-        "name": "サバンナ",
-        "name_en": "The Savannah",
-        "element_combination": "地×風",
-        "tagline": "現実的な設計者。理にかなう美しい構造を現実へ落とし込む。",
-        "temperament": "現実的な設計者",
-        "body_type": "憂鬱質と多血質の調和",
-        "core": "知的な青写真を現実へ落とし込む達人。合理と効率、エレガントな理論と実用を両立。",
-        "talents": "冷静客観で状況把握、科学的思考で判断。交渉や根回しも涼やかに。",
-        "challenges": "合理と効率の優先で情熱（火）や感情（水）を見失いがち。"
-    },
-    ("地", "水"): {
-        "name": "庭園",
-        "name_en": "The Garden",
-        "element_combination": "地×水",
-        "tagline": "育む供給者。愛と実務で安心と豊かさをつくる肥沃な大地。",
-        "temperament": "育む供給者",
-        "body_type": "憂鬱質と粘液質の融合",
-        "core": "深い共感と愛情を、具体的な安定と快適さの創造で表す。究極の世話役。",
-        "talents": "思いやりと繊細さ、現実的たくましさを兼備。役立つ喜びに尽くす。",
-        "challenges": "身近なサークルに集中しすぎ、個人的輝き（火）や広い視点（風）を忘れがち。"
-    },
-    ("風", "火"): {
-        "name": "山火事",
-        "name_en": "The Wildfire",
-        "element_combination": "風×火",
-        "tagline": "情熱のメッセンジャー。言葉で熱を点火し、理想へ駆け上がる。",
-        "temperament": "情熱のメッセンジャー",
-        "body_type": "多血質と胆汁質の結合",
-        "core": "アイデアは火花となって他者に熱意を点火。ダイナミックなコミュニケーター、社会的触媒。",
-        "talents": "発想力と社交性。積極的に外へ出て交流し、チャンスを嗅ぎ取る能力。",
-        "challenges": "地の基盤と水の深みが欠けやすい。アウトプット過多でエネルギー切れ。"
-    },
-    ("風", "地"): {
-        "name": "砂岩の彫刻家",
-        "name_en": "The Sandstone Carver",
-        "element_combination": "風×地",
-        "tagline": "合理的な現実主義者。抽象に形を与え、思考をシステムへ刻む。",
-        "temperament": "合理的な現実主義",
-        "body_type": "多血質と憂鬱質の調和",
-        "core": "抽象を取り上げ構造と形を与える達人。明晰で論理的、社交的でありながら地に足がついた能力。",
-        "talents": "高いコミュ力で誰とでも合わせられる。最終判断は肌感覚に基づく。",
-        "challenges": "合理と現実性の融合が火の情熱や水の感情を欠いた冷徹さに映ることがある。"
-    },
-    ("風", "風"): {
-        "name": "サイクロン",
-        "name_en": "The Cyclone",
-        "element_combination": "風×風",
-        "tagline": "純粋な知性体。情報と会話の渦を生み、世界を横断する。",
-        "temperament": "純粋な知性体",
-        "body_type": "多血質の純粋形",
-        "core": "アイデア、コミュニケーション、社会的ネットワークの世界で呼吸。客観的・合理的・好奇心旺盛。",
-        "talents": "豊かな教養と洗練で議論の場でも存在感。独立心が強く自由な交流を好む。",
-        "challenges": "「頭でっかち」で肉体から遊離しやすい。非論理的な感情や日常の現実が苦手。"
-    },
-    ("風", "水"): {
-        "name": "霧",
-        "name_en": "The Mist",
-        "element_combination": "風×水",
-        "tagline": "共感する知性。論理と感情を溶かし、言葉で潤いをもたらす。",
-        "temperament": "共感する知性",
-        "body_type": "多血質と粘液質の統合",
-        "core": "感情の機微を理解し言葉で表現する稀有な才能。論理と直感を融合。",
-        "talents": "卓越したユーモアとオリジナルな想像力。人の気持ちを察し、計画を立て実行。",
-        "challenges": "思考と感情に没入し行動（火）や現実対処（地）が遅れがち。"
-    },
-    ("水", "火"): {
-        "name": "温泉",
-        "name_en": "The Hot Spring",
-        "element_combination": "水×火",
-        "tagline": "行動する共感者。守るべきもののために、温もりと勇気で動く。",
-        "temperament": "行動する共感者",
-        "body_type": "粘液質と胆汁質の調和",
-        "core": "癒しに満ちた水の太陽の性質は、情熱的で直接的な火の月の行動力を通して表現。",
-        "talents": "深い愛情と実行情熱の兼備。困っている人を見過ごせず即行動。",
-        "challenges": "主観的・衝動的に傾き、地の見通しや風の論理を欠く。"
-    },
-    ("水", "地"): {
-        "name": "粘土",
-        "name_en": "The Clay",
-        "element_combination": "水×地",
-        "tagline": "形ある癒し手。混沌に器を与え、安心を持続する。",
-        "temperament": "形ある癒し手",
-        "body_type": "粘液質と憂鬱質の融合",
-        "core": "深い感情的目的は、現実的・具体的・永続的な安心の提供。魂の陶芸家。",
-        "talents": "共感力と実務能力の兼備。情に厚い職人肌で、最後まで責任を持つ。",
-        "challenges": "過度に慎重で慣習に固執しやすい。火の個人リスクや風の抽象に抵抗。"
-    },
-    ("水", "風"): {
-        "name": "雨雲",
-        "name_en": "The Raincloud",
-        "element_combination": "水×風",
-        "tagline": "詩的な魂。感情を言語と芸術へ翻訳するストーリーテラー。",
-        "temperament": "詩的な魂",
-        "body_type": "粘液質と多血質の統合",
-        "core": "感情の世界を深く見つめ、それを言語・芸術・アイデアに翻訳する非凡な能力。",
-        "talents": "細やかで鋭い洞察。人を見て気質を見抜く。表現語彙が豊富。",
-        "challenges": "内なる美しい非現実に没入し憂鬱や無気力へ。火の行動と地の現実が欠けがち。"
-    },
-    ("水", "水"): {
-        "name": "大洋",
-        "name_en": "The Ocean",
-        "element_combination": "水×水",
-        "tagline": "無限の共感体。境界を越え、すべてを包む深い水域。",
-        "temperament": "無限の共感体",
-        "body_type": "粘液質の深化形",
-        "core": "純粋で希釈されていない感情・直感・霊的感受性。集合的無意識と深く繋がる。",
-        "talents": "驚異的な共感能力と思いやり。芸術感受性が高く、存在自体が安らぎと潤いを与える。",
-        "challenges": "個人的境界線の維持と現実世界での機能が課題。同調しすぎて圧倒され自己喪失の危険。"
-    }
-}
-
 def rad_to_deg(rad):
     """ラジアンを度に変換"""
     return rad * 180.0 / math.pi
@@ -400,129 +325,92 @@ def get_zodiac_info(longitude_deg):
 
 def get_element(zodiac_name):
     """星座から四元素を取得"""
-    elements = {
-        '牡羊座': '火', '獅子座': '火', '射手座': '火',
-        '牡牛座': '地', '乙女座': '地', '山羊座': '地', 
-        '双子座': '風', '天秤座': '風', '水瓶座': '風',
-        '蟹座': '水', '蠍座': '水', '魚座': '水'
-    }
-    return elements.get(zodiac_name, '不明')
+    return knowledge_base.sign_element(zodiac_name)
 
 def _get_archetype_details(archetype_name):
     """体質原型に基づく詳細な特徴を生成"""
-    archetype_features = {
-        "火のカリスマ": {
-            "strength": "強力なリーダーシップ、決断力、行動力",
-            "physical": "高い基礎代謝、筋肉質な体質、熱産生が活発",
-            "caution": "過労、ストレス性疾患、炎症性疾患への注意",
-            "lifestyle": "定期的なクールダウン、瞑想、十分な水分補給"
-        },
-        "マグマ": {
-            "strength": "爆発的な創造力、情熱、カリスマ性",
-            "physical": "非常に高い体温、活発な循環系、強い消化力",
-            "caution": "怒りのコントロール、血圧管理、熱性疾患",
-            "lifestyle": "冷却食品の摂取、水泳、定期的な休息"
-        },
-        "聖火": {
-            "strength": "持続的な情熱、理想主義、インスピレーション",
-            "physical": "安定した熱産生、良好な代謝、強い免疫力",
-            "caution": "理想と現実のギャップによるストレス",
-            "lifestyle": "創造的活動、芸術療法、自然との触れ合い"
-        },
-        "野火": {
-            "strength": "瞬発力、適応力、直感的判断力",
-            "physical": "変動しやすい体温、敏感な神経系",
-            "caution": "エネルギーの浪費、神経過敏",
-            "lifestyle": "規則的な生活リズム、グラウンディング"
-        },
-        "竈の火": {
-            "strength": "忍耐力、実務能力、安定性",
-            "physical": "安定した消化機能、堅実な体格",
-            "caution": "柔軟性の欠如、関節の硬化",
-            "lifestyle": "ストレッチ、ヨガ、柔軟性を高める運動"
-        },
-        "鉱床": {
-            "strength": "分析力、計画性、持久力",
-            "physical": "強固な骨格、ゆっくりとした代謝",
-            "caution": "循環不良、冷え性、消化不良",
-            "lifestyle": "有酸素運動、温かい食事、マッサージ"
-        },
-        "山": {
-            "strength": "安定性、信頼性、保守力",
-            "physical": "強靭な体格、ゆったりとした動作",
-            "caution": "変化への抵抗、頑固さ",
-            "lifestyle": "新しい経験、旅行、社交活動"
-        },
-        "流砂": {
-            "strength": "柔軟性、適応力、受容力",
-            "physical": "変化しやすい体調、敏感な消化器",
-            "caution": "境界の曖昧さ、依存傾向",
-            "lifestyle": "境界設定の練習、自己主張トレーニング"
-        },
-        "山火事": {
-            "strength": "コミュニケーション力、情熱、発信力",
-            "physical": "活発な代謝、敏感な呼吸器系",
-            "caution": "オーバーワーク、呼吸器疾患",
-            "lifestyle": "呼吸法、休息、森林浴"
-        },
-        "砂岩の彫刻家": {
-            "strength": "論理性、創造性、実用性の融合",
-            "physical": "バランスの取れた体質、安定した神経系",
-            "caution": "感情表現の抑制、緊張性頭痛",
-            "lifestyle": "感情解放、アート活動、音楽療法"
-        },
-        "サイクロン": {
-            "strength": "知的好奇心、多才、社交性",
-            "physical": "敏感な神経系、変動しやすいエネルギー",
-            "caution": "散漫、不眠、神経疲労",
-            "lifestyle": "瞑想、集中力トレーニング、十分な睡眠"
-        },
-        "霧": {
-            "strength": "共感力、想像力、柔軟な思考",
-            "physical": "繊細な体質、敏感な感覚器官",
-            "caution": "境界の喪失、エネルギー枯渇",
-            "lifestyle": "エネルギー管理、境界設定、グラウンディング"
-        },
-        "温泉": {
-            "strength": "癒しの力、情熱的な共感、行動力",
-            "physical": "温かい体質、活発な循環",
-            "caution": "感情の起伏、エネルギーの消耗",
-            "lifestyle": "感情調整、定期的な休息、水分補給"
-        },
-        "粘土": {
-            "strength": "創造性、実用性、育成力",
-            "physical": "しっとりとした体質、ゆったりとした代謝",
-            "caution": "停滞、むくみ、消化不良",
-            "lifestyle": "定期的な運動、リンパマッサージ、軽い食事"
-        },
-        "霧雨": {
-            "strength": "繊細さ、直感力、芸術性",
-            "physical": "敏感な体質、変動しやすい体調",
-            "caution": "過敏性、不安、エネルギー不足",
-            "lifestyle": "規則正しい生活、栄養管理、創作活動"
-        },
-        "海": {
-            "strength": "深い感受性、包容力、直感",
-            "physical": "流動的な体質、リンパ系が活発",
-            "caution": "感情の波、水分代謝の問題",
-            "lifestyle": "感情日記、水中運動、月のリズムに合わせた生活"
-        }
-    }
     
-    # デフォルト値
-    default_features = {
-        "strength": "バランスの取れた資質、適応力",
-        "physical": "標準的な体質、安定した健康状態",
-        "caution": "ストレス管理、生活習慣の維持",
-        "lifestyle": "規則正しい生活、適度な運動、バランスの取れた食事"
-    }
-    
-    return archetype_features.get(archetype_name, default_features)
+    return knowledge_base.ARCHETYPE_FEATURES.get(archetype_name, knowledge_base.DEFAULT_ARCHETYPE_FEATURES)
+
+# 7天体の定義（日本語名、天体暦テーブルのキー、ephem の天体クラス）
+PLANET_BODIES = [
+    ('太陽', 'sun', ephem.Sun),
+    ('月', 'moon', ephem.Moon),
+    ('水星', 'mercury', ephem.Mercury),
+    ('金星', 'venus', ephem.Venus),
+    ('火星', 'mars', ephem.Mars),
+    ('木星', 'jupiter', ephem.Jupiter),
+    ('土星', 'saturn', ephem.Saturn)
+]
+
+def compute_ecliptic_longitudes(utc, lat, lon):
+    """
+    UTC時刻における7天体の地球中心黄経（度）を計算
+    天体暦テーブルの範囲内なら補間で求め、範囲外やテーブルがない場合は ephem で直接計算する
+    """
+    if USE_EPHEMERIS_TABLES:
+        longitudes = ephemeris_tables.interpolate_longitudes(ephemeris_tables.datetime_to_ephem_days(utc))
+        if longitudes is not None:
+            metrics.EPHEMERIS_TABLE.inc()
+            return {name: longitudes[key] for name, key, _ in PLANET_BODIES}
+
+    metrics.EPHEMERIS_DIRECT.inc()
+
+    # 観測地点の設定
+    observer = ephem.Observer()
+    observer.lat = str(lat)
+    observer.lon = str(lon)
+    observer.elevation = 0
+    observer.date = utc.strftime('%Y/%m/%d %H:%M:%S')
+
+    results = {}
+    for name, _, body_cls in PLANET_BODIES:
+        # 天体位置を計算
+        planet = body_cls()
+        planet.compute(observer)
+
+        # 地球中心黄道座標を取得（占星術で使用する正しい座標系）
+        ecliptic = ephem.Ecliptic(planet)
+        results[name] = rad_to_deg(ecliptic.lon)
+    return results
+
+# 天体計算結果のキャッシュ（CHART_CACHE_SIZE で容量を指定、0 でキャッシュ無効）
+CHART_CACHE = LRUCache(int(os.environ.get('CHART_CACHE_SIZE', 1024)))
+metrics.register_cache('chart', CHART_CACHE)
 
 def calculate_celestial_positions(birth_year, birth_month, birth_day, birth_hour, birth_minute, prefecture):
     """
     天体位置を計算（地球中心黄道座標系を使用）
+    同じ出生データの結果は CHART_CACHE から返す（フォームの再送信やリロード対策）
     """
+    with timing.stage('chart'):
+        try:
+            cache_key = (int(birth_year), int(birth_month), int(birth_day),
+                         int(birth_hour), int(birth_minute), prefecture)
+        except (TypeError, ValueError):
+            return _compute_celestial_positions(birth_year, birth_month, birth_day, birth_hour, birth_minute, prefecture)
+
+        result = CHART_CACHE.get(cache_key)
+        if result is None:
+            result = _compute_celestial_positions(*cache_key)
+            if not result['success']:
+                return result
+            CHART_CACHE.put(cache_key, result)
+        return copy_chart_result(result)
+
+def copy_chart_result(result):
+    """キャッシュした計算結果を呼び出し側で書き換えても影響しないよう複製"""
+    calculation_info = dict(result['calculation_info'])
+    calculation_info['coordinates'] = dict(calculation_info['coordinates'])
+    calculation_info['archetype'] = dict(calculation_info['archetype'])
+    return {
+        'success': True,
+        'celestial_positions': {name: dict(position) for name, position in result['celestial_positions'].items()},
+        'calculation_info': calculation_info
+    }
+
+def _compute_celestial_positions(birth_year, birth_month, birth_day, birth_hour, birth_minute, prefecture):
+    """天体位置を計算する本体（キャッシュを介さない）"""
     try:
         # 都道府県座標を取得
         coords = PREFECTURE_COORDINATES.get(prefecture)
@@ -532,85 +420,29 @@ def calculate_celestial_positions(birth_year, birth_month, birth_day, birth_hour
         lat = coords['lat']
         lon = coords['lon']
 
-        # 観測地点の設定
-        observer = ephem.Observer()
-        observer.lat = str(lat)
-        observer.lon = str(lon)
-        observer.elevation = 0
-
         # JST時刻をUTCに変換（JST = UTC + 9時間）
         jst = datetime(birth_year, birth_month, birth_day, birth_hour, birth_minute, 0)
         utc = jst - timedelta(hours=9)
-        observer.date = utc.strftime('%Y/%m/%d %H:%M:%S')
-
-        # 7天体の定義
-        planets = {
-            '太陽': ephem.Sun(),
-            '月': ephem.Moon(),
-            '水星': ephem.Mercury(),
-            '金星': ephem.Venus(),
-            '火星': ephem.Mars(),
-            '木星': ephem.Jupiter(),
-            '土星': ephem.Saturn()
-        }
-
-        results = {}
 
-        for name, planet in planets.items():
-            # 天体位置を計算
-            planet.compute(observer)
+        # 7天体の黄経を計算
+        longitudes = compute_ecliptic_longitudes(utc, lat, lon)
 
-            # 地球中心黄道座標を取得（占星術で使用する正しい座標系）
-            ecliptic = ephem.Ecliptic(planet)
-            longitude_deg = rad_to_deg(ecliptic.lon)
+        results = {}
 
+        for name, longitude_deg in longitudes.items():
             # 星座情報を取得
             zodiac_name, degree_in_sign, zodiac_index = get_zodiac_info(longitude_deg)
 
-            # 度・分・秒に変換
-            deg, min_val, sec = deg_to_dms(degree_in_sign)
-
-            # 四元素を取得
-            element = get_element(zodiac_name)
-
             # 結果を保存
-            results[name] = {
-                'longitude_deg': round(longitude_deg, 6),
-                'zodiac': zodiac_name,
-                'zodiac_index': zodiac_index,
-                'degree_in_sign': round(degree_in_sign, 2),
-                'degrees': deg,
-                'minutes': min_val,
-                'seconds': round(sec, 1),
-                'element': element,
-                'formatted': f"{zodiac_name}{deg}度{min_val}分{sec:.1f}秒"
-            }
+            results[name] = build_planet_position(longitude_deg, zodiac_index, degree_in_sign)
 
         # 16原型判定用の太陽・月データを準備
-        sun_element = results['太陽']['element']
-        moon_element = results['月']['element']
-        archetype_key = (sun_element, moon_element)
-        archetype = SIXTEEN_ARCHETYPES.get(archetype_key, {
-            "name": "未分類", 
-            "element_combination": f"{sun_element}×{moon_element}",
-            "temperament": "複合的",
-            "body_type": "混合型"
-        })
-
-        # 計算情報を追加
-        calculation_info = {
-            'jst_datetime': jst.strftime('%Y年%m月%d日 %H時%M分'),
-            'utc_datetime': utc.strftime('%Y/%m/%d %H:%M:%S'),
-            'location': prefecture,
-            'coordinates': {'lat': lat, 'lon': lon},
-            'coordinate_system': '地球中心黄道座標系 (Geocentric Ecliptic)',
-            'archetype': archetype
-        }
+        archetype = resolve_archetype(results['太陽']['element'], results['月']['element'])
 
         return {
             'success': True,
             'celestial_positions': results,
-            'calculation_info': calculation_info
+            'calculation_info': build_calculation_info(jst, utc, prefecture, lat, lon, archetype)
         }
 
     except Exception as e:
@@ -619,24 +451,220 @@ def calculate_celestial_positions(birth_year, birth_month, birth_day, birth_hour
             'error': str(e)
         }
 
+def build_planet_position(longitude_deg, zodiac_index, degree_in_sign):
+    """黄経と星座情報から1天体分の位置データを生成"""
+    zodiac_name = ZODIAC_SIGNS[zodiac_index]
+
+    # 度・分・秒に変換
+    deg, min_val, sec = deg_to_dms(degree_in_sign)
+
+    # 四元素を取得
+    element = knowledge_base.ELEMENTS[knowledge_base.SIGN_ELEMENTS[zodiac_index]]
+
+    return {
+        'longitude_deg': round(longitude_deg, 6),
+        'zodiac': zodiac_name,
+        'zodiac_index': zodiac_index,
+        'degree_in_sign': round(degree_in_sign, 2),
+        'degrees': deg,
+        'minutes': min_val,
+        'seconds': round(sec, 1),
+        'element': element,
+        'formatted': f"{zodiac_name}{deg}度{min_val}分{sec:.1f}秒"
+    }
+
+def resolve_archetype(sun_element, moon_element):
+    """太陽と月の四元素から16原型を判定"""
+    index = knowledge_base.archetype_index(sun_element, moon_element)
+    if index is not None:
+        return dict(knowledge_base.ARCHETYPE_GRID[index])
+    return {
+        "name": "未分類", 
+        "element_combination": f"{sun_element}×{moon_element}",
+        "temperament": "複合的",
+        "body_type": "混合型"
+    }
+
+def build_calculation_info(jst, utc, prefecture, lat, lon, archetype):
+    """計算情報（日時・出生地・16原型）を生成"""
+    return {
+        'jst_datetime': jst.strftime('%Y年%m月%d日 %H時%M分'),
+        'utc_datetime': utc.strftime('%Y/%m/%d %H:%M:%S'),
+        'location': prefecture,
+        'coordinates': {'lat': lat, 'lon': lon},
+        'coordinate_system': '地球中心黄道座標系 (Geocentric Ecliptic)',
+        'archetype': archetype
+    }
+
+# 一括計算で一度に受け付ける最大件数
+MAX_BATCH_RECORDS = 10000
+
+# 星座番号 → 四元素番号（'火', '地', '風', '水' の順）の対応表
+ELEMENT_ORDER = ['火', '地', '風', '水']
+ZODIAC_ELEMENT_INDEX = np.array([0, 1, 2, 3] * 3)
+
+def calculate_celestial_positions_batch(records):
+    """
+    複数人の天体位置をまとめて計算（ベクトル化）
+    records: (JSTの出生日時 datetime, 都道府県名) のリスト
+    戻り値は calculate_celestial_positions と同じ形式の結果を records と同じ順に並べたリスト
+    """
+    results = [None] * len(records)
+
+    # 都道府県と日時を検証し、計算対象の行を集める
+    valid_rows = []
+    for i, (jst, prefecture) in enumerate(records):
+        if prefecture not in PREFECTURE_COORDINATES:
+            results[i] = {
+                'success': False,
+                'error': f"都道府県 '{prefecture}' の座標データが見つかりません"
+            }
+            continue
+        try:
+            jst - timedelta(hours=9)
+        except OverflowError as e:
+            # UTC に変換できない日時（西暦1年1月1日の9時前など）はその行だけエラーにする
+            results[i] = {'success': False, 'error': str(e)}
+            continue
+        valid_rows.append(i)
+
+    if not valid_rows:
+        return results
+
+    # JST時刻をUTCに変換し、7天体の黄経をまとめて補間（行 × 天体の行列）
+    jst_array = np.array([records[i][0] for i in valid_rows], dtype='datetime64[s]')
+    utc_array = jst_array - np.timedelta64(9, 'h')
+    longitudes = ephemeris_tables.interpolate_longitudes_array(
+        ephemeris_tables.datetimes_to_ephem_days(utc_array)) if USE_EPHEMERIS_TABLES else {}
+    matrix = np.column_stack([
+        longitudes.get(key, np.full(len(valid_rows), np.nan)) for _, key, _ in PLANET_BODIES
+    ])
+
+    # テーブル範囲外の行だけ ephem で直接計算
+    direct_rows = np.flatnonzero(np.isnan(matrix).any(axis=1))
+    metrics.EPHEMERIS_TABLE.inc(len(valid_rows) - len(direct_rows))
+    for row in direct_rows:
+        jst, prefecture = records[valid_rows[row]]
+        coords = PREFECTURE_COORDINATES[prefecture]
+        direct = compute_ecliptic_longitudes(jst - timedelta(hours=9), coords['lat'], coords['lon'])
+        matrix[row] = [direct[name] for name, _, _ in PLANET_BODIES]
+
+    # 星座・星座内度数・四元素・16原型をまとめて判定
+    zodiac_indices = (matrix / 30).astype(int)
+    degrees_in_sign = matrix - zodiac_indices * 30
+    element_indices = ZODIAC_ELEMENT_INDEX[zodiac_indices]
+    archetype_keys = [
+        (ELEMENT_ORDER[sun], ELEMENT_ORDER[moon])
+        for sun, moon in zip(element_indices[:, 0].tolist(), element_indices[:, 1].tolist())
+    ]
+
+    # 行ごとの結果を組み立てる
+    for row, (lon_row, zodiac_row, degree_row) in enumerate(
+            zip(matrix.tolist(), zodiac_indices.tolist(), degrees_in_sign.tolist())):
+        i = valid_rows[row]
+        jst, prefecture = records[i]
+        coords = PREFECTURE_COORDINATES[prefecture]
+        positions = {
+            name: build_planet_position(lon_row[col], zodiac_row[col], degree_row[col])
+            for col, (name, _, _) in enumerate(PLANET_BODIES)
+        }
+        results[i] = {
+            'success': True,
+            'celestial_positions': positions,
+            'calculation_info': build_calculation_info(
+                jst, jst - timedelta(hours=9), prefecture, coords['lat'], coords['lon'],
+                resolve_archetype(*archetype_keys[row]))
+        }
+
+    return results
+
+# 天体の運行（トランジット）の時系列で一度に返す最大の時刻数（1時間刻みの1年分を含む）
+MAX_TRANSIT_STEPS = 10000
+
+# 時系列をまとめて補間する時刻数（この件数ごとに NDJSON を送出する）
+TRANSIT_BLOCK_SIZE = 512
+
+# 時系列の刻み幅
+TRANSIT_STEPS = {'day': timedelta(days=1), 'hour': timedelta(hours=1)}
+
+# 時系列で指定できる年の範囲（範囲外はテーブルがなく ephem での計算になり、西暦1年付近は日時の変換もできない）
+TRANSIT_MIN_YEAR = 1900
+TRANSIT_MAX_YEAR = 2100
+
+# 星座番号 → (星座名, 四元素)
+SIGN_WITH_ELEMENT = tuple(
+    (sign, knowledge_base.ELEMENTS[knowledge_base.SIGN_ELEMENTS[index]]) for index, sign in enumerate(ZODIAC_SIGNS)
+)
+
+def iter_transit_blocks(start, end, step=TRANSIT_STEPS['day']):
+    """
+    start から end まで（JST、end を含む）step ごとの7天体の黄経を TRANSIT_BLOCK_SIZE 件ずつ返す
+    （日時の文字列のリスト, 時刻 × 天体の黄経のリスト, 時刻 × 天体の星座番号のリスト）
+    時刻ごとに calculate_celestial_positions を呼ばず、等間隔の時刻の配列をまとめて天体暦テーブルで補間する
+    （連続する時刻は同じ多項式の区間を共有する）。範囲外の時刻だけ ephem で直接計算する
+    日時の文字列は分単位のため、start の秒以下は切り捨ててから計算する（表示と黄経の時刻を揃える）
+    """
+    start = start.replace(second=0, microsecond=0)
+    count = int((end - start) / step) + 1 if end >= start else 0
+    start_days = ephemeris_tables.datetime_to_ephem_days(start - timedelta(hours=9))
+    step_days = step / timedelta(days=1)
+    step_minutes = np.timedelta64(int(step / timedelta(minutes=1)), 'm')
+    # ephem で直接計算する場合も天体のオブジェクトは使い回す
+    bodies = {key: body_cls() for _, key, body_cls in PLANET_BODIES}
+
+    for block_start in range(0, count, TRANSIT_BLOCK_SIZE):
+        indices = np.arange(block_start, min(block_start + TRANSIT_BLOCK_SIZE, count))
+        days = start_days + indices * step_days
+        longitudes = ephemeris_tables.interpolate_longitudes_array(days) if USE_EPHEMERIS_TABLES else {}
+        matrix = np.column_stack([
+            longitudes.get(key, np.full(len(days), np.nan)) for _, key, _ in PLANET_BODIES
+        ])
+
+        direct_rows = np.flatnonzero(np.isnan(matrix).any(axis=1))
+        metrics.EPHEMERIS_TABLE.inc(len(days) - len(direct_rows))
+        metrics.EPHEMERIS_DIRECT.inc(len(direct_rows))
+        for row in direct_rows:
+            matrix[row] = [ephemeris_tables.ephem_longitude(bodies[key], days[row]) for _, key, _ in PLANET_BODIES]
+
+        datetimes = np.datetime_as_string(np.datetime64(start, 'm') + indices * step_minutes, unit='m')
+        yield datetimes.tolist(), np.round(matrix, 6).tolist(), (matrix / 30).astype(int).tolist()
+
+def calculate_transits(start, end, step=TRANSIT_STEPS['day']):
+    """start から end まで（JST、end を含む）step ごとの7天体の黄経・星座・四元素を時刻順に返す"""
+    for datetimes, longitude_rows, zodiac_rows in iter_transit_blocks(start, end, step):
+        for datetime_text, lon_row, zodiac_row in zip(datetimes, longitude_rows, zodiac_rows):
+            positions = {}
+            for (name, _, _), longitude, zodiac_index in zip(PLANET_BODIES, lon_row, zodiac_row):
+                zodiac, element = SIGN_WITH_ELEMENT[zodiac_index]
+                positions[name] = {'longitude_deg': longitude, 'zodiac': zodiac, 'element': element}
+            yield {'datetime': datetime_text, 'positions': positions}
+
+def transit_ndjson_blocks(start, end, step=TRANSIT_STEPS['day']):
+    """
+    calculate_transits の各時刻を json.dumps(ensure_ascii=False) した行を、ブロックごとにまとめて返す
+    天体名・星座・四元素の部分を事前に組み立てておき、行ごとに辞書を作ってエンコードする手間を省く
+    """
+    fragments = [
+        [(json.dumps(name, ensure_ascii=False) + ': {"longitude_deg": ',
+          f', "zodiac": {json.dumps(zodiac, ensure_ascii=False)}, "element": {json.dumps(element, ensure_ascii=False)}}}')
+         for zodiac, element in SIGN_WITH_ELEMENT]
+        for name, _, _ in PLANET_BODIES
+    ]
+    for datetimes, longitude_rows, zodiac_rows in iter_transit_blocks(start, end, step):
+        lines = []
+        for datetime_text, lon_row, zodiac_row in zip(datetimes, longitude_rows, zodiac_rows):
+            parts = []
+            for planet_fragments, longitude, zodiac_index in zip(fragments, lon_row, zodiac_row):
+                prefix, suffix = planet_fragments[zodiac_index]
+                parts.append(prefix + repr(longitude) + suffix)
+            lines.append('{"datetime": "' + datetime_text + '", "positions": {' + ', '.join(parts) + '}}\n')
+        yield ''.join(lines)
+
 def translate_to_japanese(text):
     """英語の占星術用語を日本語に変換"""
-    translations = {
-        # 星座名
-        'Aries': '牡羊座', 'Taurus': '牡牛座', 'Gemini': '双子座', 'Cancer': '蟹座',
-        'Leo': '獅子座', 'Virgo': '乙女座', 'Libra': '天秤座', 'Scorpio': '蠍座',
-        'Sagittarius': '射手座', 'Capricorn': '山羊座', 'Aquarius': '水瓶座', 'Pisces': '魚座',
-
-        # 四元素
-        'Fire': '火', 'Earth': '地', 'Air': '風', 'Water': '水',
-
-        # 天体名
-        'Sun': '太陽', 'Moon': '月', 'Mercury': '水星', 'Venus': '金星',
-        'Mars': '火星', 'Jupiter': '木星', 'Saturn': '土星'
-    }
 
     result = text
-    for eng, jpn in translations.items():
+    for eng, jpn in knowledge_base.ASTROLOGY_TERM_TRANSLATIONS.items():
         result = result.replace(eng, jpn)
     return result
 
@@ -644,8 +672,14 @@ def translate_to_japanese(text):
 
 @app.route('/')
 def input_form():
-    """入力ページ"""
-    return render_template('input.html', prefectures=list(PREFECTURE_COORDINATES.keys()))
+    """入力ページ（内容はアプリのバージョンだけで決まる）"""
+    etag = http_cache.etag_for('input_form')
+    response = http_cache.not_modified(etag, http_cache.CONTENT_MODIFIED)
+    if response is not None:
+        return response
+    response = Response(render_template('input.html', prefectures=list(PREFECTURE_COORDINATES.keys())),
+                        mimetype='text/html')
+    return http_cache.set_validators(response, etag, http_cache.CONTENT_MODIFIED)
 
 @app.route('/result', methods=['POST'])
 def show_result():
@@ -699,70 +733,31 @@ def show_result():
                 'water_count': elements['水']
             }
             
-            # 元素の意味を設定
-            element_meanings = {
-                '火': '活動的でエネルギッシュな体質',
-                '地': '安定性と持続力のある体質',
-                '風': '柔軟性と適応力の高い体質',
-                '水': '感受性と直感力に優れた体質'
-            }
-            
             # 体質原型の詳細情報を生成
             archetype_info = result['calculation_info']['archetype']
             
             # 体質原型に基づく詳細な特徴を設定
-            archetype_details = _get_archetype_details(archetype_info.get('name', ''))
-            archetype_info.update(archetype_details)
+            with timing.stage('archetype'):
+                archetype_details = _get_archetype_details(archetype_info.get('name', ''))
+                archetype_info.update(archetype_details)
             
             # calculation_infoに元素情報を追加
             result['calculation_info']['elements'] = element_percents
             result['calculation_info']['dominant_element'] = dominant_element
-            result['calculation_info']['element_meaning'] = element_meanings.get(dominant_element, '')
+            result['calculation_info']['element_meaning'] = knowledge_base.ELEMENT_CONSTITUTION_MEANINGS.get(dominant_element, '')
             
             # レポート用の追加情報を生成
             info = result['calculation_info']
             
-            # 太陽と月の性質を設定
-            sun_qualities = {
-                '牡羊座': '積極的で率直な', '牡牛座': '堅実で忍耐強い',
-                '双子座': '知的で社交的な', '蟹座': '感受性豊かで保護的な',
-                '獅子座': '創造的で自信のある', '乙女座': '分析的で実践的な',
-                '天秤座': '調和的でバランスの取れた', '蠍座': '深遠で変容力のある',
-                '射手座': '楽観的で冒険心のある', '山羊座': '責任感が強く野心的な',
-                '水瓶座': '革新的で独立心のある', '魚座': '直感的で共感性の高い'
-            }
-            
-            moon_qualities = {
-                '牡羊座': '即座の感情反応と独立心', '牡牛座': '安定した感情と持続性',
-                '双子座': '柔軟で適応力のある', '蟹座': '深い感情と養育的な本能',
-                '獅子座': '温かく寛大な感情表現', '乙女座': '慎重で分析的な感情処理',
-                '天秤座': '調和を求め客観的な視点を保持', '蠍座': '深い感情と強い直感',
-                '射手座': '楽観的で自由を求める感情', '山羊座': '抑制的で実践的な感情管理',
-                '水瓶座': '独立的で理性的な感情処理', '魚座': '共感的で境界の曖昧な感情'
-            }
-            
-            sun_identities = {
-                '牡羊座': '先駆者精神とリーダーシップに優れ', '牡牛座': '安定性と美的感覚に優れ',
-                '双子座': '知的でコミュニケーション能力に優れ', '蟹座': '育成力と感情的知性に優れ',
-                '獅子座': '創造性とカリスマ性に優れ', '乙女座': '実践力と分析力に優れ',
-                '天秤座': '協調性と美的センスに優れ', '蠍座': '洞察力と変容力に優れ',
-                '射手座': '探求心と楽観性に優れ', '山羊座': '組織力と達成力に優れ',
-                '水瓶座': '革新性と独創性に優れ', '魚座': '直感力と創造性に優れ'
-            }
-            
-            info['sun_quality'] = sun_qualities.get(result['celestial_positions']['太陽']['zodiac'], '独特な')
-            info['moon_quality'] = moon_qualities.get(result['celestial_positions']['月']['zodiac'], '独特な')
-            info['sun_identity'] = sun_identities.get(result['celestial_positions']['太陽']['zodiac'], '多面的な才能を持ち')
-            info['moon_emotion'] = moon_qualities.get(result['celestial_positions']['月']['zodiac'], '感情を独自の方法で処理')
+            info['sun_quality'] = knowledge_base.SUN_SIGN_QUALITIES.get(result['celestial_positions']['太陽']['zodiac'], '独特な')
+            info['moon_quality'] = knowledge_base.MOON_SIGN_QUALITIES.get(result['celestial_positions']['月']['zodiac'], '独特な')
+            info['sun_identity'] = knowledge_base.SUN_SIGN_IDENTITIES.get(result['celestial_positions']['太陽']['zodiac'], '多面的な才能を持ち')
+            info['moon_emotion'] = knowledge_base.MOON_SIGN_QUALITIES.get(result['celestial_positions']['月']['zodiac'], '感情を独自の方法で処理')
             
             # 元素ごとの天体リストを作成
             element_planets = {'火': [], '地': [], '風': [], '水': []}
-            planet_names = {
-                '太陽': 'sun', '月': 'moon', '水星': 'mercury',
-                '金星': 'venus', '火星': 'mars', '木星': 'jupiter', '土星': 'saturn'
-            }
             
-            for planet_jp, planet_en in planet_names.items():
+            for planet_jp, planet_en in knowledge_base.PLANET_NAMES_EN.items():
                 element = result['celestial_positions'][planet_jp]['element']
                 if element in element_planets:
                     element_planets[element].append(planet_en)
@@ -777,48 +772,9 @@ def show_result():
             info['dominant_count'] = max(elements.values())
             info['dominant_planets'] = ', '.join(element_planets[dominant]) if element_planets[dominant] else ''
             
-            # 人生のテーマと特別な才能
-            life_themes = {
-                '火のカリスマ': '情熱的なリーダーシップと創造',
-                'マグマ': '爆発的な創造力の発揮',
-                '聖火': '理想の実現と持続的な情熱',
-                '野火': '直感と冒険による成長',
-                '竈の火': '実践的な創造と安定',
-                '鉱床': '知識の蓄積と分析',
-                '山': '不動の信頼性と保護',
-                '流砂': '柔軟な適応と受容',
-                '山火事': '情熱的なコミュニケーション',
-                '砂岩の彫刻家': '論理と創造の統合',
-                'サイクロン': '多様な視点と知的な探求',
-                '霧': '想像力と共感の深化',
-                '温泉': '癒しと情熱の融合',
-                '粘土': '創造と実践の統合',
-                '霧雨': '繊細な感受性と芸術',
-                '海': '深い感情と包容力'
-            }
-            
-            special_talents = {
-                '火のカリスマ': '強力な影響力とリーダーシップ',
-                'マグマ': '変革を起こす創造力',
-                '聖火': '持続的な情熱と献身',
-                '野火': '瞬発的な適応力',
-                '竈の火': '実践的な問題解決力',
-                '鉱床': '深い分析力と計画性',
-                '山': '揺るぎない信頼性',
-                '流砂': '無限の適応力',
-                '山火事': '熱意あるコミュニケーション',
-                '砂岩の彫刻家': '知的な創造性',
-                'サイクロン': '知的な革新性',
-                '霧': '深い共感力と想像力',
-                '温泉': '癒しの力と行動力',
-                '粘土': '形を与える創造力',
-                '霧雨': '繊細な芸術性',
-                '海': '無限の包容力'
-            }
-            
             archetype_name = info['archetype']['name']
-            info['life_theme'] = life_themes.get(archetype_name, '自己実現と成長')
-            info['special_talent'] = special_talents.get(archetype_name, '独自の才能')
+            info['life_theme'] = knowledge_base.ARCHETYPE_LIFE_THEMES.get(archetype_name, '自己実現と成長')
+            info['special_talent'] = knowledge_base.ARCHETYPE_SPECIAL_TALENTS.get(archetype_name, '独自の才能')
             
             # 火星と土星のコンビネーション解釈
             mars_sign = result['celestial_positions']['火星']['zodiac']
@@ -891,6 +847,174 @@ def calculate_api():
     except Exception as e:
         return jsonify({'success': False, 'error': f'計算エラー: {str(e)}'})
 
+@app.route('/calculate_batch', methods=['POST'])
+def calculate_batch_api():
+    """天体計算の一括API（顧客リストなど複数件をまとめて計算）"""
+    try:
+        data = request.json
+        records = data.get('records') if isinstance(data, dict) else None
+        if not isinstance(records, list):
+            return jsonify({'success': False, 'error': 'records に出生データの配列を指定してください'})
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({'success': False, 'error': f'一度に計算できるのは {MAX_BATCH_RECORDS} 件までです'})
+
+        required_fields = ['birth_year', 'birth_month', 'birth_day', 'birth_hour', 'birth_minute', 'prefecture']
+
+        # 入力データを検証し、計算可能な行だけをまとめる
+        results = [None] * len(records)
+        batch = []
+        batch_rows = []
+        for i, record in enumerate(records):
+            try:
+                missing = [field for field in required_fields if field not in record]
+                if missing:
+                    raise ValueError(f'必須フィールド {missing[0]} が不足しています')
+                jst = datetime(
+                    int(record['birth_year']),
+                    int(record['birth_month']),
+                    int(record['birth_day']),
+                    int(record['birth_hour']),
+                    int(record['birth_minute'])
+                )
+            except (TypeError, ValueError, OverflowError) as e:
+                results[i] = {'success': False, 'error': f'入力値エラー: {str(e)}'}
+                continue
+            batch.append((jst, record['prefecture']))
+            batch_rows.append(i)
+
+        for i, result in zip(batch_rows, calculate_celestial_positions_batch(batch)):
+            # 名前を結果に追加
+            if result['success']:
+                result['name'] = records[i].get('name', 'お客様')
+            results[i] = result
+
+        return jsonify({'success': True, 'count': len(results), 'results': results})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'計算エラー: {str(e)}'})
+
+@app.route('/transits')
+def transits_api():
+    """
+    天体の運行の時系列API（カレンダー用）
+    ?start=2025-01-01&end=2025-12-31&step=day（step は day / hour、日時は JST の YYYY-MM-DD または YYYY-MM-DDTHH:MM）
+    1行に1時刻の JSON（NDJSON）をストリーミング送信する。秒以下は切り捨てる
+    """
+    try:
+        if not request.args.get('start'):
+            return jsonify({'success': False, 'error': '必須パラメータ start が不足しています'})
+        start = datetime.fromisoformat(request.args['start'])
+        end = datetime.fromisoformat(request.args.get('end') or request.args['start'])
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'入力値エラー: {str(e)}'})
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return jsonify({'success': False, 'error': '日時はタイムゾーンを付けずに JST で指定してください'})
+    # 応答のヘッダーを送る前に範囲を確認する（送信中の計算エラーで途中までの応答にならないようにする）
+    if not (TRANSIT_MIN_YEAR <= start.year <= TRANSIT_MAX_YEAR and TRANSIT_MIN_YEAR <= end.year <= TRANSIT_MAX_YEAR):
+        return jsonify({'success': False, 'error': f'日時は {TRANSIT_MIN_YEAR}〜{TRANSIT_MAX_YEAR} 年の範囲で指定してください'})
+    start = start.replace(second=0, microsecond=0)
+    end = end.replace(second=0, microsecond=0)
+
+    step_name = request.args.get('step', 'day')
+    if step_name not in TRANSIT_STEPS:
+        return jsonify({'success': False, 'error': 'step には day または hour を指定してください'})
+    step = TRANSIT_STEPS[step_name]
+    if end < start:
+        return jsonify({'success': False, 'error': 'end には start 以降の日時を指定してください'})
+    if (end - start) / step >= MAX_TRANSIT_STEPS:
+        return jsonify({'success': False, 'error': f'一度に計算できるのは {MAX_TRANSIT_STEPS} 時刻までです'})
+
+    etag = http_cache.etag_for('transits', start.isoformat(), end.isoformat(), step_name)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+
+    response = Response(transit_ndjson_blocks(start, end, step), mimetype='application/x-ndjson')
+    return http_cache.set_validators(response, etag)
+
+@app.route('/synastry', methods=['POST'])
+def synastry_api():
+    """
+    相性検索API（登録済みの母集団から相性の良い上位 k 件を返す）
+    /calculate と同じ出生データに加え、k（件数、既定 10）と exclude（除外する ID、本人が登録済みの場合など）を指定できる
+    """
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': '出生データを JSON で指定してください'})
+
+        required_fields = ['birth_year', 'birth_month', 'birth_day', 'birth_hour', 'birth_minute', 'prefecture']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'success': False, 'error': f'必須フィールド {field} が不足しています'})
+        k = int(data.get('k', 10))
+        if not 1 <= k <= MAX_SYNASTRY_MATCHES:
+            return jsonify({'success': False, 'error': f'k には 1〜{MAX_SYNASTRY_MATCHES} を指定してください'})
+
+        index = load_synastry_index()
+        if index is None:
+            return jsonify({'success': False, 'error': '相性検索の母集団が登録されていません（python synastry.py build で作成してください）'})
+
+        result = calculate_celestial_positions(
+            int(data['birth_year']),
+            int(data['birth_month']),
+            int(data['birth_day']),
+            int(data['birth_hour']),
+            int(data['birth_minute']),
+            data['prefecture']
+        )
+        if not result['success']:
+            return jsonify(result)
+
+        exclude = data.get('exclude')
+        matches = index.top_matches(result['celestial_positions'], k=k,
+                                    exclude=str(exclude) if exclude is not None else None)
+        return jsonify({'success': True, 'population': len(index), 'matches': matches})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'入力値エラー: {str(e)}'})
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'計算エラー: {str(e)}'})
+
+@app.route('/population_stats')
+def population_stats_api():
+    """
+    母集団の統計API（出生日の範囲の16原型・四元素・クオリティの分布）
+    ?start=1980-01-01&end=1989-12-31&prefectures=東京都,大阪府（省略時は全期間・全国）
+    事前に生成した累積テーブルの差で求めるため、天体計算は行わない。天体の位置は地球中心黄経で時刻は全国共通の JST のため、
+    分布は都道府県によらない（prefectures は検証して応答に含めるだけ）
+    """
+    stats = population_stats.load_stats()
+    if stats is None:
+        response = jsonify({'success': False, 'error': '母集団の統計テーブルがありません（python population_stats.py build で作成してください）'})
+        # テーブルを生成すれば次のリクエストから読み込まれるため、キャッシュさせない
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    try:
+        start = date.fromisoformat(request.args.get('start') or population_stats.START_DATE.isoformat())
+        end = date.fromisoformat(request.args.get('end') or population_stats.END_DATE.isoformat())
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'入力値エラー: {str(e)}'})
+    prefectures = [name.strip() for name in request.args.get('prefectures', '').split(',') if name.strip()]
+    unknown = [name for name in prefectures if name not in PREFECTURE_COORDINATES]
+    if unknown:
+        return jsonify({'success': False, 'error': f"都道府県 '{unknown[0]}' の座標データが見つかりません"})
+
+    # テーブルを作り直した場合に古い応答を使わないよう、テーブルの内容のハッシュも含める
+    etag = http_cache.etag_for('population_stats', start.isoformat(), end.isoformat(),
+                               stats['checksum'], prefectures)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+
+    try:
+        result = population_stats.distribution(stats, start, end)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    result.update(success=True, prefectures=prefectures or list(PREFECTURE_COORDINATES))
+    return http_cache.set_validators(jsonify(result), etag)
+
 @app.route('/basic_report')
 def basic_report_page():
     """基本レポートページ（2000文字）"""
@@ -902,16 +1026,19 @@ def basic_report_page():
     
     # セッションから天体データを取得
     celestial_data_raw = session.get('celestial_data')
+
+    # 入力が前回と同じなら描画せずに 304 を返す
+    etag = http_cache.etag_for('basic_report', name, archetype_name, celestial_data_raw)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+
     if celestial_data_raw:
         try:
             celestial_positions = json.loads(celestial_data_raw)
             # データ形式を変換
             celestial_data = {}
-            planet_mapping = {
-                '太陽': 'sun', '月': 'moon', '水星': 'mercury',
-                '金星': 'venus', '火星': 'mars', '木星': 'jupiter', '土星': 'saturn'
-            }
-            for jp_name, en_name in planet_mapping.items():
+            for jp_name, en_name in knowledge_base.PLANET_NAMES_EN.items():
                 if jp_name in celestial_positions:
                     celestial_data[en_name] = {
                         'sign': celestial_positions[jp_name]['zodiac'],
@@ -945,7 +1072,7 @@ def basic_report_page():
     archetype = None
     for key, value in SIXTEEN_ARCHETYPES.items():
         if value['name'] == archetype_name:
-            archetype = value
+            archetype = dict(value)
             archetype['key_traits'] = ['直感的', '情熱的', '創造的', '独立心が強い']
             break
     
@@ -958,10 +1085,12 @@ def basic_report_page():
             "key_traits": ['適応力が高い', '柔軟性がある', '創造的', '直感的']
         }
     
-    return render_template('basic_report.html', 
-                         name=name,
-                         archetype=archetype,
-                         celestial_data=celestial_data)
+    response = Response(render_template('basic_report.html', 
+                                        name=name,
+                                        archetype=archetype,
+                                        celestial_data=celestial_data),
+                        mimetype='text/html')
+    return http_cache.set_validators(response, etag)
 
 @app.route('/detailed_report') 
 def detailed_report_page():
@@ -980,107 +1109,316 @@ def detailed_report_page():
     
     # セッションから天体データを取得
     celestial_data_raw = session.get('celestial_data')
-    celestial_data = {}
     
     if celestial_data_raw:
         try:
-            celestial_positions = json.loads(celestial_data_raw)
-            planet_mapping = {
-                '太陽': 'sun', '月': 'moon', '水星': 'mercury',
-                '金星': 'venus', '火星': 'mars', '木星': 'jupiter', '土星': 'saturn'
-            }
-            for jp_name, en_name in planet_mapping.items():
-                if jp_name in celestial_positions:
-                    planet_info = {
-                        'sign': celestial_positions[jp_name]['zodiac'],
-                        'element': celestial_positions[jp_name]['element'],
-                        'degree': celestial_positions[jp_name]['degree_in_sign'],
-                        'quality': get_sign_quality(celestial_positions[jp_name]['zodiac'])
-                    }
-                    # サビアンシンボルを追加
-                    sabian = get_sabian_for_position(
-                        celestial_positions[jp_name]['zodiac'],
-                        celestial_positions[jp_name]['degree_in_sign']
-                    )
-                    if sabian:
-                        planet_info['sabian'] = sabian
-                    celestial_data[en_name] = planet_info
+            celestial_data = build_report_celestial_data(json.loads(celestial_data_raw))
         except:
             celestial_data = get_default_celestial_data()
     else:
         celestial_data = get_default_celestial_data()
     
     # アーキタイプ情報を取得
-    archetype = None
-    sun_element = celestial_data.get('sun', {}).get('element', '火')
-    moon_element = celestial_data.get('moon', {}).get('element', '水')
-    archetype_key = (sun_element, moon_element)
+    archetype, sun_element, moon_element = resolve_report_archetype(celestial_data, archetype_name)
     
-    if archetype_key in SIXTEEN_ARCHETYPES:
-        archetype = SIXTEEN_ARCHETYPES[archetype_key].copy()
-    else:
-        # アーキタイプ名から検索
-        for key, value in SIXTEEN_ARCHETYPES.items():
-            if value['name'] == archetype_name:
-                archetype = value.copy()
-                break
+    # レポート生成日時
+    report_date = datetime.now().strftime('%Y年%m月%d日')
     
-    if not archetype:
-        archetype = {
-            "name": "調和の探究者",
-            "name_en": "The Harmony Seeker",
-            "element_combination": f"{sun_element}×{moon_element}",
-            "temperament": "複合型気質",
-            "body_type": "混合体質",
-            "tagline": "多様な要素を統合し、独自のバランスを見出す者",
-            "core": "複数の要素が織りなす独特な個性を持つ存在",
-            "talents": "適応力と柔軟性、多角的な視点",
-            "challenges": "方向性の模索と統合への道"
-        }
+    # 入力（レポートIDと作成日）が前回と同じならレポートを生成せずに 304 を返す
+    # 作成日は HTML に描画されるためレポートIDに含める（日付が変わると別のレポートとして生成・保存する）
+    # 第2章のアスペクトはオーブの設定（ASPECT_ORBS）で変わるため、実際に使うオーブも含める
+    report_id = report_id_for(app.secret_key, name=name, archetype=archetype, celestial_data=celestial_data,
+                              report_date=report_date, orbs=aspects.orb_limits().tolist())
+    etag = http_cache.etag_for('detailed_report', report_id)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
     
-    # 包括的な12,000文字レポートの生成
-    report_content = generate_comprehensive_report(
-        name=name,
-        archetype=archetype,
-        celestial_data=celestial_data,
-        sun_element=sun_element,
-        moon_element=moon_element
-    )
+    # 同じ入力のレポートが保存済みなら再生成せずに返す
+    if REPORT_STORE is not None:
+        stored = REPORT_STORE.get_compressed(report_id)
+        if stored is not None:
+            return stored_report_response(report_id, stored, etag)
     
     # 統計情報の計算
     element_distribution = calculate_element_distribution(celestial_data)
     quality_distribution = calculate_quality_distribution(celestial_data)
-    
-    # レポート生成日時
-    report_date = datetime.now().strftime('%Y年%m月%d日')
+    chart_aspects = describe_aspects(celestial_data)
     
     # アーキタイプ名を取得
     archetype_name = session.get('archetype_name', '未分類')
     archetype_name_en = session.get('archetype_name_en', '')
     
+    # バックグラウンド生成（?async=1 または ASYNC_DETAILED_REPORT=1）
+    # ジョブIDをすぐに返し、生成はワーカースレッドで行う
+    if request.args.get('async', '1' if ASYNC_DETAILED_REPORT else '0') == '1':
+        generators = report_chapter_generators(name, archetype, celestial_data, sun_element, moon_element,
+                                               chart_aspects)
+        context = {
+            'name': name,
+            'archetype': archetype,
+            'celestial_data': celestial_data,
+            'element_distribution': element_distribution,
+            'aspects': chart_aspects,
+            'quality_distribution': quality_distribution,
+            'report_date': report_date
+        }
+        job = REPORT_JOBS.submit(list(generators), copy_current_request_context(run_report_job),
+                                 report_id, generators, context)
+        if job is None:
+            response = jsonify({'success': False, 'error': 'ただいま混み合っています。しばらくしてから再度お試しください',
+                                'queue': REPORT_JOBS.stats()})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        status_url = f'/report_status/{job.id}'
+        result_url = f'/report_result/{job.id}'
+        if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+            response = jsonify({'success': True, 'job_id': job.id, 'status_url': status_url, 'result_url': result_url})
+        else:
+            response = Response(render_template('report_waiting.html', name=name,
+                                                status_url=status_url, result_url=result_url),
+                                mimetype='text/html')
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        response.headers['X-Report-Id'] = report_id
+        return response
+    
+    # ストリーミング表示（?stream=1 または STREAM_DETAILED_REPORT=1）
+    # ヘッダー・表紙・第1章を先に送り出し、以降の章は送信しながら生成する
+    if request.args.get('stream', '1' if STREAM_DETAILED_REPORT else '0') == '1':
+        report_content = LazyReportContent(report_chapter_generators(
+            name, archetype, celestial_data, sun_element, moon_element, chart_aspects))
+        chunks = stream_template('detailed_report_complete.html',
+                                 name=name,
+                                 archetype=archetype,
+                                 celestial_data=celestial_data,
+                                 report_content=report_content,
+                                 element_distribution=element_distribution,
+                                 quality_distribution=quality_distribution,
+                                 aspects=chart_aspects,
+                                 report_date=report_date,
+                                 total_characters=None)
+        stream = stream_report_chapters(chunks, report_content)
+        if REPORT_STORE is not None:
+            stream = store_streamed_report(stream, report_id)
+        response = Response(stream_with_context(stream), mimetype='text/html')
+        # プロキシでのバッファリングを無効化して章ごとに届くようにする
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.headers['X-Report-Id'] = report_id
+        return http_cache.set_validators(response, etag)
+    
+    html = compression.prepare_html(
+        render_detailed_report(name, archetype, celestial_data, sun_element, moon_element, report_date,
+                               chart_aspects))
+    if REPORT_STORE is not None:
+        REPORT_STORE.put(report_id, html)
+    response = Response(html, mimetype='text/html')
+    response.headers['X-Report-Id'] = report_id
+    return http_cache.set_validators(response, etag)
+
+@app.route('/report/<report_id>')
+def stored_report_page(report_id):
+    """保存済みの詳細レポートをレポートIDで返す（メールのリンクなどから再表示）"""
+    etag = http_cache.etag_for('report', report_id)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+    stored = REPORT_STORE.get_compressed(report_id) if REPORT_STORE is not None else None
+    if stored is None:
+        abort(404)
+    return stored_report_response(report_id, stored, etag)
+
+def build_report_celestial_data(celestial_positions):
+    """calculate_celestial_positions の天体データを詳細レポート用（英語の天体キー、サビアンシンボル付き）に変換"""
+    with timing.stage('sabian'):
+        celestial_data = {}
+        for jp_name, en_name in knowledge_base.PLANET_NAMES_EN.items():
+            if jp_name in celestial_positions:
+                planet_info = {
+                    'sign': celestial_positions[jp_name]['zodiac'],
+                    'element': celestial_positions[jp_name]['element'],
+                    'degree': celestial_positions[jp_name]['degree_in_sign'],
+                    'quality': get_sign_quality(celestial_positions[jp_name]['zodiac'])
+                }
+                # サビアンシンボルを追加
+                sabian = get_sabian_for_position(
+                    celestial_positions[jp_name]['zodiac'],
+                    celestial_positions[jp_name]['degree_in_sign']
+                )
+                if sabian:
+                    planet_info['sabian'] = sabian
+                celestial_data[en_name] = planet_info
+        return celestial_data
+
+def resolve_report_archetype(celestial_data, archetype_name='未分類'):
+    """詳細レポート用のアーキタイプと太陽・月の元素を返す（(archetype, sun_element, moon_element)）"""
+    with timing.stage('archetype'):
+        archetype = None
+        sun_element = celestial_data.get('sun', {}).get('element', '火')
+        moon_element = celestial_data.get('moon', {}).get('element', '水')
+        archetype_key = (sun_element, moon_element)
+        
+        if archetype_key in SIXTEEN_ARCHETYPES:
+            archetype = SIXTEEN_ARCHETYPES[archetype_key].copy()
+        else:
+            # アーキタイプ名から検索
+            for key, value in SIXTEEN_ARCHETYPES.items():
+                if value['name'] == archetype_name:
+                    archetype = value.copy()
+                    break
+        
+        if not archetype:
+            archetype = {
+                "name": "調和の探究者",
+                "name_en": "The Harmony Seeker",
+                "element_combination": f"{sun_element}×{moon_element}",
+                "temperament": "複合型気質",
+                "body_type": "混合体質",
+                "tagline": "多様な要素を統合し、独自のバランスを見出す者",
+                "core": "複数の要素が織りなす独特な個性を持つ存在",
+                "talents": "適応力と柔軟性、多角的な視点",
+                "challenges": "方向性の模索と統合への道"
+            }
+        return archetype, sun_element, moon_element
+
+def render_detailed_report(name, archetype, celestial_data, sun_element, moon_element, report_date,
+                           chart_aspects=None):
+    """
+    包括的な12,000文字レポートを生成し、詳細レポートの HTML を返す（リクエストコンテキスト内で呼ぶ）
+    chart_aspects は describe_aspects の結果（省略時はここで1回だけ求め、第2章とテンプレートで共有する）
+    """
+    if chart_aspects is None:
+        chart_aspects = describe_aspects(celestial_data)
+    report_content = generate_comprehensive_report(
+        name=name,
+        archetype=archetype,
+        celestial_data=celestial_data,
+        sun_element=sun_element,
+        moon_element=moon_element,
+        chart_aspects=chart_aspects
+    )
+    
+    metrics.REPORT_CHARACTERS.observe(len(report_content['full_text']))
     return render_template('detailed_report_complete.html',
                          name=name,
                          archetype=archetype,
                          celestial_data=celestial_data,
                          report_content=report_content,
-                         element_distribution=element_distribution,
-                         quality_distribution=quality_distribution,
+                         element_distribution=calculate_element_distribution(celestial_data),
+                         quality_distribution=calculate_quality_distribution(celestial_data),
+                         aspects=chart_aspects,
                          report_date=report_date,
                          total_characters=len(report_content['full_text']))
 
+def run_report_job(job, report_id, generators, context):
+    """
+    バックグラウンドで各章を順に生成して進捗を記録する
+    レポートストアがあれば HTML はストアに保存してレポートIDを、なければ描画した HTML を結果として返す
+    （完了したジョブが HTML の複製をメモリに持ち続けないようにする）
+    """
+    builder = ReportBuilder()
+    for key, generate in generators.items():
+        builder.add(key, generate())
+        job.chapter_done(key)
+    report_content = builder.build()
+    metrics.REPORT_CHARACTERS.observe(len(report_content['full_text']))
+    html = compression.prepare_html(render_template('detailed_report_complete.html',
+                                                    report_content=report_content,
+                                                    total_characters=len(report_content['full_text']),
+                                                    **context))
+    if REPORT_STORE is not None:
+        REPORT_STORE.put(report_id, html)
+        return report_id
+    return html
+
+@app.route('/report_status/<job_id>')
+def report_status_api(job_id):
+    """レポート生成ジョブの進捗（章ごと）とキューの状況を返す"""
+    job = REPORT_JOBS.get(job_id)
+    if job is None:
+        response = jsonify({'success': False, 'error': 'ジョブが見つかりません'})
+        response.status_code = 404
+        return response
+    status = job.to_dict()
+    status['success'] = True
+    status['result_url'] = f'/report_result/{job.id}'
+    status['queue'] = REPORT_JOBS.stats()
+    return jsonify(status)
+
+@app.route('/report_result/<job_id>')
+def report_result_page(job_id):
+    """完了したレポート生成ジョブの HTML を返す（未完了ならステータスを 202 で返す）"""
+    job = REPORT_JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status != 'done':
+        response = jsonify(job.to_dict())
+        response.status_code = 500 if job.status == 'failed' else 202
+        return response
+    if REPORT_STORE is None:
+        return Response(job.result, mimetype='text/html')
+    # 結果はレポートIDだけを持ち、HTML はレポートストアから返す
+    etag = http_cache.etag_for('report', job.result)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+    stored = REPORT_STORE.get_compressed(job.result)
+    if stored is None:
+        abort(404)
+    return stored_report_response(job.result, stored, etag)
+
+def stored_report_response(report_id, body, etag):
+    """
+    保存済みレポート（gzip 圧縮済み）のレスポンスを作る
+    gzip を受け付けるクライアントには圧縮したまま返し、展開の手間も省く（ETag は圧縮の有無で区別する）
+    """
+    if request.accept_encodings['gzip']:
+        response = Response(body, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+        etag = http_cache.encoded_etag(etag, 'gzip')
+    else:
+        response = Response(gzip.decompress(body), mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    response.headers['X-Report-Id'] = report_id
+    return http_cache.set_validators(response, etag)
+
+def store_streamed_report(stream, report_id):
+    """ストリーミング送信した内容をそのまま保存する（途中で切断された場合は保存しない）"""
+    parts = []
+    for chunk in stream:
+        parts.append(chunk)
+        yield chunk
+    REPORT_STORE.put(report_id, ''.join(parts))
+
+def stream_report_chapters(chunks, report_content):
+    """
+    テンプレートの出力を章（<article>）単位にまとめて送出する
+    次の章に入る直前までの出力を送り出してから、その章の本文を生成する
+    （<article> の直前で区切るため、チャンクごとに最小化しても全体を最小化した結果と同じになる）
+    """
+    chapter_keys = iter(report_content.chapter_keys())
+    buffer = []
+    for chunk in chunks:
+        marker = chunk.find(STREAM_FLUSH_MARKER)
+        if marker == -1:
+            buffer.append(chunk)
+            continue
+        buffer.append(chunk[:marker])
+        yield compression.prepare_html(''.join(buffer))
+        buffer = [chunk[marker:]]
+        chapter = next(chapter_keys, None)
+        if chapter is not None:
+            report_content[chapter]
+    # 残りの章（テンプレートに対応する <article> がない章）を生成して終了
+    for chapter in chapter_keys:
+        report_content[chapter]
+    metrics.REPORT_CHARACTERS.observe(len(report_content['full_text']))
+    yield compression.prepare_html(''.join(buffer))
+
 def get_sign_quality(sign):
     """星座のクオリティを返す"""
-    cardinal = ['牡羊座', '蟹座', '天秤座', '山羊座']
-    fixed = ['牡牛座', '獅子座', '蠍座', '水瓶座']
-    mutable = ['双子座', '乙女座', '射手座', '魚座']
-    
-    if sign in cardinal:
-        return '活動宮'
-    elif sign in fixed:
-        return '固定宮'
-    elif sign in mutable:
-        return '柔軟宮'
-    return '不明'
+    return knowledge_base.sign_quality(sign)
 
 def get_default_celestial_data():
     """デフォルトの天体データを返す"""
@@ -1112,57 +1450,162 @@ def calculate_quality_distribution(celestial_data):
             qualities[quality] += 1
     return qualities
 
-def generate_comprehensive_report(name, archetype, celestial_data, sun_element, moon_element):
-    """12,000文字以上の包括的レポートを生成"""
-    
-    # 第1章：アーキタイプの深層分析（サビアンシンボルを含む、2,500文字以上）
-    chapter1 = generate_archetype_analysis(name, archetype, sun_element, moon_element, celestial_data)
-    
-    # 第2章：惑星配置の詳細解釈（2,500文字）
-    chapter2 = generate_planetary_interpretation(name, celestial_data)
-    
-    # 第3章：医学的体質分析（2,500文字）
-    chapter3 = generate_medical_constitution(name, archetype, celestial_data)
-    
-    # 第4章：ホリスティック処方箋（2,500文字）
-    chapter4 = generate_holistic_prescriptions(name, archetype, celestial_data)
-    
-    # 第5章：人生設計とライフプランニング（2,500文字）
-    chapter5 = generate_life_planning(name, archetype, celestial_data)
-    
-    # エピローグ（500文字）
-    epilogue = generate_epilogue(name, archetype)
-    
-    full_text = chapter1 + chapter2 + chapter3 + chapter4 + chapter5 + epilogue
+# レポート各章のキャッシュ（REPORT_FRAGMENT_CACHE_SIZE で容量を指定、0 でキャッシュ無効）
+# 章のテキストは名前の位置に NAME_PLACEHOLDER を入れた状態で保存し、最後に名前を差し込む
+REPORT_FRAGMENT_CACHE = LRUCache(int(os.environ.get('REPORT_FRAGMENT_CACHE_SIZE', 2048)))
+metrics.register_cache('report_fragment', REPORT_FRAGMENT_CACHE)
+NAME_PLACEHOLDER = '\ue000name\ue000'
+
+def _archetype_cache_key(archetype):
+    """アーキタイプ辞書をキャッシュキー用のタプルに変換"""
+    return tuple(sorted((key, str(value)) for key, value in archetype.items()))
+
+def _planet_cache_key(celestial_data, planet, *fields):
+    """天体データのうち章が参照する項目だけをキャッシュキー用のタプルに変換"""
+    planet_data = celestial_data.get(planet, {})
+    return tuple(planet_data.get(field) for field in fields)
+
+def _sabian_cache_key(planet_data):
+    """天体の位置をサビアンシンボル（星座と切り上げ度数）単位のキーに変換"""
+    if not planet_data:
+        return None
+    sabian = get_sabian_for_position(planet_data.get('sign'), planet_data.get('degree', 0))
+    return (sabian['sign'], sabian['degree']) if sabian else ()
+
+def _chapter_cache_keys(archetype, celestial_data, sun_element, moon_element, chart_aspects):
+    """各章が実際に参照する入力だけからキャッシュキーを作成（chart_aspects は describe_aspects の結果）"""
+    archetype_key = _archetype_cache_key(archetype)
+    celestial_data = celestial_data or {}
+    return {
+        'chapter1': (archetype_key, sun_element, moon_element, bool(celestial_data),
+                     _sabian_cache_key(celestial_data.get('sun', {})),
+                     _sabian_cache_key(celestial_data.get('moon', {}))),
+        'chapter2': (tuple(
+            (planet_key, planet_data.get('sign', '不明'), planet_data.get('element', '不明'),
+             f"{planet_data.get('degree', 0):.1f}", get_degree_interpretation(planet_data.get('degree', 0)),
+             planet_data.get('quality', '不明'), _sabian_cache_key(planet_data))
+            for planet_key, planet_data in celestial_data.items()
+        ), tuple(aspect['text'] for aspect in chart_aspects)),
+        'chapter3': (archetype_key,
+                     _planet_cache_key(celestial_data, 'sun', 'sign', 'element'),
+                     _planet_cache_key(celestial_data, 'moon', 'sign'),
+                     _planet_cache_key(celestial_data, 'mercury', 'element')),
+        'chapter4': (archetype_key,),
+        'chapter5': (archetype_key,
+                     _planet_cache_key(celestial_data, 'mercury', 'element'),
+                     _planet_cache_key(celestial_data, 'venus', 'element')),
+        'epilogue': (archetype_key,)
+    }
+
+def render_cached_chapter(chapter, cache_key, name, generator, *args):
+    """名前を除いた章テキストをキャッシュから取得（なければ生成して保存）し、名前を差し込んで返す"""
+    with timing.stage(chapter):
+        key = (chapter, cache_key)
+        template = REPORT_FRAGMENT_CACHE.get(key)
+        if template is None:
+            template = generator(NAME_PLACEHOLDER, *args)
+            REPORT_FRAGMENT_CACHE.put(key, template)
+        return template.replace(NAME_PLACEHOLDER, name)
+
+def report_chapter_generators(name, archetype, celestial_data, sun_element, moon_element, chart_aspects=None):
+    """
+    レポート各章の生成関数（章キー → 引数なしの関数）を章の順に返す
+    chart_aspects は describe_aspects の結果（省略時はここで求める。呼び出し側で求め済みなら渡して再計算を避ける）
+    """
+    if chart_aspects is None:
+        chart_aspects = describe_aspects(celestial_data or {})
+    keys = _chapter_cache_keys(archetype, celestial_data, sun_element, moon_element, chart_aspects)
     
     return {
-        'chapter1': chapter1,
-        'chapter2': chapter2,
-        'chapter3': chapter3,
-        'chapter4': chapter4,
-        'chapter5': chapter5,
-        'epilogue': epilogue,
-        'full_text': full_text
+        # 第1章：アーキタイプの深層分析（サビアンシンボルを含む、2,500文字以上）
+        'chapter1': lambda: render_cached_chapter('chapter1', keys['chapter1'], name,
+                                                  generate_archetype_analysis, archetype, sun_element, moon_element, celestial_data),
+        # 第2章：惑星配置の詳細解釈（2,500文字）
+        'chapter2': lambda: render_cached_chapter('chapter2', keys['chapter2'], name,
+                                                  generate_planetary_interpretation, celestial_data, chart_aspects),
+        # 第3章：医学的体質分析（2,500文字）
+        'chapter3': lambda: render_cached_chapter('chapter3', keys['chapter3'], name,
+                                                  generate_medical_constitution, archetype, celestial_data),
+        # 第4章：ホリスティック処方箋（2,500文字）
+        'chapter4': lambda: render_cached_chapter('chapter4', keys['chapter4'], name,
+                                                  generate_holistic_prescriptions, archetype, celestial_data),
+        # 第5章：人生設計とライフプランニング（2,500文字）
+        'chapter5': lambda: render_cached_chapter('chapter5', keys['chapter5'], name,
+                                                  generate_life_planning, archetype, celestial_data),
+        # エピローグ（500文字）
+        'epilogue': lambda: render_cached_chapter('epilogue', keys['epilogue'], name,
+                                                  generate_epilogue, archetype)
     }
 
+def generate_comprehensive_report(name, archetype, celestial_data, sun_element, moon_element, chart_aspects=None):
+    """12,000文字以上の包括的レポートを生成（各章はアーキタイプや星座が同じ顧客間でキャッシュを共有）"""
+    builder = ReportBuilder()
+    for key, generate in report_chapter_generators(name, archetype, celestial_data, sun_element, moon_element,
+                                                   chart_aspects).items():
+        builder.add(key, generate())
+    return builder.build()
+
+class LazyReportContent(dict):
+    """
+    レポートの各章を最初に参照されたときに生成する辞書（ストリーミング表示用）
+    generate_comprehensive_report の戻り値と同じキー（chapter1〜5, epilogue, full_text）で参照できる
+    """
+
+    def __init__(self, generators):
+        super().__init__()
+        self._generators = generators
+
+    def __missing__(self, key):
+        if key == 'full_text':
+            value = ''.join(self[chapter] for chapter in self._generators)
+        elif key in self._generators:
+            value = self._generators[key]()
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+    def chapter_keys(self):
+        """章キーを章の順に返す"""
+        return list(self._generators)
+
+class ReportBuilder:
+    """
+    章ごとのテキストを順に集め、最後に一度だけ連結してレポートを組み立てる
+    各章の文字列はコピーせずそのまま保持し、全文中の位置（開始, 終了）も記録する
+    """
+
+    def __init__(self):
+        self._chapters = []
+
+    def add(self, key, text):
+        """章を追加"""
+        self._chapters.append((key, text))
+
+    def build(self):
+        """章ごとのテキスト、全文（full_text）、各章の位置（chapter_spans）を返す"""
+        content = {}
+        spans = {}
+        position = 0
+        for key, text in self._chapters:
+            content[key] = text
+            spans[key] = (position, position + len(text))
+            position += len(text)
+        content['full_text'] = ''.join(text for _, text in self._chapters)
+        content['chapter_spans'] = spans
+        return content
+
 def generate_archetype_analysis(name, archetype, sun_element, moon_element, celestial_data=None):
     """第1章：アーキタイプの深層分析を生成（2,500文字）"""
     
-    element_meanings = {
-        '火': '情熱と創造性、直感的な行動力、開拓精神',
-        '地': '現実性と安定感、着実な成長力、物質的豊かさ',
-        '風': '知性と社交性、柔軟な思考力、コミュニケーション能力',
-        '水': '感情と共感性、深い洞察力、癒しの力'
-    }
-    
-    text = f"""
+    parts = [f"""
 【第1章：{archetype['name']}というアーキタイプの深層分析】
 
 {name}様の本質を形作る「{archetype['name']}」というアーキタイプは、太陽の{sun_element}エレメントと月の{moon_element}エレメントが織りなす、極めて独特な存在様式を表しています。このアーキタイプは、織田先生の16原型論において、{archetype['tagline']}
 
 ■ 原型の核心的性質
 
-{archetype['name']}の本質は、{archetype['core']}このような性質を持つ{name}様は、人生において独自の道を切り開いていく運命にあります。太陽が示す意識的な自己表現は{element_meanings.get(sun_element, '独特な個性')}を通じて現れ、月が示す無意識的な感情反応は{element_meanings.get(moon_element, '深い内面性')}として内在しています。
+{archetype['name']}の本質は、{archetype['core']}このような性質を持つ{name}様は、人生において独自の道を切り開いていく運命にあります。太陽が示す意識的な自己表現は{knowledge_base.ELEMENT_ESSENCES.get(sun_element, '独特な個性')}を通じて現れ、月が示す無意識的な感情反応は{knowledge_base.ELEMENT_ESSENCES.get(moon_element, '深い内面性')}として内在しています。
 
 この二つのエレメントの組み合わせ「{archetype['element_combination']}」は、単なる性格的特徴を超えて、{name}様の生命エネルギーの根本的な流れ方を規定しています。古代ギリシャの四体液説に基づく{archetype['body_type']}という体質分類は、現代医学における心身相関の観点からも重要な示唆を与えています。
 
@@ -1201,7 +1644,7 @@ def generate_archetype_analysis(name, archetype, sun_element, moon_element, cele
 ■ 太陽と月のサビアンシンボルが示す核心的才能
 
 {name}様の太陽と月の正確な位置が示すサビアンシンボルは、最も重要な才能の指標です：
-"""
+"""]
     
     # 太陽と月のサビアンシンボルを取得して追加
     if celestial_data:
@@ -1211,7 +1654,7 @@ def generate_archetype_analysis(name, archetype, sun_element, moon_element, cele
         if sun_data:
             sun_sabian = get_sabian_for_position(sun_data.get('sign'), sun_data.get('degree', 0))
             if sun_sabian:
-                text += f"""
+                parts.append(f"""
 
 ★ 太陽のサビアンシンボル：{sun_sabian['sign']}{sun_sabian['degree']}度
 「{sun_sabian['title']}」
@@ -1219,12 +1662,12 @@ def generate_archetype_analysis(name, archetype, sun_element, moon_element, cele
 
 このシンボルは、{name}様の意識的な自己表現と人生の目的において、「{sun_sabian['keyword']}」という特別な才能を示しています。
 これは{sun_element}のエネルギーを通して、特にキャリアや社会的活動において顕著に現れます。
-"""
+""")
         
         if moon_data:
             moon_sabian = get_sabian_for_position(moon_data.get('sign'), moon_data.get('degree', 0))
             if moon_sabian:
-                text += f"""
+                parts.append(f"""
 
 ★ 月のサビアンシンボル：{moon_sabian['sign']}{moon_sabian['degree']}度
 「{moon_sabian['title']}」
@@ -1232,16 +1675,16 @@ def generate_archetype_analysis(name, archetype, sun_element, moon_element, cele
 
 このシンボルは、{name}様の無意識的な感情パターンと内的才能において、「{moon_sabian['keyword']}」という潜在力を示しています。
 これは{moon_element}の性質を通して、特に対人関係や内的な創造活動において発揮されます。
-"""
+""")
         
-        text += f"""
+        parts.append(f"""
 
 これらのサビアンシンボルが示す才能は、{archetype['name']}というアーキタイプを通して統合され、
 {name}様独自の才能プロフィールを形成しています。これらは訓練と経験によってさらに洗練され、
 専門的なスキルや独創的な表現へと発展する可能性を秘めています。
-"""
+""")
     
-    text += f"""
+    parts.append(f"""
 
 ■ 同じアーキタイプを持つ歴史的人物との共鳴
 
@@ -1251,34 +1694,24 @@ def generate_archetype_analysis(name, archetype, sun_element, moon_element, cele
 {name}様もまた、この系譜に連なる存在として、独自の方法で世界に貢献する可能性を秘めています。
 それは必ずしも歴史に名を残すような大きな功績である必要はありません。
 日々の生活の中で、{archetype['name']}としての本質を生きることそのものが、周囲に大きな影響を与えているのです。
-"""
+""")
     
-    return text
+    return ''.join(parts)
 
-def generate_planetary_interpretation(name, celestial_data):
-    """第2章：惑星配置の詳細解釈を生成（サビアンシンボルを含む、2,500文字以上）"""
+def generate_planetary_interpretation(name, celestial_data, chart_aspects=None):
+    """第2章：惑星配置の詳細解釈を生成（サビアンシンボルを含む、2,500文字以上。chart_aspects は describe_aspects の結果）"""
     
-    planet_meanings = {
-        'sun': {'name': '太陽', 'domain': '本質的自己、生命力、創造性', 'medical': '心臓、背骨、目'},
-        'moon': {'name': '月', 'domain': '感情、無意識、養育', 'medical': '胃、乳房、体液'},
-        'mercury': {'name': '水星', 'domain': '知性、コミュニケーション、学習', 'medical': '神経系、呼吸器、手'},
-        'venus': {'name': '金星', 'domain': '愛情、美、価値観', 'medical': '腎臓、喉、皮膚'},
-        'mars': {'name': '火星', 'domain': '行動力、情熱、闘争', 'medical': '筋肉、血液、頭部'},
-        'jupiter': {'name': '木星', 'domain': '拡大、幸運、哲学', 'medical': '肝臓、大腿部、成長'},
-        'saturn': {'name': '土星', 'domain': '制限、責任、成熟', 'medical': '骨格、歯、関節'}
-    }
-    
-    text = f"""
+    parts = [f"""
 【第2章：天体配置とサビアンシンボルが示す才能の宝庫】
 
 {name}様の出生時の天体配置は、宇宙的な観点から見た個性の青写真です。各惑星が特定の星座の特定の度数に位置することで、それぞれ固有のエネルギーパターンと特別な才能を形成しています。特に注目すべきは、各惑星の正確な度数が示すサビアンシンボルです。これらは{name}様の隠された才能と可能性を具体的に示しています。
 
 ■ 7惑星の詳細分析とサビアンシンボルが示す才能
-"""
+"""]
     
     for planet_key, planet_data in celestial_data.items():
-        if planet_key in planet_meanings:
-            pm = planet_meanings[planet_key]
+        if planet_key in knowledge_base.PLANET_MEANINGS:
+            pm = knowledge_base.PLANET_MEANINGS[planet_key]
             sign = planet_data.get('sign', '不明')
             element = planet_data.get('element', '不明')
             degree = planet_data.get('degree', 0)
@@ -1287,7 +1720,7 @@ def generate_planetary_interpretation(name, celestial_data):
             # サビアンシンボルを取得
             sabian = get_sabian_for_position(sign, degree)
             
-            text += f"""
+            parts.append(f"""
 
 ◆ {pm['name']}（{sign} {degree:.1f}度）
 支配領域：{pm['domain']}
@@ -1297,21 +1730,28 @@ def generate_planetary_interpretation(name, celestial_data):
 {pm['name']}が{sign}に位置していることは、{name}様の{pm['domain']}に関して、{element}の性質が強く現れることを示しています。{sign}の{degree:.1f}度という具体的な位置は、この星座の{get_degree_interpretation(degree)}を強調しています。
 
 医学的観点から見ると、{pm['name']}は{pm['medical']}と関連しており、これらの器官や機能に{element}的な特徴が現れやすいことを示唆しています。例えば、{get_medical_tendency(element, pm['medical'])}といった傾向が考えられます。
-"""
+""")
             
             # サビアンシンボルの才能解釈を追加
             if sabian:
                 sabian_interpretation = generate_sabian_talent_interpretation(pm['name'], sabian, element)
-                text += f"""
+                parts.append(f"""
 ★ サビアンシンボルが示す特別な才能：
 {sabian_interpretation}
-"""
+""")
             
-            text += f"""
+            parts.append(f"""
 日常生活では、この配置は{get_daily_manifestation(pm['name'], sign, element)}として現れることが多いでしょう。
-"""
+""")
     
-    text += f"""
+    if chart_aspects is None:
+        chart_aspects = describe_aspects(celestial_data)
+    if chart_aspects:
+        aspect_lines = ''.join(f"\n◆ {aspect['text']}\n" for aspect in chart_aspects)
+    else:
+        aspect_lines = '\n主要なアスペクト（合・セクスタイル・スクエア・トライン・オポジション）は形成されておらず、各惑星がそれぞれ独立して力を発揮する配置です。\n'
+
+    parts.append(f"""
 
 ■ エレメントバランスの総合評価
 
@@ -1321,12 +1761,43 @@ def generate_planetary_interpretation(name, celestial_data):
 
 ■ アスペクトパターンが創る独自の才能
 
-惑星同士の角度関係（アスペクト）は、異なるエネルギーがどのように相互作用するかを示しています。{name}様の場合、特に注目すべきは太陽と月の関係性で、これが意識と無意識の統合度を表しています。
-
+惑星同士の角度関係（アスペクト）は、異なるエネルギーがどのように相互作用するかを示しています。{name}様の場合、特に注目すべきは太陽と月の関係性で、これが意識と無意識の統合度を表しています。{describe_sun_moon_aspect(chart_aspects)}
+{aspect_lines}
 これらの天体配置は、静的なものではなく、人生の各段階で異なる形で活性化されます。現在の天体の動き（トランジット）と出生図の関係を理解することで、最適なタイミングでの行動が可能になります。
-"""
+""")
     
-    return text
+    return ''.join(parts)
+
+def report_longitudes(celestial_data):
+    """詳細レポート用の天体データ（星座と星座内度数）から天体キー → 黄経（度）を求める"""
+    return {
+        planet_key: knowledge_base.SIGN_INDEX[planet_data['sign']] * 30 + planet_data.get('degree', 0)
+        for planet_key, planet_data in celestial_data.items()
+        if planet_key in knowledge_base.PLANET_MEANINGS and planet_data.get('sign') in knowledge_base.SIGN_INDEX
+    }
+
+def describe_aspects(celestial_data):
+    """出生図のアスペクトを正確な角度に近い順に、天体名・アスペクト名・解釈の文章とともに返す"""
+    described = []
+    for aspect in aspects.find_aspects(report_longitudes(celestial_data)):
+        info = knowledge_base.ASPECTS[aspect['aspect']]
+        a, b = (knowledge_base.PLANET_MEANINGS[key] for key in aspect['planets'])
+        meaning = info['meaning'].format(a=a['name'], b=b['name'], a_domain=a['domain'], b_domain=b['domain'])
+        described.append({
+            **aspect,
+            'name': info['name'],
+            'planet_names': (a['name'], b['name']),
+            'meaning': meaning,
+            'text': f"{a['name']}と{b['name']}の{info['name']}（{aspect['separation']:.1f}度、オーブ{aspect['orb']:.1f}度）：{meaning}"
+        })
+    return described
+
+def describe_sun_moon_aspect(chart_aspects):
+    """太陽と月のアスペクトについての一文（なければ独立して働くことを述べる）"""
+    for aspect in chart_aspects:
+        if set(aspect['planets']) == {'sun', 'moon'}:
+            return f"太陽と月は{aspect['name']}を形成しており、意識と無意識の関係にこのアスペクトの性質が色濃く現れます。"
+    return '太陽と月の間には主要なアスペクトがなく、意識と無意識がそれぞれ独立して働く傾向があります。'
 
 def get_degree_interpretation(degree):
     """度数の解釈を返す"""
@@ -1339,13 +1810,7 @@ def get_degree_interpretation(degree):
 
 def get_medical_tendency(element, medical_area):
     """医学的傾向を返す"""
-    tendencies = {
-        '火': '炎症や熱性の症状が出やすく、エネルギーの燃焼が激しい',
-        '地': '慢性的な症状や構造的な問題が生じやすく、回復に時間がかかる',
-        '風': '神経性の症状や循環の問題が生じやすく、変動が激しい',
-        '水': '浮腫や分泌物の異常が生じやすく、感情と連動しやすい'
-    }
-    return tendencies.get(element, '独特な症状パターンを示す')
+    return knowledge_base.ELEMENT_MEDICAL_TENDENCIES.get(element, '独特な症状パターンを示す')
 
 def get_daily_manifestation(planet, sign, element):
     """日常生活での現れ方を返す"""
@@ -1427,15 +1892,9 @@ def generate_medical_constitution(name, archetype, celestial_data):
 
 def get_dominant_humor(body_type):
     """優勢な体液を返す"""
-    humors = {
-        '胆汁質': '黄胆汁（火のエネルギー）',
-        '憂鬱質': '黒胆汁（地のエネルギー）',
-        '多血質': '血液（風のエネルギー）',
-        '粘液質': '粘液（水のエネルギー）'
-    }
-    for humor in humors:
+    for humor in knowledge_base.HUMORS:
         if humor in body_type:
-            return humors[humor]
+            return knowledge_base.HUMORS[humor]
     return '複合的な体液バランス'
 
 def get_humor_excess_symptoms(body_type):
@@ -1468,16 +1927,10 @@ def get_humor_deficiency_symptoms(body_type):
 
 def get_important_minerals(element_combination):
     """重要なミネラルを返す"""
-    minerals_map = {
-        '火': 'マグネシウム、鉄分',
-        '地': 'カルシウム、亜鉛',
-        '風': 'カリウム、マンガン',
-        '水': 'ナトリウム、ヨウ素'
-    }
     result = []
     for element in element_combination.split('×'):
-        if element in minerals_map:
-            result.append(minerals_map[element])
+        if element in knowledge_base.ELEMENT_MINERALS:
+            result.append(knowledge_base.ELEMENT_MINERALS[element])
     return '、'.join(result) if result else 'バランスよく各種ミネラル'
 
 def get_ideal_sleep_time(element_combination):
@@ -1607,16 +2060,10 @@ def generate_holistic_prescriptions(name, archetype, celestial_data):
 
 def get_recommended_foods(element_combination):
     """推奨食材を返す"""
-    foods = {
-        '火': '赤い食材、スパイス、発酵食品',
-        '地': '根菜、全粒穀物、ナッツ類',
-        '風': '葉物野菜、軽い食材、フルーツ',
-        '水': '海産物、水分の多い野菜、スープ'
-    }
     result = []
     for element in element_combination.split('×'):
-        if element in foods:
-            result.append(foods[element])
+        if element in knowledge_base.ELEMENT_RECOMMENDED_FOODS:
+            result.append(knowledge_base.ELEMENT_RECOMMENDED_FOODS[element])
     return '、'.join(result) if result else 'バランスの取れた多様な食材'
 
 def get_restricted_foods(element_combination):
@@ -1633,15 +2080,9 @@ def get_restricted_foods(element_combination):
 
 def get_main_crystal(element_combination):
     """メインクリスタルを返す"""
-    crystals = {
-        '火': 'カーネリアン（活力と情熱）',
-        '地': 'スモーキークォーツ（グラウンディング）',
-        '風': 'シトリン（知性と創造性）',
-        '水': 'ムーンストーン（感情の調和）'
-    }
     elements = element_combination.split('×')
-    if elements[0] in crystals:
-        return crystals[elements[0]]
+    if elements[0] in knowledge_base.ELEMENT_MAIN_CRYSTALS:
+        return knowledge_base.ELEMENT_MAIN_CRYSTALS[elements[0]]
     return 'クリアクォーツ（万能）'
 
 def get_support_crystals(element_combination):
@@ -1796,17 +2237,11 @@ def generate_life_planning(name, archetype, celestial_data):
 
 def get_complementary_elements(element_combination):
     """補完的エレメントを返す"""
-    complements = {
-        '火': '風（刺激と拡大）、地（安定と具現化）',
-        '地': '水（感情の潤い）、火（活性化）',
-        '風': '火（情熱）、水（深み）',
-        '水': '地（構造）、風（流通）'
-    }
     elements = element_combination.split('×')
     results = []
     for element in elements:
-        if element in complements:
-            results.append(complements[element])
+        if element in knowledge_base.ELEMENT_COMPLEMENTS:
+            results.append(knowledge_base.ELEMENT_COMPLEMENTS[element])
     return ' / '.join(results) if results else '多様なエレメント'
 
 def get_investment_style(element_combination):
@@ -1837,41 +2272,7 @@ def get_yinyang_balance_advice(element_combination):
 
 def get_detailed_food_therapy(element, body_type):
     """詳細な食物療法を返す"""
-    therapies = {
-        '火': """
-• 推奨食材：きゅうり、すいか、トマト、緑豆、ミント、梨、豆腐
-• 調理法：生食、茸でる、蒸す（涸性・寒性の性質を活かす）
-• 具体的な献立例：
-  - 朝：グリーンスムージー、ヨーグルトとフルーツ
-  - 昼：冷やし中華、サラダボウル
-  - 夕：豆腐と夏野菜のさっぱり煮物
-• 注意点：辛いスパイス、揚げ物、アルコールは控えめに""",
-        '地': """
-• 推奨食材：生姜、ごぼう、人参、羊肉、シナモン、黒ゴマ
-• 調理法：煮る、炒める、シチュー、煮込み（温性・熱性を引き出す）
-• 具体的な献立例：
-  - 朝：生姜入りお粥、温かいスープ
-  - 昼：根菜の煮物、きんぴらごぼう
-  - 夕：鶏肉と根菜のポトフ
-• 注意点：冷たい飲食物、生もの、冷性食材は避ける""",
-        '風': """
-• 推奨食材：根菜類、全粒穀物、甘みのある食材（人参、りんご、米）
-• 調理法：煮る、蒸す、グラウンディング効果のある調理
-• 具体的な献立例：
-  - 朝：オートミール、玄米おにぎり
-  - 昼：根菜たっぷりの味噌汁定食
-  - 夕：かぼちゃのスープ、さつまいもご飯
-• 注意点：カフェイン過多、刺激物、軽すぎる食事は避ける""",
-        '水': """
-• 推奨食材：温性スパイス（生姜、シナモン）、小豆、はと麦、海藻
-• 調理法：炒める、スパイス使用、温かい調理
-• 具体的な献立例：
-  - 朝：スパイスティー、温かいスープ
-  - 昼：小豆ご飯、カレー
-  - 夕：生姜焖き、ハトムギ茶
-• 注意点：冷たい飲食物、乳製品過多、甘いもの過多は避ける"""
-    }
-    return therapies.get(element, "バランスの取れた食事を心がけましょう")
+    return knowledge_base.ELEMENT_FOOD_THERAPIES.get(element, "バランスの取れた食事を心がけましょう")
 
 def get_seasonal_dietary_advice(element):
     """季節別の食養生アドバイスを返す"""
@@ -1884,83 +2285,27 @@ def get_seasonal_dietary_advice(element):
 
 def get_breakfast_advice(element):
     """朝食のアドバイスを返す"""
-    advice = {
-        '火': "フルーツ、ヨーグルト、グリーンスムージーで体内の熱を冷ます",
-        '地': "温かいお粥やスープで消化器を温める",
-        '風': "玄米やオートミールでグラウンディング",
-        '水': "スパイスティーと温かい食事で代謝を促進"
-    }
-    return advice.get(element, "消化に良い温かい食事")
+    return knowledge_base.ELEMENT_BREAKFAST_ADVICE.get(element, "消化に良い温かい食事")
 
 def get_lunch_advice(element):
     """昼食のアドバイスを返す"""
-    advice = {
-        '火': "サラダボウルや冷製パスタでクールダウン",
-        '地': "根菜の煮物やシチューでエネルギー補給",
-        '風': "バランスの取れた定食で安定感を",
-        '水': "スパイシーなカレーやエスニック料理"
-    }
-    return advice.get(element, "バランスの良い食事")
+    return knowledge_base.ELEMENT_LUNCH_ADVICE.get(element, "バランスの良い食事")
 
 def get_dinner_advice(element):
     """夕食のアドバイスを返す"""
-    advice = {
-        '火': "豆腐や白身魚のさっぱりした料理",
-        '地': "温かいポトフや鶏肉の煮込み",
-        '風': "消化に優しいスープや蒸し料理",
-        '水': "生姜を使った炒め物や焦き魚"
-    }
-    return advice.get(element, "消化に優しい軽めの食事")
+    return knowledge_base.ELEMENT_DINNER_ADVICE.get(element, "消化に優しい軽めの食事")
 
 def get_snack_advice(element):
     """間食のアドバイスを返す"""
-    advice = {
-        '火': "水分の多い果物（スイカ、梨）",
-        '地': "ナッツ類、ドライフルーツ",
-        '風': "甘い果物（りんご、バナナ）",
-        '水': "スパイス入りナッツ、ジンジャーティー"
-    }
-    return advice.get(element, "季節の果物やナッツ")
+    return knowledge_base.ELEMENT_SNACK_ADVICE.get(element, "季節の果物やナッツ")
 
 def get_foods_to_avoid(element, body_type):
     """避けるべき食材と食習慣を返す"""
-    avoidances = {
-        '火': "辛いスパイス、アルコール、揚げ物、コーヒーの過剰摂取",
-        '地': "冷たい飲み物、アイスクリーム、生野菜の過剰摂取",
-        '風': "カフェイン過多、不規則な食事、ながら食い",
-        '水': "乳製品過多、砂糖の過剰摂取、冷たい飲食物"
-    }
-    return avoidances.get(element, "過度の加工食品と不規則な食事")
+    return knowledge_base.ELEMENT_FOODS_TO_AVOID.get(element, "過度の加工食品と不規則な食事")
 
 def get_aroma_prescription(element, temperament):
     """エレメント別アロマ処方を返す"""
-    prescriptions = {
-        '火': """
-火のエネルギー調整ブレンド：
-• 鎮静：ラベンダー（3滴）、カモミール（2滴） - 過剰な熱を鎮める
-• 心の平和：サンダルウッド（2滴） - 内なる平和と瞑想
-• 愛の火：ローズ（1滴） - 怒りを愛に変容
-使用例：イライラした時にハンカチに垂らして深呼吸""",
-        '地': """
-地のエネルギー活性化ブレンド：
-• 軽やかさ：ペパーミント（2滴）、レモン（2滴） - 重さを解放
-• 浄化：ユーカリ（2滴） - 新鮮さと変化
-• 代謝促進：グレープフルーツ（1滴） - 軽やかな変化
-使用例：朝のディフューザーで活力を高める""",
-        '風': """
-風のエネルギー鎮静ブレンド：
-• グラウンディング：ベチバー（3滴）、シダーウッド（2滴） - 大地との繋がり
-• 神経鎮静：ラベンダー（2滴）、カモミール（1滴） - 穏やかさ
-• 感情との繋がり：イランイラン（1滴） - 感情調整
-使用例：足裏にベチバーを塗布して安定感を得る""",
-        '水': """
-水のエネルギー調整ブレンド：
-• デトックス：ジュニパー（2滴）、サイプレス（2滴） - 流れの促進
-• 軽やかさ：グレープフルーツ（2滴）、レモン（1滴） - 浄化
-• 明晰さ：ローズマリー（1滴） - 論理性と集中
-使用例：入浴時に加えてデトックスを促進"""
-    }
-    return prescriptions.get(element, "バランスブレンドを使用")
+    return knowledge_base.ELEMENT_AROMA_PRESCRIPTIONS.get(element, "バランスブレンドを使用")
 
 def get_aroma_daily_usage(element):
     """アロマの日常使用法を返す"""
@@ -2030,33 +2375,15 @@ def get_integrated_care_plan(element, body_type):
 
 def get_exercise_prescription(element, body_type):
     """運動処方を返す"""
-    prescriptions = {
-        '火': "ヨガ、水泳、太極拳などのクールダウン系運動を週に3-4回",
-        '地': "ウォーキング、ジョギング、ダンスなどの活性化運動を毎日30分",
-        '風': "グラウンディングヨガ、武道、ウエイトトレーニングで安定感を",
-        '水': "エアロビクス、ダンス、サウナで代謝を活性化"
-    }
-    return prescriptions.get(element, "適度な有酸素運動とストレッチ")
+    return knowledge_base.ELEMENT_EXERCISE_PRESCRIPTIONS.get(element, "適度な有酸素運動とストレッチ")
 
 def get_breathing_exercises(element):
     """呼吸法を返す"""
-    exercises = {
-        '火': "4-7-8呼吸法（4秒吸って7秒止めて8秒吐く）でクールダウン",
-        '地': "腹式呼吸で深くゆっくりと、体を温める",
-        '風': "丁寧な鼻呼吸で5分間、心を落ち着かせる",
-        '水': "火の呼吸（カパラバティ）で代謝を促進"
-    }
-    return exercises.get(element, "深呼吸でリラックス")
+    return knowledge_base.ELEMENT_BREATHING_EXERCISES.get(element, "深呼吸でリラックス")
 
 def get_bathing_therapy(element, body_type):
     """入浴療法を返す"""
-    therapies = {
-        '火': "ぬるめのお湯（38-39度）に15-20分、ラベンダーを加えて",
-        '地': "温かいお湯（40-41度）に岩塩を加えてデトックス",
-        '風': "半身浴でジャーマンカモミールを加えてリラックス",
-        '水': "熱めのお湯（41-42度）に生姜やシナモンを加えて温まる"
-    }
-    return therapies.get(element, "適温のお湯でリラックス")
+    return knowledge_base.ELEMENT_BATHING_THERAPIES.get(element, "適温のお湯でリラックス")
 
 def generate_epilogue(name, archetype):
     """エピローグを生成（500文字）"""
@@ -2086,9 +2413,66 @@ ASTRO-MEDICAL SYSTEM © 2024
     
     return text
 
+# 起動時のウォームアップ（WARMUP=0 で無効。gunicorn.conf.py のフックと /healthz はこの値を見る）
+WARMUP = os.environ.get('WARMUP', '1') != '0'
+
+# ウォームアップの状態（warm_up の完了時に設定。/healthz で返す）
+WARMUP_STATE = {'enabled': WARMUP, 'complete': False, 'seconds': None, 'pid': None}
+WARMUP_LOCK = threading.Lock()
+
+def warm_up():
+    """
+    最初のリクエストで行われる初期化を先に済ませる（2回目以降の呼び出しは何もしない）
+    天体暦テーブル・母集団の統計テーブル・サビアンシンボル・相性検索の索引の読み込み、ダミーの天体計算、全テンプレートのコンパイル（バイトコードキャッシュがあればその読み込み）を行う
+    gunicorn では --preload 時は fork 前の親プロセスで、それ以外は各ワーカーの起動直後に呼ばれる（gunicorn.conf.py）
+    """
+    with WARMUP_LOCK:
+        if not WARMUP_STATE['complete']:
+            _run_warm_up()
+    return WARMUP_STATE
+
+def _run_warm_up():
+    """warm_up の本体（WARMUP_LOCK を取得済みで呼ぶ）"""
+    start = time.perf_counter()
+
+    if USE_EPHEMERIS_TABLES:
+        ephemeris_tables.load_ephemeris_tables()
+    population_stats.load_stats()
+    load_sabian_index()
+    load_synastry_index()
+
+    # キャッシュを介さずに1件計算し、天体計算とサビアンシンボルの参照を一通り実行する
+    result = _compute_celestial_positions(1990, 1, 1, 12, 0, '東京都')
+    if result['success']:
+        build_report_celestial_data(result['celestial_positions'])
+
+    template_cache.compile_templates(app.jinja_env)
+
+    WARMUP_STATE.update(complete=True, seconds=round(time.perf_counter() - start, 3), pid=os.getpid())
+    print(f"ウォームアップ完了（pid {WARMUP_STATE['pid']}、{WARMUP_STATE['seconds']} 秒）")
+
+@app.route('/healthz')
+def healthz():
+    """
+    ヘルスチェック（ウォームアップが終わっていなければここで行い、失敗した場合は 503 を返す）
+    gunicorn のフックを通らない起動方法でも、最初のヘルスチェックで準備完了になる。WARMUP=0 では常に準備完了
+    """
+    ready = True
+    if WARMUP and not WARMUP_STATE['complete']:
+        try:
+            warm_up()
+        except Exception as e:
+            print(f"ウォームアップエラー: {e}")
+            ready = False
+    response = jsonify({'success': ready, 'warmup': WARMUP_STATE})
+    response.status_code = 200 if ready else 503
+    return response
+
 if __name__ == '__main__':
     # Railway環境では環境変数PORTを使用
     import os
+    if WARMUP:
+        warm_up()
     port = int(os.environ.get('PORT', 5000))
     # Production環境ではdebug=Falseに
     debug_mode = os.environ.get('FLASK_ENV', 'production') == 'development'
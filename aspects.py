@@ -0,0 +1,106 @@
+"""
+アスペクト（天体同士の角度関係）の判定
+
+7天体の黄経から全ペアの離角の行列を一度に求め、合・セクスタイル・スクエア・トライン・オポジションを
+オーブ（正確な角度からの許容範囲）で判定する。黄経の配列に先頭の次元（出生図の数）を足せば、
+多数の出生図をまとめて同じ演算で判定できる（ペアごと・出生図ごとの Python のループはない）。
+
+    kinds, deviations = aspects.aspect_matrix(longitudes)   # longitudes: (出生図の数, 7) の配列
+    counts = aspects.count_aspects(kinds)                   # (出生図の数, アスペクトの種類の数)
+
+既定のオーブは環境変数 ASPECT_ORBS（例: conjunction=10,sextile=5）で変更でき、各関数の orbs 引数でも指定できる。
+"""
+import os
+
+import numpy as np
+
+import knowledge_base
+
+# アスペクトの種類（knowledge_base.ASPECTS の順。kinds の値はこの順番、該当なしは NO_ASPECT）
+ASPECT_KEYS = tuple(knowledge_base.ASPECTS)
+ASPECT_ANGLES = np.array([knowledge_base.ASPECTS[key]['angle'] for key in ASPECT_KEYS], dtype=float)
+NO_ASPECT = -1
+
+# 既定のオーブ（度）
+DEFAULT_ORBS = {'conjunction': 8.0, 'sextile': 4.0, 'square': 7.0, 'trine': 7.0, 'opposition': 8.0}
+
+
+def parse_orbs(text):
+    """'conjunction=10,sextile=5' 形式の文字列をオーブの辞書に変換（不正な項目は警告を出して無視）"""
+    orbs = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, _, value = item.partition('=')
+        try:
+            if key.strip() not in DEFAULT_ORBS:
+                raise ValueError(f'不明なアスペクト {key.strip()}')
+            orbs[key.strip()] = float(value)
+        except ValueError as e:
+            print(f"ASPECT_ORBS の設定を無視します（{item}）: {e}")
+    return orbs
+
+
+DEFAULT_ORBS.update(parse_orbs(os.environ.get('ASPECT_ORBS', '')))
+
+
+def orb_limits(orbs=None):
+    """アスペクトの種類ごとのオーブの配列（orbs で一部の種類だけ上書きできる）"""
+    merged = dict(DEFAULT_ORBS, **(orbs or {}))
+    unknown = set(merged) - set(ASPECT_KEYS)
+    if unknown:
+        raise ValueError(f"不明なアスペクトです: {', '.join(sorted(unknown))}")
+    return np.array([merged[key] for key in ASPECT_KEYS], dtype=float)
+
+
+def separation_matrix(longitudes):
+    """黄経の配列（..., 天体数）から全ペアの離角（0〜180度）の行列（..., 天体数, 天体数）を求める"""
+    longitudes = np.asarray(longitudes, dtype=float)
+    difference = np.abs(longitudes[..., :, None] - longitudes[..., None, :]) % 360.0
+    return np.minimum(difference, 360.0 - difference)
+
+
+def aspect_matrix(longitudes, orbs=None):
+    """
+    全ペアのアスペクトの種類（ASPECT_KEYS の番号、なければ NO_ASPECT）と
+    正確な角度からのずれ（度、アスペクトがなければ NaN）の行列を返す
+    オーブが重なる場合は正確な角度に近い方を採る。対角（同じ天体どうし）は NO_ASPECT
+    """
+    separations = separation_matrix(longitudes)
+    limits = orb_limits(orbs)
+    kinds = np.full(separations.shape, NO_ASPECT, dtype=np.int8)
+    deviations = np.full(separations.shape, np.inf)
+    # ループはアスペクトの種類（5回）だけで、全出生図・全ペアを一度に判定する
+    for index, angle in enumerate(ASPECT_ANGLES):
+        deviation = np.abs(separations - angle)
+        matched = (deviation <= limits[index]) & (deviation < deviations)
+        kinds[matched] = index
+        deviations[matched] = deviation[matched]
+    diagonal = np.arange(separations.shape[-1])
+    kinds[..., diagonal, diagonal] = NO_ASPECT
+    deviations[kinds == NO_ASPECT] = np.nan
+    return kinds, deviations
+
+
+def count_aspects(kinds):
+    """aspect_matrix の kinds から、出生図ごとのアスペクトの種類別の件数（..., 種類数）を数える"""
+    rows, cols = np.triu_indices(kinds.shape[-1], k=1)
+    pairs = kinds[..., rows, cols]
+    return np.stack([(pairs == index).sum(axis=-1) for index in range(len(ASPECT_KEYS))], axis=-1)
+
+
+def find_aspects(longitudes, orbs=None):
+    """
+    1つの出生図のアスペクトの一覧を、正確な角度に近い順に返す
+    longitudes: 天体キー → 黄経（度）の辞書
+    """
+    names = list(longitudes)
+    values = np.array([longitudes[name] for name in names], dtype=float)
+    kinds, deviations = aspect_matrix(values, orbs)
+    separations = separation_matrix(values)
+    rows, cols = np.nonzero(np.triu(kinds != NO_ASPECT, k=1))
+    found = [{
+        'planets': (names[row], names[col]),
+        'aspect': ASPECT_KEYS[kinds[row, col]],
+        'separation': float(separations[row, col]),
+        'orb': float(deviations[row, col])
+    } for row, col in zip(rows.tolist(), cols.tolist())]
+    return sorted(found, key=lambda aspect: aspect['orb'])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+HTML の最小化と圧縮レベルごとの CPU 時間・圧縮後のサイズを測るベンチマーク
+
+実際のページ（入力フォーム・結果・基本レポート・詳細レポート）を描画し、
+最小化の時間と削減量、gzip の各レベルと brotli の各品質での圧縮時間とサイズを JSON で出力する。
+COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY を選ぶ際の目安にする。
+
+    python benchmarks/bench_compression.py [--repeat 20] [--output result.json]
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# 描画したままの HTML を測るため、アプリ側の最小化・圧縮とレポートストアは無効にする
+os.environ['USE_COMPRESSION'] = '0'
+os.environ['MINIFY_HTML'] = '0'
+os.environ.setdefault('USE_REPORT_STORE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import compression  # noqa: E402
+
+BIRTH = {
+    'name': 'ベンチ 太郎', 'birth_year': '1990', 'birth_month': '4', 'birth_day': '15',
+    'birth_hour': '14', 'birth_minute': '30', 'prefecture': '東京都'
+}
+
+
+def render_pages():
+    """計測に使うページの HTML（ページ名 → バイト列）"""
+    client = app.app.test_client()
+    pages = {'input_form': client.get('/').get_data()}
+    pages['result'] = client.post('/result', data=BIRTH).get_data()
+    pages['basic_report'] = client.get('/basic_report').get_data()
+    pages['detailed_report'] = client.get('/detailed_report?stream=0&async=0').get_data()
+    return pages
+
+
+def measure(fn, repeat):
+    """fn を repeat 回実行して1回あたりの時間の中央値（秒）と最後の結果を返す"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def bench_page(html, repeat):
+    minify_seconds, minified = measure(
+        lambda: compression.minify_html(html.decode('utf-8')).encode('utf-8'), repeat)
+    result = {
+        'original_bytes': len(html),
+        'minified_bytes': len(minified),
+        'minify_seconds': minify_seconds,
+        'gzip': {},
+        'brotli': {}
+    }
+    for level in range(1, 10):
+        seconds, body = measure(lambda: gzip.compress(minified, compresslevel=level, mtime=0), repeat)
+        result['gzip'][level] = {'bytes': len(body), 'seconds': seconds}
+    if compression.brotli is not None:
+        for quality in range(0, 12):
+            seconds, body = measure(lambda: compression.brotli.compress(minified, quality=quality), repeat)
+            result['brotli'][quality] = {'bytes': len(body), 'seconds': seconds}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='1つの設定あたりの計測回数')
+    parser.add_argument('--output', help='結果の JSON を書き出すファイル（省略時は標準出力）')
+    args = parser.parse_args()
+
+    results = {}
+    for name, html in render_pages().items():
+        results[name] = bench_page(html, args.repeat)
+        page = results[name]
+        print(f"{name:16s} {page['original_bytes']:8,} → 最小化 {page['minified_bytes']:8,} bytes"
+              f"（{page['minify_seconds'] * 1e3:.2f} ms）", file=sys.stderr)
+        for label, levels in (('gzip', page['gzip']), ('brotli', page['brotli'])):
+            for level, value in levels.items():
+                print(f"  {label:6s} {level:2d} {value['bytes']:8,} bytes {value['seconds'] * 1e3:8.2f} ms",
+                      file=sys.stderr)
+
+    output = json.dumps({
+        'benchmark': 'compression',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'brotli': compression.brotli is not None,
+        'results': results
+    }, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
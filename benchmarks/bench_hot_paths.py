@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+天体計算とレポート生成の主要な処理を計測するマイクロベンチマーク
+
+固定シードで生成した出生データを順に入力として使い、各処理の1回あたりの時間を
+繰り返し計測して JSON で出力する。キャッシュとレポートストアは既定で無効にして
+毎回の計算コストを測る（環境変数で明示的に指定した場合はその値を使う）。
+
+--allocations を付けると、各処理の1回あたりのメモリ確保量（tracemalloc のピーク）と、
+実行した辞書・リスト・タプル・集合の生成命令の数と要素数も記録する（関数内で作って捨てるリテラルも数える）。
+
+    python benchmarks/bench_hot_paths.py [--iterations 200] [--repeat 5] [--filter route] [--allocations] [--output result.json]
+"""
+import argparse
+import dis
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+os.environ.setdefault('CHART_CACHE_SIZE', '0')
+os.environ.setdefault('REPORT_FRAGMENT_CACHE_SIZE', '0')
+os.environ.setdefault('USE_REPORT_STORE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import aspects  # noqa: E402
+import synastry  # noqa: E402
+
+PLANET_NAMES = ['太陽', '月', '水星', '金星', '火星', '木星', '土星']
+
+# コンテナを生成するバイトコード命令（引数は要素数）
+CONTAINER_OPCODES = {dis.opmap[name] for name in
+                     ('BUILD_MAP', 'BUILD_CONST_KEY_MAP', 'BUILD_LIST', 'BUILD_SET', 'BUILD_TUPLE')}
+
+
+def make_birth_inputs(count, seed):
+    """固定シードで出生データ（/result のフォーム入力と同じ形式）を生成"""
+    rng = random.Random(seed)
+    prefectures = list(app.PREFECTURE_COORDINATES)
+    return [{
+        'name': f'ベンチ 太郎{i}',
+        'birth_year': rng.randint(1930, 2020),
+        'birth_month': rng.randint(1, 12),
+        'birth_day': rng.randint(1, 28),
+        'birth_hour': rng.randint(0, 23),
+        'birth_minute': rng.randint(0, 59),
+        'prefecture': rng.choice(prefectures)
+    } for i in range(count)]
+
+
+def birth_args(birth):
+    return (birth['birth_year'], birth['birth_month'], birth['birth_day'],
+            birth['birth_hour'], birth['birth_minute'], birth['prefecture'])
+
+
+def make_report_inputs(births):
+    """出生データから詳細レポートの入力（name, archetype, celestial_data, 太陽・月の元素）を作る"""
+    inputs = []
+    for birth in births:
+        result = app.calculate_celestial_positions(*birth_args(birth))
+        celestial_data = app.build_report_celestial_data(result['celestial_positions'])
+        archetype, sun_element, moon_element = app.resolve_report_archetype(celestial_data)
+        inputs.append((birth['name'], archetype, celestial_data, sun_element, moon_element))
+    return inputs
+
+
+def define_benchmarks(births, reports, client):
+    """ベンチマーク名 → 入力を1件受け取る関数 と、その入力の一覧"""
+    sabian_inputs = [(planet['sign'], planet['degree'])
+                     for _, _, celestial_data, _, _ in reports for planet in celestial_data.values()]
+    talent_inputs = [(PLANET_NAMES[i % len(PLANET_NAMES)], planet['sabian'], planet['element'])
+                     for _, _, celestial_data, _, _ in reports
+                     for i, planet in enumerate(celestial_data.values()) if planet.get('sabian')]
+
+    batch_records = [(datetime(*birth_args(birth)[:5]), birth['prefecture']) for birth in births]
+    batch_inputs = [batch_records[i:i + 100] for i in range(0, len(batch_records), 100)]
+    # 出生データの黄経を繰り返して1万件分の出生図にしたもの（アスペクトの一括判定用）
+    longitude_rows = [[planet['longitude_deg'] for planet in app.calculate_celestial_positions(
+        *birth_args(birth))['celestial_positions'].values()] for birth in births]
+    aspect_inputs = [np.array(longitude_rows * (10000 // len(longitude_rows) + 1))[:10000]]
+    # 固定シードの黄経で作った3万件の母集団に対する相性検索
+    population = np.random.default_rng(0).uniform(0.0, 360.0, (30000, len(PLANET_NAMES)))
+    synastry_index = synastry.ChartIndex([f'member{i}' for i in range(len(population))], population)
+    synastry_inputs = [app.calculate_celestial_positions(*birth_args(birth))['celestial_positions'] for birth in births]
+
+    # セッションを持つクライアントごとに1件の出生データを送信しておく
+    def make_session_client(birth):
+        session_client = app.app.test_client()
+        session_client.post('/result', data=birth)
+        return session_client
+    report_clients = [make_session_client(birth) for birth in births[:16]]
+
+    return {
+        'calculate_celestial_positions': (
+            lambda birth: app.calculate_celestial_positions(*birth_args(birth)), births),
+        'calculate_celestial_positions_batch_100': (
+            lambda records: app.calculate_celestial_positions_batch(records), batch_inputs),
+        'get_sabian_for_position': (
+            lambda args: app.get_sabian_for_position(*args), sabian_inputs),
+        'generate_sabian_talent_interpretation': (
+            lambda args: app.generate_sabian_talent_interpretation(*args), talent_inputs),
+        'generate_archetype_analysis': (
+            lambda r: app.generate_archetype_analysis(r[0], r[1], r[3], r[4], r[2]), reports),
+        'generate_planetary_interpretation': (
+            lambda r: app.generate_planetary_interpretation(r[0], r[2]), reports),
+        'generate_medical_constitution': (
+            lambda r: app.generate_medical_constitution(r[0], r[1], r[2]), reports),
+        'generate_holistic_prescriptions': (
+            lambda r: app.generate_holistic_prescriptions(r[0], r[1], r[2]), reports),
+        'generate_life_planning': (
+            lambda r: app.generate_life_planning(r[0], r[1], r[2]), reports),
+        'generate_epilogue': (
+            lambda r: app.generate_epilogue(r[0], r[1]), reports),
+        'describe_aspects': (
+            lambda r: app.describe_aspects(r[2]), reports),
+        'aspect_matrix_batch_10000': (
+            lambda longitudes: aspects.aspect_matrix(longitudes), aspect_inputs),
+        'synastry_top_matches_30000': (
+            lambda positions: synastry_index.top_matches(positions, k=10), synastry_inputs),
+        'generate_comprehensive_report': (
+            lambda r: app.generate_comprehensive_report(*r), reports),
+        'route_calculate': (
+            lambda birth: client.post('/calculate', json=birth), births),
+        'route_result': (
+            lambda birth: client.post('/result', data=birth), births),
+        'route_basic_report': (
+            lambda c: c.get('/basic_report'), report_clients),
+        'route_detailed_report': (
+            lambda c: c.get('/detailed_report?stream=0&async=0'), report_clients),
+        'route_detailed_report_stream': (
+            lambda c: c.get('/detailed_report?stream=1&async=0').get_data(), report_clients),
+    }
+
+
+def run_benchmark(fn, inputs, iterations, repeat):
+    """入力を順に使って iterations 回呼ぶ計測を repeat 回行い、1回あたりの時間（秒）を返す"""
+    fn(inputs[0])  # ウォームアップ
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(inputs[i % len(inputs)])
+        samples.append((time.perf_counter() - start) / iterations)
+    return {
+        'iterations': iterations,
+        'repeat': repeat,
+        'min_seconds': min(samples),
+        'median_seconds': statistics.median(samples),
+        'mean_seconds': statistics.fmean(samples),
+        'max_seconds': max(samples)
+    }
+
+
+def measure_allocations(fn, argument):
+    """1回の呼び出しのメモリ確保量のピークと、実行したコンテナ生成命令の数・要素数を返す"""
+    fn(argument)  # ウォームアップ
+    tracemalloc.start()
+    before_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn(argument)
+    _, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = {'containers_built': 0, 'container_items': 0}
+
+    def trace(frame, event, arg):
+        frame.f_trace_opcodes = True
+        if event == 'opcode':
+            code = frame.f_code.co_code
+            if code[frame.f_lasti] in CONTAINER_OPCODES:
+                counts['containers_built'] += 1
+                counts['container_items'] += code[frame.f_lasti + 1]
+        return trace
+
+    sys.settrace(trace)
+    try:
+        fn(argument)
+    finally:
+        sys.settrace(None)
+    return {'peak_bytes': peak_size - before_size, **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200, help='1回の計測で呼び出す回数')
+    parser.add_argument('--repeat', type=int, default=5, help='計測の繰り返し回数')
+    parser.add_argument('--inputs', type=int, default=200, help='生成する出生データの件数')
+    parser.add_argument('--seed', type=int, default=20240101, help='出生データ生成の乱数シード')
+    parser.add_argument('--filter', default='', help='名前にこの文字列を含むベンチマークだけを実行')
+    parser.add_argument('--allocations', action='store_true', help='1回あたりのメモリ確保量とコンテナ生成数も記録')
+    parser.add_argument('--output', help='結果の JSON を書き出すファイル（省略時は標準出力）')
+    args = parser.parse_args()
+
+    app.load_sabian_index()
+    births = make_birth_inputs(args.inputs, args.seed)
+    reports = make_report_inputs(births)
+    client = app.app.test_client()
+
+    results = {}
+    for name, (fn, inputs) in define_benchmarks(births, reports, client).items():
+        if args.filter in name:
+            results[name] = run_benchmark(fn, inputs, args.iterations, args.repeat)
+            line = f"{name:42s} {results[name]['median_seconds'] * 1e6:12.1f} µs"
+            if args.allocations:
+                results[name]['allocations'] = measure_allocations(fn, inputs[0])
+                allocations = results[name]['allocations']
+                line += f" {allocations['peak_bytes']:10d} B {allocations['containers_built']:8d} containers"
+            print(line, file=sys.stderr)
+
+    output = json.dumps({
+        'benchmark': 'hot_paths',
+        'seed': args.seed,
+        'inputs': args.inputs,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {key: os.environ[key] for key in
+                     ('CHART_CACHE_SIZE', 'REPORT_FRAGMENT_CACHE_SIZE', 'USE_REPORT_STORE', 'USE_EPHEMERIS_TABLES')
+                     if key in os.environ},
+        'results': results
+    }, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+詳細レポート本文の組み立てコストを測るマイクロベンチマーク
+
+章キャッシュを無効にした状態で generate_comprehensive_report を繰り返し実行し、
+1レポートあたりの時間とメモリ確保量（tracemalloc）を JSON で出力する。
+
+    python benchmarks/bench_report_builder.py [--reports 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# 章キャッシュを無効にして、毎回すべての章を生成させる
+os.environ['REPORT_FRAGMENT_CACHE_SIZE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=500, help='生成するレポート数')
+    args = parser.parse_args()
+
+    celestial_data = app.get_default_celestial_data()
+    for planet_data in celestial_data.values():
+        planet_data['sabian'] = app.get_sabian_for_position(planet_data['sign'], planet_data['degree'])
+    archetype = app.SIXTEEN_ARCHETYPES[('火', '水')].copy()
+
+    def generate():
+        return app.generate_comprehensive_report('山田 太郎', archetype, celestial_data, '火', '水')
+
+    # ウォームアップ（サビアンシンボルの読み込みなど）
+    generate()
+
+    start = time.perf_counter()
+    for _ in range(args.reports):
+        generate()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    report = generate()
+    _, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        'benchmark': 'report_builder',
+        'reports': args.reports,
+        'seconds_per_report': elapsed / args.reports,
+        'peak_bytes_per_report': peak_size - before_size,
+        'report_characters': len(report['full_text'])
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+出生データの一覧から詳細レポートを一括生成するコマンド
+
+CSV または JSONL の各行（name, date, time, prefecture）について天体計算とレポート生成を行い、
+全 CPU コアのプロセスプールで並列に処理する。入力は1行ずつ読み、処理中の件数を上限内に抑えて
+結果を入力の順に書き出すため、件数が多くてもメモリ使用量は一定に保たれる。
+
+    python bulk_reports.py births.csv --format html --output reports/
+    python bulk_reports.py births.jsonl --format json --output reports.jsonl
+
+入力の列:
+    name        : 名前（省略時は「お客様」）
+    date, time  : 生年月日（1990-04-15 または 1990/04/15）と出生時刻（14:30）
+                  代わりに /calculate と同じ birth_year〜birth_minute を指定してもよい
+    prefecture  : 出生地の都道府県
+
+出力:
+    html : 出力ディレクトリに行番号ごとの HTML（/detailed_report と同じ内容）と manifest.jsonl
+    json : 1行1件の JSONL（/calculate の結果に report_id とレポート本文 report を加えたもの）
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# 一括生成ではレポートストアに保存しない
+os.environ.setdefault('USE_REPORT_STORE', '0')
+
+import app  # noqa: E402
+import aspects  # noqa: E402
+import compression  # noqa: E402
+
+
+def read_records(path, input_format):
+    """入力ファイルを1行ずつ読み、(行番号, レコード) を返す"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if input_format == 'csv':
+            for line_number, record in enumerate(csv.DictReader(f), start=2):
+                yield line_number, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+
+
+def parse_birth(record):
+    """レコードから (年, 月, 日, 時, 分) を取り出す"""
+    if 'birth_year' in record:
+        return tuple(int(record[field]) for field in
+                     ('birth_year', 'birth_month', 'birth_day', 'birth_hour', 'birth_minute'))
+    date_text = str(record['date']).strip().replace('/', '-')
+    time_text = str(record.get('time') or '12:00').strip()
+    birth = datetime.strptime(f'{date_text} {time_text}', '%Y-%m-%d %H:%M')
+    return birth.year, birth.month, birth.day, birth.hour, birth.minute
+
+
+def generate_record(task):
+    """1件分の天体計算とレポート生成（プロセスプールのワーカーで実行）"""
+    line_number, record, output_format = task
+    name = record.get('name') or 'お客様'
+    try:
+        birth = parse_birth(record)
+        prefecture = record['prefecture']
+    except (KeyError, TypeError, ValueError) as e:
+        return line_number, {'success': False, 'name': name, 'error': f'入力値エラー: {str(e)}'}
+
+    try:
+        result = app.calculate_celestial_positions(*birth, prefecture)
+        if not result['success']:
+            result['name'] = name
+            return line_number, result
+        result['name'] = name
+
+        celestial_data = app.build_report_celestial_data(result['celestial_positions'])
+        archetype, sun_element, moon_element = app.resolve_report_archetype(celestial_data)
+        # /detailed_report と同じく作成日とオーブをレポートIDに含める
+        report_date = datetime.now().strftime('%Y年%m月%d日')
+        report_id = app.report_id_for(app.app.secret_key, name=name, archetype=archetype,
+                                      celestial_data=celestial_data, report_date=report_date,
+                                      orbs=aspects.orb_limits().tolist())
+
+        if output_format == 'html':
+            with app.app.test_request_context('/detailed_report'):
+                # /detailed_report と同じく最小化する（MINIFY_HTML=0 ならそのまま）
+                html = compression.prepare_html(app.render_detailed_report(name, archetype, celestial_data,
+                                                                           sun_element, moon_element, report_date))
+            return line_number, {'success': True, 'name': name, 'report_id': report_id, 'html': html}
+
+        report = app.generate_comprehensive_report(name, archetype, celestial_data, sun_element, moon_element)
+        del report['chapter_spans']
+        result['report_id'] = report_id
+        result['report'] = report
+        return line_number, result
+    except Exception as e:
+        return line_number, {'success': False, 'name': name, 'error': f'生成エラー: {str(e)}'}
+
+
+def generate_records(tasks):
+    """複数件をまとめて生成（ワーカーとのやり取りの回数を減らす）"""
+    return [generate_record(task) for task in tasks]
+
+
+def chunked(iterable, size):
+    """size 件ずつのリストに区切る"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ordered_map(executor, tasks, window, chunk_size):
+    """
+    chunk_size 件ずつワーカーに渡し、処理中のまとまりを window 個までに抑えながら
+    結果を入力の順に返す
+    """
+    pending = deque()
+    for chunk in chunked(tasks, chunk_size):
+        pending.append(executor.submit(generate_records, chunk))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def write_html_results(results, output_dir):
+    """HTML を行番号ごとのファイルに書き出し、結果の一覧を manifest.jsonl に記録"""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'manifest.jsonl'), 'w', encoding='utf-8') as manifest:
+        for line_number, result in results:
+            entry = {'line': line_number, 'success': result['success'], 'name': result.get('name')}
+            if result['success']:
+                filename = f'{line_number:06d}.html'
+                with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(result['html'])
+                entry['report_id'] = result['report_id']
+                entry['file'] = filename
+            else:
+                entry['error'] = result['error']
+            manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            yield result
+
+
+def write_json_results(results, output):
+    """結果を1行1件の JSONL で書き出す"""
+    for line_number, result in results:
+        output.write(json.dumps({'line': line_number, **result}, ensure_ascii=False) + '\n')
+        yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', help='出生データの CSV または JSONL')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'],
+                        help='入力形式（省略時は拡張子で判定）')
+    parser.add_argument('--format', choices=['html', 'json'], default='html', help='出力形式')
+    parser.add_argument('--output', required=True,
+                        help='出力先（html はディレクトリ、json はファイル。- で標準出力）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='並列に生成するプロセス数（既定は CPU コア数、1 でプロセスプールを使わない）')
+    parser.add_argument('--chunk-size', type=int, default=16, help='ワーカーに一度に渡す件数')
+    args = parser.parse_args()
+
+    input_format = args.input_format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    tasks = ((line_number, record, args.format)
+             for line_number, record in read_records(args.input, input_format))
+
+    # fork 前に読み込んでおき、各ワーカーでサビアンシンボルを共有する
+    app.load_sabian_index()
+
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        if executor is not None:
+            results = ordered_map(executor, tasks, window=args.workers * 4, chunk_size=args.chunk_size)
+        else:
+            results = map(generate_record, tasks)
+
+        output = None
+        if args.format == 'html':
+            written = write_html_results(results, args.output)
+        else:
+            output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+            written = write_json_results(results, output)
+
+        total = failed = 0
+        for result in written:
+            total += 1
+            if not result['success']:
+                failed += 1
+                print(f"生成できませんでした（{result.get('name')}）: {result.get('error')}", file=sys.stderr)
+        if output is not None and output is not sys.stdout:
+            output.close()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(f"{total} 件中 {total - failed} 件のレポートを生成しました（{elapsed:.1f} 秒）", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
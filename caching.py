@@ -0,0 +1,62 @@
+"""
+計算結果のメモリキャッシュ
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    容量制限付きの LRU キャッシュ（スレッドセーフ）
+    容量を超えると最も長く使われていない項目から削除する。容量 0 でキャッシュ無効
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(0, int(capacity))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """キーに対応する値を返す（見つからない場合は default）"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """値を保存し、容量を超えた分を古い順に削除"""
+        if self.capacity == 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """全項目を削除（統計はリセットしない）"""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        """ヒット・ミス・削除の統計を返す"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._items),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,146 @@
+"""
+HTML の空白の除去と、応答の gzip / brotli 圧縮
+
+テンプレートのインデントや空行を取り除いたうえで、Accept-Encoding に合わせて圧縮して返す。
+ETag のあるページ（内容が入力から決まるページ）は圧縮結果をメモリに保持し、
+同じ ETag への2回目以降の応答では圧縮し直さない。
+ストリーミング送信の応答は章ごとに圧縮して送り出す（最小化はしない）。
+
+圧縮レベルは環境変数で変更できる（レベルごとの CPU 時間と圧縮後のサイズは
+benchmarks/bench_compression.py で計測する）。
+"""
+import gzip
+import os
+import re
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import http_cache
+import metrics
+from caching import LRUCache
+
+USE_COMPRESSION = os.environ.get('USE_COMPRESSION', '1') == '1'
+MINIFY_HTML = os.environ.get('MINIFY_HTML', '1') == '1'
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+# これより小さい応答は圧縮しない（ヘッダーと圧縮の手間の方が大きいため）
+MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'application/x-ndjson'}
+
+# 中の空白をそのまま表示・実行する要素（最小化で変更しない）
+_PRESERVED_BLOCKS = re.compile(r'(<(pre|textarea|script)\b.*?</\2\s*>)', re.I | re.S)
+# 行頭・行末の半角スペースとタブ、空行（全角スペースは本文の一部なので \s は使わない）
+_LINE_SPACES = re.compile(r'^[ \t]+|[ \t]+$', re.M)
+_BLANK_LINES = re.compile(r'\n{2,}')
+
+COMPRESSED_CACHE = LRUCache(int(os.environ.get('COMPRESSED_RESPONSE_CACHE_SIZE', 256)))
+metrics.register_cache('compressed_response', COMPRESSED_CACHE)
+
+
+def minify_html(html):
+    """
+    行頭・行末の空白と空行を取り除く（改行は残すため、表示上の空白は変わらない）
+    <pre>・<textarea>・<script> の中はそのまま残す
+    """
+    parts = _PRESERVED_BLOCKS.split(html)
+    # split の結果は [本文, 要素全体, 要素名, 本文, ...] の順
+    for i in range(0, len(parts), 3):
+        parts[i] = _BLANK_LINES.sub('\n', _LINE_SPACES.sub('', parts[i]))
+    return ''.join(part for i, part in enumerate(parts) if i % 3 != 2)
+
+
+def prepare_html(html):
+    """設定に応じて HTML を最小化する（保存するレポートにも使い、配信時と同じ内容にする）"""
+    return minify_html(html) if MINIFY_HTML else html
+
+
+def compress(data, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    """バイト列を gzip または brotli で圧縮"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_stream(chunks, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    """チャンクごとに圧縮して送り出す（各チャンクの末尾でフラッシュし、ブラウザがすぐ表示できるようにする）"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def choose_encoding():
+    """Accept-Encoding から使う圧縮形式を選ぶ（brotli を優先。受け付けなければ None）"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compressible(response):
+    return (response.status_code == 200
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 'Content-Encoding' not in response.headers)
+
+
+def process_response(response):
+    """HTML を最小化し、クライアントが受け付ける形式で圧縮する"""
+    if not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+
+    if response.is_streamed:
+        if encoding is not None:
+            response.response = compress_stream(response.iter_encoded(), encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+            etag, _ = response.get_etag()
+            if etag:
+                response.set_etag(http_cache.encoded_etag(etag, encoding))
+        return response
+
+    etag, _ = response.get_etag()
+    body = response.get_data()
+    if len(body) < MIN_SIZE:
+        return response
+    # ETag のある応答は内容が入力から決まるため、圧縮結果を保持して使い回す
+    key = (etag, encoding or 'identity')
+    cached = COMPRESSED_CACHE.get(key) if etag else None
+    if cached is None:
+        if MINIFY_HTML and response.mimetype == 'text/html':
+            body = minify_html(body.decode('utf-8')).encode('utf-8')
+        cached = compress(body, encoding) if encoding is not None else body
+        if etag:
+            COMPRESSED_CACHE.put(key, cached)
+    response.set_data(cached)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(http_cache.encoded_etag(etag, encoding))
+    return response
+
+
+def init_app(app):
+    """応答の最小化・圧縮を登録（USE_COMPRESSION=0 で無効）"""
+    if not USE_COMPRESSION:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        return process_response(response)
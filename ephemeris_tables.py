@@ -0,0 +1,217 @@
+"""
+7天体の黄経をチェビシェフ多項式の区間テーブルで高速に求めるエンジン
+
+入力フォームの対象期間（1900〜2030年）をカバーするテーブルを事前に ephem から
+生成し、実行時はテーブルの多項式評価だけで黄経を求める。
+
+    python ephemeris_tables.py build     # テーブルを生成して保存
+    python ephemeris_tables.py verify    # ephem との誤差を検証
+"""
+import math
+import os
+import sys
+from datetime import datetime
+
+import ephem
+import numpy as np
+
+# テーブルファイルの保存先（sabian_symbols.json と同じくアプリのディレクトリ直下）
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ephemeris_tables.npz')
+
+# ephem.Date の基準時刻（Dublin Julian Date の 0 日目、UTC）
+EPHEM_EPOCH = datetime(1899, 12, 31, 12, 0, 0)
+
+# テーブルのカバー範囲（ephem.Date の日数）。JST 1900/1/1 0:00 の UTC から 2031 年初頭まで
+TABLE_START = float(ephem.Date('1899/12/31 00:00:00'))
+TABLE_END = float(ephem.Date('2031/01/02 00:00:00'))
+
+# 天体ごとの区間長（日）と多項式の次数
+# 動きの速い月・水星ほど区間を短くし、ephem との差を ephem 自体の精度（約1秒角）より十分小さく抑える
+BODY_TABLE_SPECS = {
+    'sun': (ephem.Sun, 16, 10),
+    'moon': (ephem.Moon, 4, 13),
+    'mercury': (ephem.Mercury, 8, 12),
+    'venus': (ephem.Venus, 16, 12),
+    'mars': (ephem.Mars, 16, 10),
+    'jupiter': (ephem.Jupiter, 16, 10),
+    'saturn': (ephem.Saturn, 16, 10),
+}
+
+# J2000 付近では ephem（libastro）の級数打ち切りが切り替わり黄経が滑らかでなくなるため、
+# この前後の期間はテーブルを使わず ephem で直接計算する
+J2000_DAYS = float(ephem.J2000)
+J2000_GUARD_DAYS = 32
+
+# テーブルデータのグローバル変数
+EPHEMERIS_TABLES = None
+
+
+def datetime_to_ephem_days(utc):
+    """UTC の datetime を ephem.Date と同じ日数表現に変換"""
+    return (utc - EPHEM_EPOCH).total_seconds() / 86400.0
+
+
+def datetimes_to_ephem_days(utc_array):
+    """UTC の datetime64 配列を ephem.Date と同じ日数表現の配列に変換"""
+    return (np.asarray(utc_array, dtype='datetime64[s]') - np.datetime64(EPHEM_EPOCH, 's')) / np.timedelta64(1, 'D')
+
+
+def ephem_longitude(body, days):
+    """ephem で天体の地球中心黄経（度）を直接計算"""
+    body.compute(ephem.Date(days))
+    return math.degrees(ephem.Ecliptic(body).lon)
+
+
+def build_body_table(body_cls, segment_days, degree):
+    """1天体分のチェビシェフ係数テーブルを生成"""
+    segment_count = int(math.ceil((TABLE_END - TABLE_START) / segment_days))
+    # チェビシェフ節点（第1種）
+    k = np.arange(degree + 1)
+    nodes = np.cos(np.pi * (k + 0.5) / (degree + 1))
+
+    body = body_cls()
+    coefficients = np.empty((segment_count, degree + 1))
+    for segment in range(segment_count):
+        start = TABLE_START + segment * segment_days
+        days = start + (nodes + 1.0) * 0.5 * segment_days
+        longitudes = np.array([ephem_longitude(body, d) for d in days])
+        # 区間内で 360 度をまたぐ場合に連続になるよう補正
+        longitudes = np.unwrap(longitudes, period=360.0)
+        coefficients[segment] = np.polynomial.chebyshev.chebfit(nodes, longitudes, degree)
+    return coefficients
+
+
+def build_tables(path=TABLES_PATH):
+    """全天体のテーブルを生成してファイルに保存"""
+    arrays = {
+        'table_start': np.array(TABLE_START),
+        'table_end': np.array(TABLE_END),
+    }
+    for name, (body_cls, segment_days, degree) in BODY_TABLE_SPECS.items():
+        arrays[f'{name}_coefficients'] = build_body_table(body_cls, segment_days, degree)
+        arrays[f'{name}_segment_days'] = np.array(float(segment_days))
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def load_ephemeris_tables(path=TABLES_PATH):
+    """テーブルファイルを読み込む（存在しない場合は None を返し ephem にフォールバック）"""
+    global EPHEMERIS_TABLES
+    if EPHEMERIS_TABLES is None:
+        try:
+            with np.load(path) as data:
+                tables = {
+                    'start': float(data['table_start']),
+                    'end': float(data['table_end']),
+                    'bodies': {}
+                }
+                for name in BODY_TABLE_SPECS:
+                    tables['bodies'][name] = (
+                        data[f'{name}_coefficients'],
+                        float(data[f'{name}_segment_days'])
+                    )
+            EPHEMERIS_TABLES = tables
+        except FileNotFoundError:
+            print("天体暦テーブルが見つかりません（ephem で直接計算します）")
+            EPHEMERIS_TABLES = {}
+        except Exception as e:
+            print(f"天体暦テーブル読み込みエラー: {e}")
+            EPHEMERIS_TABLES = {}
+    return EPHEMERIS_TABLES or None
+
+
+def chebyshev_value(coefficients, x):
+    """Clenshaw 法でチェビシェフ級数を評価（1点の評価では numpy.chebval より高速）"""
+    b1 = b2 = 0.0
+    x2 = 2.0 * x
+    for c in reversed(coefficients[1:]):
+        b1, b2 = c + x2 * b1 - b2, b1
+    return coefficients[0] + x * b1 - b2
+
+
+def covers(days):
+    """指定時刻がテーブルの範囲内かどうか（J2000 前後の除外期間を含まない）"""
+    tables = load_ephemeris_tables()
+    if not tables or abs(days - J2000_DAYS) < J2000_GUARD_DAYS:
+        return False
+    return tables['start'] <= days < tables['end']
+
+
+def interpolate_longitude(name, days):
+    """テーブルから天体の黄経（0-360度）を補間"""
+    tables = load_ephemeris_tables()
+    coefficients, segment_days = tables['bodies'][name]
+    offset = (days - tables['start']) / segment_days
+    segment = int(offset)
+    x = 2.0 * (offset - segment) - 1.0
+    return chebyshev_value(coefficients[segment].tolist(), x) % 360.0
+
+
+def interpolate_longitudes(days):
+    """テーブルから7天体すべての黄経を補間（範囲外なら None）"""
+    if not covers(days):
+        return None
+    return {name: interpolate_longitude(name, days) for name in BODY_TABLE_SPECS}
+
+
+def interpolate_longitudes_array(days):
+    """
+    複数時刻の7天体の黄経をまとめて補間（ベクトル化）
+    テーブルの範囲外（J2000 前後の除外期間を含む）の要素は NaN を返す
+    """
+    days = np.asarray(days, dtype=float)
+    tables = load_ephemeris_tables()
+    if not tables:
+        return {name: np.full(days.shape, np.nan) for name in BODY_TABLE_SPECS}
+
+    covered = ((days >= tables['start']) & (days < tables['end'])
+               & (np.abs(days - J2000_DAYS) >= J2000_GUARD_DAYS))
+    safe_days = np.where(covered, days, tables['start'])
+
+    results = {}
+    for name, (coefficients, segment_days) in tables['bodies'].items():
+        offset = (safe_days - tables['start']) / segment_days
+        segment = offset.astype(int)
+        x = 2.0 * (offset - segment) - 1.0
+        rows = coefficients[segment]
+        # Clenshaw 法（interpolate_longitude と同じ演算順で全要素を一度に評価）
+        b1 = np.zeros(days.shape)
+        b2 = np.zeros(days.shape)
+        x2 = 2.0 * x
+        for j in range(rows.shape[-1] - 1, 0, -1):
+            b1, b2 = rows[..., j] + x2 * b1 - b2, b1
+        longitudes = (rows[..., 0] + x * b1 - b2) % 360.0
+        results[name] = np.where(covered, longitudes, np.nan)
+    return results
+
+
+def verify_tables(samples=2000, seed=42):
+    """ランダムな時刻で ephem と比較し、天体ごとの最大誤差（秒角）を返す"""
+    tables = load_ephemeris_tables()
+    if not tables:
+        raise RuntimeError("天体暦テーブルが読み込めません。先に build を実行してください")
+
+    rng = np.random.default_rng(seed)
+    instants = [d for d in rng.uniform(tables['start'], tables['end'], samples) if covers(d)]
+    errors = {}
+    for name, (body_cls, _, _) in BODY_TABLE_SPECS.items():
+        body = body_cls()
+        worst = 0.0
+        for days in instants:
+            diff = interpolate_longitude(name, days) - ephem_longitude(body, days) % 360.0
+            diff = (diff + 180.0) % 360.0 - 180.0
+            worst = max(worst, abs(diff))
+        errors[name] = worst * 3600.0
+    return errors
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        print(f"天体暦テーブルを生成しました: {build_tables()}")
+    elif command == 'verify':
+        for name, arcsec in verify_tables().items():
+            print(f"{name:8s} 最大誤差 {arcsec:.6f} 秒角")
+    else:
+        print("使い方: python ephemeris_tables.py [build|verify]")
+        sys.exit(1)
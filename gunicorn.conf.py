@@ -0,0 +1,42 @@
+"""
+gunicorn の設定（起動ディレクトリにあるため gunicorn が自動で読み込む）
+
+/metrics の値を全ワーカーで合算できるよう、メトリクスを書き込む共有ディレクトリを設定する。
+最初のリクエストが遅くならないよう、リクエストを受け付ける前にアプリのウォームアップを行う
+（--preload 時は fork 前の親プロセスで1回、それ以外は各ワーカーの起動直後。WARMUP=0 で無効）。
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'astro-prometheus'))
+# --preload ではこの後すぐ親プロセスでアプリ（メトリクス）を読み込むため、先にディレクトリを作っておく
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def on_starting(server):
+    # --preload では読み込み済みのアプリを fork 前にウォームアップし、各ワーカーで共有する
+    # （メトリクスのディレクトリを消す前に行い、ウォームアップ中の計測値を残さない）
+    # （WARMUP=0 の判定は /healthz と同じ app.WARMUP を使う）
+    if server.cfg.preload_app:
+        import app
+        if app.WARMUP:
+            app.warm_up()
+
+    # 前回の起動時に書き込まれた値を消してから始める
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # --preload でない場合は各ワーカーでウォームアップしてからリクエストを受け付ける
+    # （--preload では親プロセスで完了済みのため何もしない）
+    import app
+    if app.WARMUP:
+        app.warm_up()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,118 @@
+"""
+HTTP の条件付きリクエスト（ETag / Last-Modified）とルートごとの Cache-Control
+
+ETag は描画した HTML ではなく、応答の内容を決める入力（名前・天体データ・レポート作成日など）と
+アプリのバージョン（テンプレートと文章データのファイルの内容）から求める。
+そのため、If-None-Match が一致すれば天体計算やレポート生成の前に 304 を返せる。
+
+    etag = http_cache.etag_for('basic_report', name, celestial_data_raw)
+    response = http_cache.not_modified(etag)
+    if response is not None:
+        return response
+    ...
+    return http_cache.set_validators(Response(html), etag)
+"""
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 応答の内容に影響するファイル（内容が変わると全ての ETag が変わる）
+SOURCE_FILES = [os.path.join(BASE_DIR, name) for name in ('app.py', 'knowledge_base.py', 'aspects.py', 'sabian_symbols.json')]
+SOURCE_FILES += sorted(glob.glob(os.path.join(BASE_DIR, 'templates', '*.html')))
+# HTML が参照する CSS / JavaScript のファイル名（static_assets.py build で変わる）
+SOURCE_FILES.append(os.path.join(BASE_DIR, 'static', 'dist', 'manifest.json'))
+
+# 圧縮して返す応答の形式（ETag に形式名を付けて、圧縮前と同じ ETag にしない）
+CONTENT_ENCODINGS = ('gzip', 'br')
+
+# エンドポイントごとの Cache-Control（ルートが自分で設定した場合はそちらを使う）
+CACHE_POLICIES = {
+    # 入力フォームは全員に同じ内容なので共有キャッシュにも保存してよい
+    'input_form': 'public, max-age=600',
+    # セッションの内容で変わるページは毎回 ETag で確認させる（一致すれば 304）
+    'basic_report_page': 'private, no-cache',
+    'detailed_report_page': 'private, no-cache',
+    # レポートIDのページは内容が変わらない
+    'stored_report_page': 'private, max-age=86400',
+    'report_result_page': 'private, max-age=3600',
+    'report_status_api': 'no-store',
+    # 天体の運行は入力の期間だけで決まる
+    'transits_api': 'public, max-age=86400',
+    # 母集団の統計は入力の期間と統計テーブルだけで決まる
+    'population_stats_api': 'public, max-age=86400',
+    'healthz': 'no-store',
+}
+
+
+def source_version(paths=SOURCE_FILES):
+    """ファイルの内容のハッシュと最終更新日時（UTC）を返す"""
+    digest = hashlib.sha256()
+    modified = 0.0
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            modified = max(modified, os.path.getmtime(path))
+        except OSError:
+            continue
+    return digest.hexdigest()[:16], datetime.fromtimestamp(int(modified), timezone.utc)
+
+
+CONTENT_VERSION, CONTENT_MODIFIED = source_version()
+
+
+def etag_for(*parts):
+    """応答の入力とアプリのバージョンから強い ETag の値を求める"""
+    payload = json.dumps([CONTENT_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def encoded_etag(etag, encoding):
+    """圧縮した応答の ETag（gzip なら末尾に -gzip を付ける）"""
+    return f'{etag}-{encoding}'
+
+
+def not_modified(etag, last_modified=None):
+    """
+    条件付きリクエストがクライアントの保持している内容と一致すれば 304 のレスポンスを返す（一致しなければ None）
+    If-None-Match があればそれだけで判定し、なければ If-Modified-Since を last_modified と比べる
+    """
+    if request.if_none_match:
+        # 圧縮して受け取った内容（接尾辞付きの ETag）も同じ入力から作られたものとして扱う
+        candidates = (etag, *(encoded_etag(etag, encoding) for encoding in CONTENT_ENCODINGS))
+        matched = next((tag for tag in candidates if request.if_none_match.contains_weak(tag)), None)
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = etag if last_modified <= request.if_modified_since else None
+    else:
+        matched = None
+    if matched is None:
+        return None
+    return set_validators(Response(status=304), matched, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """レスポンスに ETag と Last-Modified を設定"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def init_app(app, policies=CACHE_POLICIES):
+    """エンドポイントごとの Cache-Control を設定する処理を登録"""
+
+    @app.after_request
+    def apply_cache_policy(response):
+        # 生成中（202）やエラーの応答をキャッシュさせないよう、200 と 304 にだけ設定する
+        if response.status_code not in (200, 304):
+            return response
+        policy = policies.get(request.endpoint)
+        if policy is not None and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = policy
+        return response
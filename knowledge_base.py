@@ -0,0 +1,842 @@
+"""
+鑑定文の生成に使う固定データ（知識ベース）
+
+星座・四元素・クオリティ・16原型・アスペクト・相性の表と、各章の文章生成で参照する対応表をまとめたもの。
+インポート時に一度だけ構築し、辞書は MappingProxyType、リストは tuple にして読み取り専用にする。
+星座・四元素・16原型は整数インデックスでも引けるようにし、validate で表どうしの整合性を確認する。
+
+    python knowledge_base.py validate    # 原型名で引く表の定義漏れ（既定の文言になるもの）を表示
+"""
+import sys
+from types import MappingProxyType
+
+
+def _freeze(value):
+    """辞書・リストを再帰的に読み取り専用（MappingProxyType / tuple）に変換"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# ---------------------------------------------------------------------------
+# 星座・四元素・クオリティ
+# ---------------------------------------------------------------------------
+
+# 星座名の定義（黄経0度から30度区切り）
+ZODIAC_SIGNS = (
+    '牡羊座', '牡牛座', '双子座', '蟹座', '獅子座', '乙女座',
+    '天秤座', '蠍座', '射手座', '山羊座', '水瓶座', '魚座'
+)
+
+# 四元素とクオリティ（インデックスは SIGN_ELEMENTS / SIGN_QUALITIES の値）
+ELEMENTS = ('火', '地', '風', '水')
+QUALITIES = ('活動宮', '固定宮', '柔軟宮')
+
+# 星座・四元素の名前 → インデックス
+SIGN_INDEX = MappingProxyType({sign: index for index, sign in enumerate(ZODIAC_SIGNS)})
+ELEMENT_INDEX = MappingProxyType({element: index for index, element in enumerate(ELEMENTS)})
+
+# 星座インデックス → 四元素・クオリティのインデックス（牡羊座から火・地・風・水、活動・固定・柔軟の順に繰り返す）
+SIGN_ELEMENTS = (0, 1, 2, 3) * 3
+SIGN_QUALITIES = (0, 1, 2) * 4
+
+
+def sign_element(sign):
+    """星座名から四元素を返す（不明な星座は '不明'）"""
+    index = SIGN_INDEX.get(sign)
+    return ELEMENTS[SIGN_ELEMENTS[index]] if index is not None else '不明'
+
+
+def sign_quality(sign):
+    """星座名からクオリティを返す（不明な星座は '不明'）"""
+    index = SIGN_INDEX.get(sign)
+    return QUALITIES[SIGN_QUALITIES[index]] if index is not None else '不明'
+
+
+# ---------------------------------------------------------------------------
+# 天体
+# ---------------------------------------------------------------------------
+
+# 天体の日本語名 → 英語キー（レポート用の天体データのキー）
+PLANET_NAMES_EN = _freeze({
+    '太陽': 'sun', '月': 'moon', '水星': 'mercury',
+    '金星': 'venus', '火星': 'mars', '木星': 'jupiter', '土星': 'saturn'
+})
+
+# 天体ごとの名前・司る領域・対応する身体部位（第2章）
+PLANET_MEANINGS = _freeze({
+    'sun': {'name': '太陽', 'domain': '本質的自己、生命力、創造性', 'medical': '心臓、背骨、目'},
+    'moon': {'name': '月', 'domain': '感情、無意識、養育', 'medical': '胃、乳房、体液'},
+    'mercury': {'name': '水星', 'domain': '知性、コミュニケーション、学習', 'medical': '神経系、呼吸器、手'},
+    'venus': {'name': '金星', 'domain': '愛情、美、価値観', 'medical': '腎臓、喉、皮膚'},
+    'mars': {'name': '火星', 'domain': '行動力、情熱、闘争', 'medical': '筋肉、血液、頭部'},
+    'jupiter': {'name': '木星', 'domain': '拡大、幸運、哲学', 'medical': '肝臓、大腿部、成長'},
+    'saturn': {'name': '土星', 'domain': '制限、責任、成熟', 'medical': '骨格、歯、関節'}
+})
+
+# 惑星別の才能領域（サビアンシンボルの才能解釈）
+PLANET_TALENT_DOMAINS = _freeze({
+    '太陽': '核心的な才能と人生の目的',
+    '月': '感情的知性と適応能力', 
+    '水星': '知的能力とコミュニケーション',
+    '金星': '審美眼と人間関係の才能',
+    '火星': '実行力と達成能力',
+    '木星': '成長と発展の可能性',
+    '土星': '専門性と持続力'
+})
+
+
+# ---------------------------------------------------------------------------
+# 16原型
+# ---------------------------------------------------------------------------
+
+# 16原型データ（キーは (太陽の元素, 月の元素)）
+SIXTEEN_ARCHETYPES = _freeze({
+    ("火", "火"): {
+        "name": "超新星",
+        "name_en": "The Supernova",
+        "element_combination": "火×火",
+        "tagline": "純粋で混じり気のない情熱の化身。内外のベクトルが一つの目的に完全一致する。",
+        "temperament": "純粋な情熱",
+        "body_type": "胆汁質の極致",
+        "core": "純粋で混じり気のない情熱の化身。彼らの内なる世界と外に向かう表現は、燃え盛る炎のような一つの目的に向かって完全に一致しています。",
+        "talents": "圧倒的な行動力と決断の速さ。困難を前にしても怯まず、直感に従って突き進む勇気。",
+        "challenges": "地の「現実感覚」と水の「共感性」の欠如。忍耐を学び、結果への配慮と感情の機微への感受性を育むことが課題。"
+    },
+    ("火", "地"): {
+        "name": "マグマ",
+        "name_en": "The Magma",
+        "element_combination": "火×地",
+        "tagline": "熱血のリアリスト。燃えるビジョンを現実的な忍耐で形にする建設者。",
+        "temperament": "熱血のリアリスト",
+        "body_type": "胆汁質と憂鬱質の統合",
+        "core": "燃えるようなビジョンを抱きながらも、その情熱を現実的で忍耐強い、地に足のついた感情の性質を通して表現します。",
+        "talents": "壮大なビジョンと実行力を兼備。目標設定後の粘り強さと集中力に優れる。",
+        "challenges": "風の「代替案」や水の「感情配慮」を見落としがち。柔軟性と協力の価値を学ぶことが課題。"
+    },
+    ("火", "風"): {
+        "name": "伝道師",
+        "name_en": "The Evangelist",
+        "element_combination": "火×風",
+        "tagline": "熱狂のカリスマ。情熱×知性でムーブメントを起こすストーリーテラー。",
+        "temperament": "熱狂のカリスマ",
+        "body_type": "胆汁質と多血質の結合",
+        "core": "情熱は知性によって磨かれ、伝染性の高い熱意で語られる。卓越したストーリーテラー／リーダー／プレゼンター。",
+        "talents": "斬新な発想力と魅力的な伝達力。社交性も高く、多様なネットワークを構築。",
+        "challenges": "地の「質実剛健さ」が不足。アイデアが絵に描いた餅に終わるリスク。"
+    },
+    ("火", "水"): {
+        "name": "間欠泉",
+        "name_en": "The Geyser",
+        "element_combination": "火×水",
+        "tagline": "激情の共感者。深い感情を熱して行動へ昇華するダイナモ。",
+        "temperament": "激情の共感者",
+        "body_type": "胆汁質と粘液質の調和",
+        "core": "行動は深く強力な感情の流れに突き動かされる。猛烈に守り、強烈に忠実。",
+        "talents": "並外れた共感力と爆発的行動力。豊かな感情は創造の源泉。",
+        "challenges": "感情の波に飲み込まれ客観性を失いやすい。地の現実感と風の論理を学ぶ。"
+    },
+    ("地", "火"): {
+        "name": "火山",
+        "name_en": "The Volcano",
+        "element_combination": "地×火",
+        "tagline": "現実的なる情熱家。静かな構造に熱源を秘め、決定的一手で噴火する。",
+        "temperament": "現実的な情熱家",
+        "body_type": "憂鬱質と胆汁質の統合",
+        "core": "穏やかで有能な外面の奥に、野心と情熱のマグマ。忍耐強い建設者だが、好機には決定的で力強い行動力で噴火する。",
+        "talents": "壮大な夢を現実にする計画力と実行力。リスク判断と大胆な行動を兼備。",
+        "challenges": "推進力が他者のアイデア（風）や感情（水）を軽視して見えることがある。"
+    },
+    ("地", "地"): {
+        "name": "岩盤",
+        "name_en": "The Bedrock",
+        "element_combination": "地×地",
+        "tagline": "揺るぎなき現実主義者。安定・忍耐・実用の究極形。",
+        "temperament": "揺るぎなき現実主義",
+        "body_type": "憂鬱質の完成形",
+        "core": "安定、忍耐、実用性の究極的体現者。内外の目的は測定可能な達成に完全調和。",
+        "talents": "具体化、計画、粘り強い実現力に他の追随を許さない。五感に根差した生活力。",
+        "challenges": "安定性が頑固さや視野の狭さになりうる。火の自発性と風の好奇心を意識的に取り入れる。"
+    },
+    ("地", "風"): {
+        "name": "サバンナ",
+        "name_en": "The Savannah",
+        "element_combination": "地×風",
+        "tagline": "現実的な設計者。理にかなう美しい構造を現実へ落とし込む。",
+        "temperament": "現実的な設計者",
+        "body_type": "憂鬱質と多血質の調和",
+        "core": "知的な青写真を現実へ落とし込む達人。合理と効率、エレガントな理論と実用を両立。",
+        "talents": "冷静客観で状況把握、科学的思考で判断。交渉や根回しも涼やかに。",
+        "challenges": "合理と効率の優先で情熱（火）や感情（水）を見失いがち。"
+    },
+    ("地", "水"): {
+        "name": "庭園",
+        "name_en": "The Garden",
+        "element_combination": "地×水",
+        "tagline": "育む供給者。愛と実務で安心と豊かさをつくる肥沃な大地。",
+        "temperament": "育む供給者",
+        "body_type": "憂鬱質と粘液質の融合",
+        "core": "深い共感と愛情を、具体的な安定と快適さの創造で表す。究極の世話役。",
+        "talents": "思いやりと繊細さ、現実的たくましさを兼備。役立つ喜びに尽くす。",
+        "challenges": "身近なサークルに集中しすぎ、個人的輝き（火）や広い視点（風）を忘れがち。"
+    },
+    ("風", "火"): {
+        "name": "山火事",
+        "name_en": "The Wildfire",
+        "element_combination": "風×火",
+        "tagline": "情熱のメッセンジャー。言葉で熱を点火し、理想へ駆け上がる。",
+        "temperament": "情熱のメッセンジャー",
+        "body_type": "多血質と胆汁質の結合",
+        "core": "アイデアは火花となって他者に熱意を点火。ダイナミックなコミュニケーター、社会的触媒。",
+        "talents": "発想力と社交性。積極的に外へ出て交流し、チャンスを嗅ぎ取る能力。",
+        "challenges": "地の基盤と水の深みが欠けやすい。アウトプット過多でエネルギー切れ。"
+    },
+    ("風", "地"): {
+        "name": "砂岩の彫刻家",
+        "name_en": "The Sandstone Carver",
+        "element_combination": "風×地",
+        "tagline": "合理的な現実主義者。抽象に形を与え、思考をシステムへ刻む。",
+        "temperament": "合理的な現実主義",
+        "body_type": "多血質と憂鬱質の調和",
+        "core": "抽象を取り上げ構造と形を与える達人。明晰で論理的、社交的でありながら地に足がついた能力。",
+        "talents": "高いコミュ力で誰とでも合わせられる。最終判断は肌感覚に基づく。",
+        "challenges": "合理と現実性の融合が火の情熱や水の感情を欠いた冷徹さに映ることがある。"
+    },
+    ("風", "風"): {
+        "name": "サイクロン",
+        "name_en": "The Cyclone",
+        "element_combination": "風×風",
+        "tagline": "純粋な知性体。情報と会話の渦を生み、世界を横断する。",
+        "temperament": "純粋な知性体",
+        "body_type": "多血質の純粋形",
+        "core": "アイデア、コミュニケーション、社会的ネットワークの世界で呼吸。客観的・合理的・好奇心旺盛。",
+        "talents": "豊かな教養と洗練で議論の場でも存在感。独立心が強く自由な交流を好む。",
+        "challenges": "「頭でっかち」で肉体から遊離しやすい。非論理的な感情や日常の現実が苦手。"
+    },
+    ("風", "水"): {
+        "name": "霧",
+        "name_en": "The Mist",
+        "element_combination": "風×水",
+        "tagline": "共感する知性。論理と感情を溶かし、言葉で潤いをもたらす。",
+        "temperament": "共感する知性",
+        "body_type": "多血質と粘液質の統合",
+        "core": "感情の機微を理解し言葉で表現する稀有な才能。論理と直感を融合。",
+        "talents": "卓越したユーモアとオリジナルな想像力。人の気持ちを察し、計画を立て実行。",
+        "challenges": "思考と感情に没入し行動（火）や現実対処（地）が遅れがち。"
+    },
+    ("水", "火"): {
+        "name": "温泉",
+        "name_en": "The Hot Spring",
+        "element_combination": "水×火",
+        "tagline": "行動する共感者。守るべきもののために、温もりと勇気で動く。",
+        "temperament": "行動する共感者",
+        "body_type": "粘液質と胆汁質の調和",
+        "core": "癒しに満ちた水の太陽の性質は、情熱的で直接的な火の月の行動力を通して表現。",
+        "talents": "深い愛情と実行情熱の兼備。困っている人を見過ごせず即行動。",
+        "challenges": "主観的・衝動的に傾き、地の見通しや風の論理を欠く。"
+    },
+    ("水", "地"): {
+        "name": "粘土",
+        "name_en": "The Clay",
+        "element_combination": "水×地",
+        "tagline": "形ある癒し手。混沌に器を与え、安心を持続する。",
+        "temperament": "形ある癒し手",
+        "body_type": "粘液質と憂鬱質の融合",
+        "core": "深い感情的目的は、現実的・具体的・永続的な安心の提供。魂の陶芸家。",
+        "talents": "共感力と実務能力の兼備。情に厚い職人肌で、最後まで責任を持つ。",
+        "challenges": "過度に慎重で慣習に固執しやすい。火の個人リスクや風の抽象に抵抗。"
+    },
+    ("水", "風"): {
+        "name": "雨雲",
+        "name_en": "The Raincloud",
+        "element_combination": "水×風",
+        "tagline": "詩的な魂。感情を言語と芸術へ翻訳するストーリーテラー。",
+        "temperament": "詩的な魂",
+        "body_type": "粘液質と多血質の統合",
+        "core": "感情の世界を深く見つめ、それを言語・芸術・アイデアに翻訳する非凡な能力。",
+        "talents": "細やかで鋭い洞察。人を見て気質を見抜く。表現語彙が豊富。",
+        "challenges": "内なる美しい非現実に没入し憂鬱や無気力へ。火の行動と地の現実が欠けがち。"
+    },
+    ("水", "水"): {
+        "name": "大洋",
+        "name_en": "The Ocean",
+        "element_combination": "水×水",
+        "tagline": "無限の共感体。境界を越え、すべてを包む深い水域。",
+        "temperament": "無限の共感体",
+        "body_type": "粘液質の深化形",
+        "core": "純粋で希釈されていない感情・直感・霊的感受性。集合的無意識と深く繋がる。",
+        "talents": "驚異的な共感能力と思いやり。芸術感受性が高く、存在自体が安らぎと潤いを与える。",
+        "challenges": "個人的境界線の維持と現実世界での機能が課題。同調しすぎて圧倒され自己喪失の危険。"
+    }
+})
+
+# 16原型の各項目が持つキー
+ARCHETYPE_FIELDS = ('name', 'name_en', 'element_combination', 'tagline', 'temperament',
+                    'body_type', 'core', 'talents', 'challenges')
+
+# 太陽と月の四元素インデックスから16原型を引く表（インデックスは 太陽 * 4 + 月）
+ARCHETYPE_GRID = tuple(SIXTEEN_ARCHETYPES[(sun, moon)] for sun in ELEMENTS for moon in ELEMENTS)
+
+
+def archetype_index(sun_element, moon_element):
+    """太陽と月の四元素から ARCHETYPE_GRID のインデックスを返す（不明な元素は None）"""
+    sun = ELEMENT_INDEX.get(sun_element)
+    moon = ELEMENT_INDEX.get(moon_element)
+    if sun is None or moon is None:
+        return None
+    return sun * len(ELEMENTS) + moon
+
+
+# 体質原型ごとの強み・身体的特徴・注意点・生活習慣（要約レポート）
+ARCHETYPE_FEATURES = _freeze({
+    "火のカリスマ": {
+        "strength": "強力なリーダーシップ、決断力、行動力",
+        "physical": "高い基礎代謝、筋肉質な体質、熱産生が活発",
+        "caution": "過労、ストレス性疾患、炎症性疾患への注意",
+        "lifestyle": "定期的なクールダウン、瞑想、十分な水分補給"
+    },
+    "マグマ": {
+        "strength": "爆発的な創造力、情熱、カリスマ性",
+        "physical": "非常に高い体温、活発な循環系、強い消化力",
+        "caution": "怒りのコントロール、血圧管理、熱性疾患",
+        "lifestyle": "冷却食品の摂取、水泳、定期的な休息"
+    },
+    "聖火": {
+        "strength": "持続的な情熱、理想主義、インスピレーション",
+        "physical": "安定した熱産生、良好な代謝、強い免疫力",
+        "caution": "理想と現実のギャップによるストレス",
+        "lifestyle": "創造的活動、芸術療法、自然との触れ合い"
+    },
+    "野火": {
+        "strength": "瞬発力、適応力、直感的判断力",
+        "physical": "変動しやすい体温、敏感な神経系",
+        "caution": "エネルギーの浪費、神経過敏",
+        "lifestyle": "規則的な生活リズム、グラウンディング"
+    },
+    "竈の火": {
+        "strength": "忍耐力、実務能力、安定性",
+        "physical": "安定した消化機能、堅実な体格",
+        "caution": "柔軟性の欠如、関節の硬化",
+        "lifestyle": "ストレッチ、ヨガ、柔軟性を高める運動"
+    },
+    "鉱床": {
+        "strength": "分析力、計画性、持久力",
+        "physical": "強固な骨格、ゆっくりとした代謝",
+        "caution": "循環不良、冷え性、消化不良",
+        "lifestyle": "有酸素運動、温かい食事、マッサージ"
+    },
+    "山": {
+        "strength": "安定性、信頼性、保守力",
+        "physical": "強靭な体格、ゆったりとした動作",
+        "caution": "変化への抵抗、頑固さ",
+        "lifestyle": "新しい経験、旅行、社交活動"
+    },
+    "流砂": {
+        "strength": "柔軟性、適応力、受容力",
+        "physical": "変化しやすい体調、敏感な消化器",
+        "caution": "境界の曖昧さ、依存傾向",
+        "lifestyle": "境界設定の練習、自己主張トレーニング"
+    },
+    "山火事": {
+        "strength": "コミュニケーション力、情熱、発信力",
+        "physical": "活発な代謝、敏感な呼吸器系",
+        "caution": "オーバーワーク、呼吸器疾患",
+        "lifestyle": "呼吸法、休息、森林浴"
+    },
+    "砂岩の彫刻家": {
+        "strength": "論理性、創造性、実用性の融合",
+        "physical": "バランスの取れた体質、安定した神経系",
+        "caution": "感情表現の抑制、緊張性頭痛",
+        "lifestyle": "感情解放、アート活動、音楽療法"
+    },
+    "サイクロン": {
+        "strength": "知的好奇心、多才、社交性",
+        "physical": "敏感な神経系、変動しやすいエネルギー",
+        "caution": "散漫、不眠、神経疲労",
+        "lifestyle": "瞑想、集中力トレーニング、十分な睡眠"
+    },
+    "霧": {
+        "strength": "共感力、想像力、柔軟な思考",
+        "physical": "繊細な体質、敏感な感覚器官",
+        "caution": "境界の喪失、エネルギー枯渇",
+        "lifestyle": "エネルギー管理、境界設定、グラウンディング"
+    },
+    "温泉": {
+        "strength": "癒しの力、情熱的な共感、行動力",
+        "physical": "温かい体質、活発な循環",
+        "caution": "感情の起伏、エネルギーの消耗",
+        "lifestyle": "感情調整、定期的な休息、水分補給"
+    },
+    "粘土": {
+        "strength": "創造性、実用性、育成力",
+        "physical": "しっとりとした体質、ゆったりとした代謝",
+        "caution": "停滞、むくみ、消化不良",
+        "lifestyle": "定期的な運動、リンパマッサージ、軽い食事"
+    },
+    "霧雨": {
+        "strength": "繊細さ、直感力、芸術性",
+        "physical": "敏感な体質、変動しやすい体調",
+        "caution": "過敏性、不安、エネルギー不足",
+        "lifestyle": "規則正しい生活、栄養管理、創作活動"
+    },
+    "海": {
+        "strength": "深い感受性、包容力、直感",
+        "physical": "流動的な体質、リンパ系が活発",
+        "caution": "感情の波、水分代謝の問題",
+        "lifestyle": "感情日記、水中運動、月のリズムに合わせた生活"
+    }
+})
+
+# ARCHETYPE_FEATURES に定義がない原型の既定値
+DEFAULT_ARCHETYPE_FEATURES = _freeze({
+    "strength": "バランスの取れた資質、適応力",
+    "physical": "標準的な体質、安定した健康状態",
+    "caution": "ストレス管理、生活習慣の維持",
+    "lifestyle": "規則正しい生活、適度な運動、バランスの取れた食事"
+})
+
+# 体質原型ごとの人生のテーマ（要約レポート）
+ARCHETYPE_LIFE_THEMES = _freeze({
+    '火のカリスマ': '情熱的なリーダーシップと創造',
+    'マグマ': '爆発的な創造力の発揮',
+    '聖火': '理想の実現と持続的な情熱',
+    '野火': '直感と冒険による成長',
+    '竈の火': '実践的な創造と安定',
+    '鉱床': '知識の蓄積と分析',
+    '山': '不動の信頼性と保護',
+    '流砂': '柔軟な適応と受容',
+    '山火事': '情熱的なコミュニケーション',
+    '砂岩の彫刻家': '論理と創造の統合',
+    'サイクロン': '多様な視点と知的な探求',
+    '霧': '想像力と共感の深化',
+    '温泉': '癒しと情熱の融合',
+    '粘土': '創造と実践の統合',
+    '霧雨': '繊細な感受性と芸術',
+    '海': '深い感情と包容力'
+})
+
+# 体質原型ごとの特別な才能（要約レポート）
+ARCHETYPE_SPECIAL_TALENTS = _freeze({
+    '火のカリスマ': '強力な影響力とリーダーシップ',
+    'マグマ': '変革を起こす創造力',
+    '聖火': '持続的な情熱と献身',
+    '野火': '瞬発的な適応力',
+    '竈の火': '実践的な問題解決力',
+    '鉱床': '深い分析力と計画性',
+    '山': '揺るぎない信頼性',
+    '流砂': '無限の適応力',
+    '山火事': '熱意あるコミュニケーション',
+    '砂岩の彫刻家': '知的な創造性',
+    'サイクロン': '知的な革新性',
+    '霧': '深い共感力と想像力',
+    '温泉': '癒しの力と行動力',
+    '粘土': '形を与える創造力',
+    '霧雨': '繊細な芸術性',
+    '海': '無限の包容力'
+})
+
+
+# ---------------------------------------------------------------------------
+# 星座別の表現（要約レポート）
+# ---------------------------------------------------------------------------
+
+# 太陽星座の性質
+SUN_SIGN_QUALITIES = _freeze({
+    '牡羊座': '積極的で率直な', '牡牛座': '堅実で忍耐強い',
+    '双子座': '知的で社交的な', '蟹座': '感受性豊かで保護的な',
+    '獅子座': '創造的で自信のある', '乙女座': '分析的で実践的な',
+    '天秤座': '調和的でバランスの取れた', '蠍座': '深遠で変容力のある',
+    '射手座': '楽観的で冒険心のある', '山羊座': '責任感が強く野心的な',
+    '水瓶座': '革新的で独立心のある', '魚座': '直感的で共感性の高い'
+})
+
+# 月星座の性質・感情の処理
+MOON_SIGN_QUALITIES = _freeze({
+    '牡羊座': '即座の感情反応と独立心', '牡牛座': '安定した感情と持続性',
+    '双子座': '柔軟で適応力のある', '蟹座': '深い感情と養育的な本能',
+    '獅子座': '温かく寛大な感情表現', '乙女座': '慎重で分析的な感情処理',
+    '天秤座': '調和を求め客観的な視点を保持', '蠍座': '深い感情と強い直感',
+    '射手座': '楽観的で自由を求める感情', '山羊座': '抑制的で実践的な感情管理',
+    '水瓶座': '独立的で理性的な感情処理', '魚座': '共感的で境界の曖昧な感情'
+})
+
+# 太陽星座が示す資質
+SUN_SIGN_IDENTITIES = _freeze({
+    '牡羊座': '先駆者精神とリーダーシップに優れ', '牡牛座': '安定性と美的感覚に優れ',
+    '双子座': '知的でコミュニケーション能力に優れ', '蟹座': '育成力と感情的知性に優れ',
+    '獅子座': '創造性とカリスマ性に優れ', '乙女座': '実践力と分析力に優れ',
+    '天秤座': '協調性と美的センスに優れ', '蠍座': '洞察力と変容力に優れ',
+    '射手座': '探求心と楽観性に優れ', '山羊座': '組織力と達成力に優れ',
+    '水瓶座': '革新性と独創性に優れ', '魚座': '直感力と創造性に優れ'
+})
+
+
+# ---------------------------------------------------------------------------
+# 四元素別の表現と処方
+# ---------------------------------------------------------------------------
+
+# 最も多い元素が示す体質（要約レポート）
+ELEMENT_CONSTITUTION_MEANINGS = _freeze({
+    '火': '活動的でエネルギッシュな体質',
+    '地': '安定性と持続力のある体質',
+    '風': '柔軟性と適応力の高い体質',
+    '水': '感受性と直感力に優れた体質'
+})
+
+# 太陽・月の元素の意味（第1章）
+ELEMENT_ESSENCES = _freeze({
+    '火': '情熱と創造性、直感的な行動力、開拓精神',
+    '地': '現実性と安定感、着実な成長力、物質的豊かさ',
+    '風': '知性と社交性、柔軟な思考力、コミュニケーション能力',
+    '水': '感情と共感性、深い洞察力、癒しの力'
+})
+
+# 才能の表現スタイル（サビアンシンボルの才能解釈）
+ELEMENT_EXPRESSION_STYLES = _freeze({
+    '火': '直感的で創造的な',
+    '地': '実践的で具体的な',
+    '風': '知的で革新的な',
+    '水': '感受性豊かで洞察力のある'
+})
+
+# 対人関係でのアプローチ（サビアンシンボルの才能解釈）
+ELEMENT_INTERPERSONAL_APPROACHES = _freeze({
+    '火': '情熱的で励ましに満ちたアプローチ',
+    '地': '信頼と安定を提供する堅実なサポート',
+    '風': '知的な刺激と新鮮な視点の提供',
+    '水': '深い共感と感情的な理解'
+})
+
+# 医学的傾向（第2章）
+ELEMENT_MEDICAL_TENDENCIES = _freeze({
+    '火': '炎症や熱性の症状が出やすく、エネルギーの燃焼が激しい',
+    '地': '慢性的な症状や構造的な問題が生じやすく、回復に時間がかかる',
+    '風': '神経性の症状や循環の問題が生じやすく、変動が激しい',
+    '水': '浮腫や分泌物の異常が生じやすく、感情と連動しやすい'
+})
+
+# 重要なミネラル（第3章）
+ELEMENT_MINERALS = _freeze({
+    '火': 'マグネシウム、鉄分',
+    '地': 'カルシウム、亜鉛',
+    '風': 'カリウム、マンガン',
+    '水': 'ナトリウム、ヨウ素'
+})
+
+# 推奨食材（第4章）
+ELEMENT_RECOMMENDED_FOODS = _freeze({
+    '火': '赤い食材、スパイス、発酵食品',
+    '地': '根菜、全粒穀物、ナッツ類',
+    '風': '葉物野菜、軽い食材、フルーツ',
+    '水': '海産物、水分の多い野菜、スープ'
+})
+
+# メインクリスタル（第4章）
+ELEMENT_MAIN_CRYSTALS = _freeze({
+    '火': 'カーネリアン（活力と情熱）',
+    '地': 'スモーキークォーツ（グラウンディング）',
+    '風': 'シトリン（知性と創造性）',
+    '水': 'ムーンストーン（感情の調和）'
+})
+
+# 補完的エレメント（第5章）
+ELEMENT_COMPLEMENTS = _freeze({
+    '火': '風（刺激と拡大）、地（安定と具現化）',
+    '地': '水（感情の潤い）、火（活性化）',
+    '風': '火（情熱）、水（深み）',
+    '水': '地（構造）、風（流通）'
+})
+
+# 詳細な食物療法
+ELEMENT_FOOD_THERAPIES = _freeze({
+    '火': """
+• 推奨食材：きゅうり、すいか、トマト、緑豆、ミント、梨、豆腐
+• 調理法：生食、茸でる、蒸す（涸性・寒性の性質を活かす）
+• 具体的な献立例：
+  - 朝：グリーンスムージー、ヨーグルトとフルーツ
+  - 昼：冷やし中華、サラダボウル
+  - 夕：豆腐と夏野菜のさっぱり煮物
+• 注意点：辛いスパイス、揚げ物、アルコールは控えめに""",
+    '地': """
+• 推奨食材：生姜、ごぼう、人参、羊肉、シナモン、黒ゴマ
+• 調理法：煮る、炒める、シチュー、煮込み（温性・熱性を引き出す）
+• 具体的な献立例：
+  - 朝：生姜入りお粥、温かいスープ
+  - 昼：根菜の煮物、きんぴらごぼう
+  - 夕：鶏肉と根菜のポトフ
+• 注意点：冷たい飲食物、生もの、冷性食材は避ける""",
+    '風': """
+• 推奨食材：根菜類、全粒穀物、甘みのある食材（人参、りんご、米）
+• 調理法：煮る、蒸す、グラウンディング効果のある調理
+• 具体的な献立例：
+  - 朝：オートミール、玄米おにぎり
+  - 昼：根菜たっぷりの味噌汁定食
+  - 夕：かぼちゃのスープ、さつまいもご飯
+• 注意点：カフェイン過多、刺激物、軽すぎる食事は避ける""",
+    '水': """
+• 推奨食材：温性スパイス（生姜、シナモン）、小豆、はと麦、海藻
+• 調理法：炒める、スパイス使用、温かい調理
+• 具体的な献立例：
+  - 朝：スパイスティー、温かいスープ
+  - 昼：小豆ご飯、カレー
+  - 夕：生姜焖き、ハトムギ茶
+• 注意点：冷たい飲食物、乳製品過多、甘いもの過多は避ける"""
+})
+
+# 朝食のアドバイス
+ELEMENT_BREAKFAST_ADVICE = _freeze({
+    '火': "フルーツ、ヨーグルト、グリーンスムージーで体内の熱を冷ます",
+    '地': "温かいお粥やスープで消化器を温める",
+    '風': "玄米やオートミールでグラウンディング",
+    '水': "スパイスティーと温かい食事で代謝を促進"
+})
+
+# 昼食のアドバイス
+ELEMENT_LUNCH_ADVICE = _freeze({
+    '火': "サラダボウルや冷製パスタでクールダウン",
+    '地': "根菜の煮物やシチューでエネルギー補給",
+    '風': "バランスの取れた定食で安定感を",
+    '水': "スパイシーなカレーやエスニック料理"
+})
+
+# 夕食のアドバイス
+ELEMENT_DINNER_ADVICE = _freeze({
+    '火': "豆腐や白身魚のさっぱりした料理",
+    '地': "温かいポトフや鶏肉の煮込み",
+    '風': "消化に優しいスープや蒸し料理",
+    '水': "生姜を使った炒め物や焦き魚"
+})
+
+# 間食のアドバイス
+ELEMENT_SNACK_ADVICE = _freeze({
+    '火': "水分の多い果物（スイカ、梨）",
+    '地': "ナッツ類、ドライフルーツ",
+    '風': "甘い果物（りんご、バナナ）",
+    '水': "スパイス入りナッツ、ジンジャーティー"
+})
+
+# 避けるべき食材と食習慣
+ELEMENT_FOODS_TO_AVOID = _freeze({
+    '火': "辛いスパイス、アルコール、揚げ物、コーヒーの過剰摂取",
+    '地': "冷たい飲み物、アイスクリーム、生野菜の過剰摂取",
+    '風': "カフェイン過多、不規則な食事、ながら食い",
+    '水': "乳製品過多、砂糖の過剰摂取、冷たい飲食物"
+})
+
+# アロマ処方
+ELEMENT_AROMA_PRESCRIPTIONS = _freeze({
+    '火': """
+火のエネルギー調整ブレンド：
+• 鎮静：ラベンダー（3滴）、カモミール（2滴） - 過剰な熱を鎮める
+• 心の平和：サンダルウッド（2滴） - 内なる平和と瞑想
+• 愛の火：ローズ（1滴） - 怒りを愛に変容
+使用例：イライラした時にハンカチに垂らして深呼吸""",
+    '地': """
+地のエネルギー活性化ブレンド：
+• 軽やかさ：ペパーミント（2滴）、レモン（2滴） - 重さを解放
+• 浄化：ユーカリ（2滴） - 新鮮さと変化
+• 代謝促進：グレープフルーツ（1滴） - 軽やかな変化
+使用例：朝のディフューザーで活力を高める""",
+    '風': """
+風のエネルギー鎮静ブレンド：
+• グラウンディング：ベチバー（3滴）、シダーウッド（2滴） - 大地との繋がり
+• 神経鎮静：ラベンダー（2滴）、カモミール（1滴） - 穏やかさ
+• 感情との繋がり：イランイラン（1滴） - 感情調整
+使用例：足裏にベチバーを塗布して安定感を得る""",
+    '水': """
+水のエネルギー調整ブレンド：
+• デトックス：ジュニパー（2滴）、サイプレス（2滴） - 流れの促進
+• 軽やかさ：グレープフルーツ（2滴）、レモン（1滴） - 浄化
+• 明晰さ：ローズマリー（1滴） - 論理性と集中
+使用例：入浴時に加えてデトックスを促進"""
+})
+
+# 運動処方
+ELEMENT_EXERCISE_PRESCRIPTIONS = _freeze({
+    '火': "ヨガ、水泳、太極拳などのクールダウン系運動を週に3-4回",
+    '地': "ウォーキング、ジョギング、ダンスなどの活性化運動を毎日30分",
+    '風': "グラウンディングヨガ、武道、ウエイトトレーニングで安定感を",
+    '水': "エアロビクス、ダンス、サウナで代謝を活性化"
+})
+
+# 呼吸法
+ELEMENT_BREATHING_EXERCISES = _freeze({
+    '火': "4-7-8呼吸法（4秒吸って7秒止めて8秒吐く）でクールダウン",
+    '地': "腹式呼吸で深くゆっくりと、体を温める",
+    '風': "丁寧な鼻呼吸で5分間、心を落ち着かせる",
+    '水': "火の呼吸（カパラバティ）で代謝を促進"
+})
+
+# 入浴療法
+ELEMENT_BATHING_THERAPIES = _freeze({
+    '火': "ぬるめのお湯（38-39度）に15-20分、ラベンダーを加えて",
+    '地': "温かいお湯（40-41度）に岩塩を加えてデトックス",
+    '風': "半身浴でジャーマンカモミールを加えてリラックス",
+    '水': "熱めのお湯（41-42度）に生姜やシナモンを加えて温まる"
+})
+
+
+# ---------------------------------------------------------------------------
+# アスペクト
+# ---------------------------------------------------------------------------
+
+# アスペクトの種類（角度の順）→ 名前・角度・解釈（第2章。{a}・{b} は天体名、{a_domain}・{b_domain} は司る領域）
+ASPECTS = _freeze({
+    'conjunction': {
+        'name': '合（コンジャンクション）', 'angle': 0,
+        'meaning': '{a}の「{a_domain}」と{b}の「{b_domain}」が一体となって働きます。二つの力が強め合う集中点であり、才能の核になりやすい一方、その働きに偏りすぎないよう意識することが心身の健康を保つ鍵になります。'
+    },
+    'sextile': {
+        'name': 'セクスタイル', 'angle': 60,
+        'meaning': '{a}の「{a_domain}」と{b}の「{b_domain}」が穏やかに協力し合う関係です。意識して機会をつかむことで、二つの力を無理なく生かせる才能の芽となります。'
+    },
+    'square': {
+        'name': 'スクエア', 'angle': 90,
+        'meaning': '{a}の「{a_domain}」と{b}の「{b_domain}」が緊張関係にあります。内的な葛藤やストレスとして感じられやすい反面、乗り越えるたびに大きな成長と行動力をもたらす原動力になります。'
+    },
+    'trine': {
+        'name': 'トライン', 'angle': 120,
+        'meaning': '{a}の「{a_domain}」と{b}の「{b_domain}」が自然に調和しています。努力せずとも発揮できる生まれ持った才能であり、心身のバランスを保つ支えにもなります。'
+    },
+    'opposition': {
+        'name': 'オポジション', 'angle': 180,
+        'meaning': '{a}の「{a_domain}」と{b}の「{b_domain}」が向かい合い、引き合う関係です。どちらか一方に偏ると心身のバランスを崩しやすいため、両者の統合が人生のテーマになります。'
+    },
+})
+
+
+# ---------------------------------------------------------------------------
+# 相性（シナストリー）
+# ---------------------------------------------------------------------------
+
+# 四元素どうしの相性（0〜1、行・列は ELEMENTS の順）
+# 同じ元素が最も高く、火と風・地と水は補い合い、火と水は最も摩擦が大きい
+ELEMENT_COMPATIBILITY = (
+    (1.0, 0.4, 0.8, 0.2),
+    (0.4, 1.0, 0.3, 0.8),
+    (0.8, 0.3, 1.0, 0.4),
+    (0.2, 0.8, 0.4, 1.0),
+)
+
+# 2人の天体間のアスペクトの重み（0〜1、調和的なアスペクトほど高い）
+SYNASTRY_ASPECT_WEIGHTS = _freeze({
+    'conjunction': 0.8, 'sextile': 0.7, 'square': 0.3, 'trine': 1.0, 'opposition': 0.5
+})
+
+
+# ---------------------------------------------------------------------------
+# その他
+# ---------------------------------------------------------------------------
+
+# 四体液（気質 → 優勢な体液）
+HUMORS = _freeze({
+    '胆汁質': '黄胆汁（火のエネルギー）',
+    '憂鬱質': '黒胆汁（地のエネルギー）',
+    '多血質': '血液（風のエネルギー）',
+    '粘液質': '粘液（水のエネルギー）'
+})
+
+# 英語の占星術用語 → 日本語
+ASTROLOGY_TERM_TRANSLATIONS = _freeze({
+    # 星座名
+    'Aries': '牡羊座', 'Taurus': '牡牛座', 'Gemini': '双子座', 'Cancer': '蟹座',
+    'Leo': '獅子座', 'Virgo': '乙女座', 'Libra': '天秤座', 'Scorpio': '蠍座',
+    'Sagittarius': '射手座', 'Capricorn': '山羊座', 'Aquarius': '水瓶座', 'Pisces': '魚座',
+
+    # 四元素
+    'Fire': '火', 'Earth': '地', 'Air': '風', 'Water': '水',
+
+    # 天体名
+    'Sun': '太陽', 'Moon': '月', 'Mercury': '水星', 'Venus': '金星',
+    'Mars': '火星', 'Jupiter': '木星', 'Saturn': '土星'
+})
+
+
+# ---------------------------------------------------------------------------
+# 整合性の検証
+# ---------------------------------------------------------------------------
+
+# 四元素・12星座のすべてを網羅しているべき表
+ELEMENT_TABLES = (
+    'ELEMENT_CONSTITUTION_MEANINGS', 'ELEMENT_ESSENCES', 'ELEMENT_EXPRESSION_STYLES',
+    'ELEMENT_INTERPERSONAL_APPROACHES', 'ELEMENT_MEDICAL_TENDENCIES', 'ELEMENT_MINERALS',
+    'ELEMENT_RECOMMENDED_FOODS', 'ELEMENT_MAIN_CRYSTALS', 'ELEMENT_COMPLEMENTS', 'ELEMENT_FOOD_THERAPIES',
+    'ELEMENT_BREAKFAST_ADVICE', 'ELEMENT_LUNCH_ADVICE', 'ELEMENT_DINNER_ADVICE', 'ELEMENT_SNACK_ADVICE',
+    'ELEMENT_FOODS_TO_AVOID', 'ELEMENT_AROMA_PRESCRIPTIONS', 'ELEMENT_EXERCISE_PRESCRIPTIONS',
+    'ELEMENT_BREATHING_EXERCISES', 'ELEMENT_BATHING_THERAPIES',
+)
+SIGN_TABLES = ('SUN_SIGN_QUALITIES', 'MOON_SIGN_QUALITIES', 'SUN_SIGN_IDENTITIES')
+
+# 16原型の名前で引く表（定義のない原型は既定の文言になる）
+ARCHETYPE_TABLES = ('ARCHETYPE_FEATURES', 'ARCHETYPE_LIFE_THEMES', 'ARCHETYPE_SPECIAL_TALENTS')
+
+
+def validate():
+    """
+    表どうしの整合性を検証する
+    コードが前提とする構造の不整合は ValueError を送出し、
+    原型名で引く表の定義漏れ（既定の文言になるもの）は警告の一覧として返す
+    """
+    tables = globals()
+    errors = []
+
+    if len(ZODIAC_SIGNS) != 12 or len(SIGN_INDEX) != 12:
+        errors.append('ZODIAC_SIGNS は重複のない12星座である必要があります')
+    if len(SIGN_ELEMENTS) != len(ZODIAC_SIGNS) or len(SIGN_QUALITIES) != len(ZODIAC_SIGNS):
+        errors.append('SIGN_ELEMENTS / SIGN_QUALITIES の長さが星座数と一致しません')
+
+    if set(SIXTEEN_ARCHETYPES) != {(sun, moon) for sun in ELEMENTS for moon in ELEMENTS}:
+        errors.append('SIXTEEN_ARCHETYPES が四元素の16通りの組み合わせと一致しません')
+    for (sun, moon), archetype in SIXTEEN_ARCHETYPES.items():
+        missing = [field for field in ARCHETYPE_FIELDS if field not in archetype]
+        if missing:
+            errors.append(f'{archetype.get("name", (sun, moon))} に {", ".join(missing)} がありません')
+        elif archetype['element_combination'] != f'{sun}×{moon}':
+            errors.append(f'{archetype["name"]} の element_combination が {sun}×{moon} と一致しません')
+
+    for name in ELEMENT_TABLES:
+        if set(tables[name]) != set(ELEMENTS):
+            errors.append(f'{name} のキーが四元素と一致しません')
+    for name in SIGN_TABLES:
+        if set(tables[name]) != set(ZODIAC_SIGNS):
+            errors.append(f'{name} のキーが12星座と一致しません')
+    if set(PLANET_MEANINGS) != set(PLANET_NAMES_EN.values()) or set(PLANET_TALENT_DOMAINS) != set(PLANET_NAMES_EN):
+        errors.append('PLANET_MEANINGS / PLANET_TALENT_DOMAINS の天体が PLANET_NAMES_EN と一致しません')
+    for key, aspect in ASPECTS.items():
+        if not {'name', 'angle', 'meaning'} <= set(aspect) or not 0 <= aspect['angle'] <= 180:
+            errors.append(f'ASPECTS の {key} には name・meaning と 0〜180度の angle が必要です')
+    if set(SYNASTRY_ASPECT_WEIGHTS) != set(ASPECTS):
+        errors.append('SYNASTRY_ASPECT_WEIGHTS のキーが ASPECTS と一致しません')
+    size = len(ELEMENTS)
+    if (len(ELEMENT_COMPATIBILITY) != size or any(len(row) != size for row in ELEMENT_COMPATIBILITY)
+            or any(ELEMENT_COMPATIBILITY[i][j] != ELEMENT_COMPATIBILITY[j][i] for i in range(size) for j in range(size))):
+        errors.append('ELEMENT_COMPATIBILITY は四元素の数の対称な正方行列である必要があります')
+
+    if errors:
+        raise ValueError('知識ベースの不整合: ' + ' / '.join(errors))
+
+    warnings = []
+    archetype_names = {archetype['name'] for archetype in SIXTEEN_ARCHETYPES.values()}
+    for name in ARCHETYPE_TABLES:
+        undefined = sorted(archetype_names - set(tables[name]))
+        if undefined:
+            warnings.append(f'{name} に定義のない原型（既定の文言を使用）: {"、".join(undefined)}')
+    return warnings
+
+
+# インポート時に一度だけ検証する（構造の不整合はここで ValueError になる）
+# 定義漏れの警告は既知のため表示せず、python knowledge_base.py validate で確認する
+VALIDATION_WARNINGS = tuple(validate())
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'validate'
+    if command == 'validate':
+        for warning in VALIDATION_WARNINGS:
+            print(f"知識ベース: {warning}")
+        print(f"知識ベースの検証が完了しました（警告 {len(VALIDATION_WARNINGS)}件）")
+    else:
+        print("使い方: python knowledge_base.py [validate]")
+        sys.exit(1)
@@ -0,0 +1,112 @@
+"""
+Prometheus 形式のメトリクス（/metrics）
+
+ルートごとのリクエスト数・エラー数・処理時間のヒストグラム、詳細レポートの文字数、
+キャッシュのヒット・ミス、天体計算の回数を記録する。
+
+gunicorn で複数ワーカーを起動する場合は、環境変数 PROMETHEUS_MULTIPROC_DIR に共有ディレクトリを
+指定する（gunicorn.conf.py が既定で設定する）。各ワーカーはそのディレクトリのファイルに
+値を書き込み、/metrics は全ワーカー分を合算して返す。
+"""
+import os
+import threading
+import time
+
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUESTS = Counter(
+    'astro_http_requests', 'ルートごとのリクエスト数',
+    ['route', 'method', 'status']
+)
+REQUEST_ERRORS = Counter(
+    'astro_http_request_errors', 'ルートごとのエラー数（ステータス 500 以上。未処理の例外を含む）',
+    ['route', 'method']
+)
+REQUEST_LATENCY = Histogram(
+    'astro_http_request_duration_seconds',
+    'ルートごとの処理時間（ストリーミングでは最初の応答まで）',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REPORT_CHARACTERS = Histogram(
+    'astro_report_characters', '生成した詳細レポートの本文の文字数（total_characters）',
+    buckets=(8000, 10000, 12000, 14000, 16000, 18000, 20000, 25000, 30000)
+)
+CACHE_LOOKUPS = Counter(
+    'astro_cache_lookups', 'キャッシュの参照回数（result=hit/miss）',
+    ['cache', 'result']
+)
+CACHE_EVICTIONS = Counter(
+    'astro_cache_evictions', 'キャッシュから容量超過で削除した件数',
+    ['cache']
+)
+EPHEMERIS_CALCULATIONS = Counter(
+    'astro_ephemeris_calculations', '天体位置の計算回数（method=table: 天体暦テーブル、ephem: 直接計算）',
+    ['method']
+)
+EPHEMERIS_TABLE = EPHEMERIS_CALCULATIONS.labels(method='table')
+EPHEMERIS_DIRECT = EPHEMERIS_CALCULATIONS.labels(method='ephem')
+
+# キャッシュ名 → (LRUCache, 前回反映したヒット・ミス・削除の件数)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def register_cache(name, cache):
+    """LRUCache の統計をメトリクスに反映する対象として登録"""
+    with _caches_lock:
+        _caches[name] = (cache, (0, 0, 0))
+
+
+def sync_cache_metrics():
+    """登録したキャッシュの統計の増分をカウンターに加算"""
+    with _caches_lock:
+        for name, (cache, (hits, misses, evictions)) in _caches.items():
+            current = (cache.hits, cache.misses, cache.evictions)
+            if current[0] > hits:
+                CACHE_LOOKUPS.labels(cache=name, result='hit').inc(current[0] - hits)
+            if current[1] > misses:
+                CACHE_LOOKUPS.labels(cache=name, result='miss').inc(current[1] - misses)
+            if current[2] > evictions:
+                CACHE_EVICTIONS.labels(cache=name).inc(current[2] - evictions)
+            _caches[name] = (cache, current)
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def metrics_response():
+    """全ワーカー分（マルチプロセス時）のメトリクスを Prometheus のテキスト形式で返す"""
+    sync_cache_metrics()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
+def init_app(app):
+    """リクエストの計測と /metrics ルートを登録"""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        route = _route_label()
+        REQUEST_LATENCY.labels(route=route, method=request.method).observe(time.perf_counter() - start)
+        REQUESTS.labels(route=route, method=request.method, status=str(response.status_code)).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(route=route, method=request.method).inc()
+        sync_cache_metrics()
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_response)
@@ -0,0 +1,225 @@
+"""
+出生日の範囲ごとの16原型・四元素・クオリティの分布（母集団の統計）
+
+入力フォームの対象期間（1900〜2030年）の毎日を一定間隔の時刻で標本化し、1日ごとの
+16原型の人数・四元素とクオリティの天体数を数えて、先頭からの累積テーブルとして保存する。
+出生日の範囲の分布は累積テーブルの2行の差で求めるため、範囲の長さによらず天体計算を行わない。
+
+出生時刻は1日の中で一様と仮定する（SAMPLES_PER_DAY 回の標本の平均）。天体の位置は地球中心黄経で
+時刻は全国共通の JST のため、分布は出生地（都道府県）によらない。
+
+    python population_stats.py build     # 累積テーブルを生成して保存（天体暦テーブルがあれば数秒）
+    python population_stats.py verify    # 天体計算の結果から直接数えた分布と比較
+"""
+import hashlib
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import ephemeris_tables
+import knowledge_base
+
+# テーブルファイルの保存先（ephemeris_tables.npz と同じくアプリのディレクトリ直下）
+STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'population_stats.npz')
+
+# 集計する出生日の範囲（入力フォームの対象期間、JST）
+START_DATE = date(1900, 1, 1)
+END_DATE = date(2030, 12, 31)
+
+# 1日あたりの標本数（24 なら毎時30分の JST）
+SAMPLES_PER_DAY = 24
+
+# 生成時にまとめて天体計算する日数（メモリ使用量を抑える）
+BUILD_BLOCK_DAYS = 366
+
+PLANET_COUNT = len(ephemeris_tables.BODY_TABLE_SPECS)
+ELEMENT_COUNT = len(knowledge_base.ELEMENTS)
+QUALITY_COUNT = len(knowledge_base.QUALITIES)
+ARCHETYPE_COUNT = len(knowledge_base.ARCHETYPE_GRID)
+SIGN_ELEMENT_INDEX = np.array(knowledge_base.SIGN_ELEMENTS)
+SIGN_QUALITY_INDEX = np.array(knowledge_base.SIGN_QUALITIES)
+
+# 累積テーブルの列（16原型の人数 | 四元素の天体数 | クオリティの天体数）
+ARCHETYPE_COLUMNS = slice(0, ARCHETYPE_COUNT)
+ELEMENT_COLUMNS = slice(ARCHETYPE_COUNT, ARCHETYPE_COUNT + ELEMENT_COUNT)
+QUALITY_COLUMNS = slice(ARCHETYPE_COUNT + ELEMENT_COUNT, ARCHETYPE_COUNT + ELEMENT_COUNT + QUALITY_COUNT)
+COLUMN_COUNT = QUALITY_COLUMNS.stop
+
+# テーブルデータのグローバル変数と、読み込んだファイルの更新時刻（ファイルがない場合は 'missing'）
+POPULATION_STATS = None
+_LOADED_MTIME = None
+
+
+def sample_longitudes(first_day, day_count, samples_per_day=SAMPLES_PER_DAY):
+    """
+    first_day から day_count 日分の標本時刻（JST）の7天体の黄経（標本数, 天体数）
+    天体暦テーブルでまとめて補間し、範囲外（J2000 前後など）の時刻だけ ephem で直接計算する
+    """
+    step = np.timedelta64(86400 // samples_per_day, 's')
+    first = np.datetime64(first_day, 's') + step // 2
+    jst = first + step * np.arange(day_count * samples_per_day)
+    days = ephemeris_tables.datetimes_to_ephem_days(jst - np.timedelta64(9, 'h'))
+
+    interpolated = ephemeris_tables.interpolate_longitudes_array(days)
+    matrix = np.column_stack([interpolated[name] for name in ephemeris_tables.BODY_TABLE_SPECS])
+    direct_rows = np.flatnonzero(np.isnan(matrix).any(axis=1))
+    if len(direct_rows):
+        bodies = [body_cls() for body_cls, _, _ in ephemeris_tables.BODY_TABLE_SPECS.values()]
+        for row in direct_rows.tolist():
+            matrix[row] = [ephemeris_tables.ephem_longitude(body, days[row]) for body in bodies]
+    return matrix % 360.0
+
+
+def count_days(longitudes, samples_per_day=SAMPLES_PER_DAY):
+    """黄経の標本（日数 × 1日の標本数, 天体数）から1日ごとの集計（日数, COLUMN_COUNT）を求める"""
+    signs = (longitudes // 30).astype(int).reshape(-1, samples_per_day, PLANET_COUNT)
+    elements = SIGN_ELEMENT_INDEX[signs]
+    qualities = SIGN_QUALITY_INDEX[signs]
+    archetypes = elements[..., 0] * ELEMENT_COUNT + elements[..., 1]
+    return np.concatenate((
+        (archetypes[..., None] == np.arange(ARCHETYPE_COUNT)).sum(axis=1),
+        (elements[..., None] == np.arange(ELEMENT_COUNT)).sum(axis=(1, 2)),
+        (qualities[..., None] == np.arange(QUALITY_COUNT)).sum(axis=(1, 2)),
+    ), axis=1)
+
+
+def build_tables(path=STATS_PATH, samples_per_day=SAMPLES_PER_DAY):
+    """全期間の1日ごとの集計を累積テーブルにしてファイルに保存"""
+    total_days = (END_DATE - START_DATE).days + 1
+    daily = np.empty((total_days, COLUMN_COUNT), dtype=np.int64)
+    for offset in range(0, total_days, BUILD_BLOCK_DAYS):
+        day_count = min(BUILD_BLOCK_DAYS, total_days - offset)
+        longitudes = sample_longitudes(START_DATE + timedelta(days=offset), day_count, samples_per_day)
+        daily[offset:offset + day_count] = count_days(longitudes, samples_per_day)
+
+    # cumulative[i] は START_DATE から i 日分の合計（先頭は 0 行）
+    cumulative = np.zeros((total_days + 1, COLUMN_COUNT), dtype=np.int64)
+    np.cumsum(daily, axis=0, out=cumulative[1:])
+    np.savez_compressed(
+        path,
+        start_date=np.array(START_DATE.isoformat()),
+        samples_per_day=np.array(samples_per_day),
+        cumulative=cumulative
+    )
+    return path
+
+
+def load_stats(path=STATS_PATH):
+    """
+    累積テーブルを読み込む（存在しない・読み込めない場合は None）
+    ファイルの更新時刻を毎回確認し、起動後に作成・再生成されたテーブルは次の呼び出しで読み込み直す（再起動は不要）
+    checksum はテーブルの内容のハッシュ（応答の ETag に使う）
+    """
+    global POPULATION_STATS, _LOADED_MTIME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        if _LOADED_MTIME != 'missing':
+            print("母集団の統計テーブルが見つかりません（python population_stats.py build で作成してください）")
+        POPULATION_STATS, _LOADED_MTIME = None, 'missing'
+        return None
+    if mtime != _LOADED_MTIME:
+        _LOADED_MTIME = mtime
+        try:
+            with np.load(path) as data:
+                cumulative = data['cumulative']
+                POPULATION_STATS = {
+                    'start_date': date.fromisoformat(str(data['start_date'])),
+                    'samples_per_day': int(data['samples_per_day']),
+                    'cumulative': cumulative,
+                    'checksum': hashlib.sha256(cumulative.tobytes()).hexdigest()[:16]
+                }
+        except Exception as e:
+            print(f"母集団の統計テーブル読み込みエラー: {e}")
+            POPULATION_STATS = None
+    return POPULATION_STATS
+
+
+def date_range_totals(stats, start, end):
+    """出生日が start〜end（両端を含む）の集計を累積テーブルの2行の差で求める"""
+    first = (start - stats['start_date']).days
+    last = (end - stats['start_date']).days
+    days = len(stats['cumulative']) - 1
+    if end < start:
+        raise ValueError('end には start 以降の日付を指定してください')
+    if first < 0 or last >= days:
+        coverage_end = stats['start_date'] + timedelta(days=days - 1)
+        raise ValueError(f"集計の対象は {stats['start_date'].isoformat()}〜{coverage_end.isoformat()} です")
+    return stats['cumulative'][last + 1] - stats['cumulative'][first]
+
+
+def distribution(stats, start, end):
+    """
+    出生日が start〜end の母集団の16原型・四元素・クオリティの分布
+    四元素・クオリティの average は1人あたりの天体数（calculate_element_distribution / calculate_quality_distribution の平均）、
+    ratio は7天体全体に占める割合
+    """
+    totals = date_range_totals(stats, start, end).tolist()
+    days = (end - start).days + 1
+    samples = days * stats['samples_per_day']
+
+    def planet_shares(names, counts):
+        return {name: {'average': round(count / samples, 4), 'ratio': round(count / (samples * PLANET_COUNT), 6)}
+                for name, count in zip(names, counts)}
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': days,
+        'archetypes': [{
+            'name': archetype['name'],
+            'element_combination': archetype['element_combination'],
+            'ratio': round(count / samples, 6)
+        } for archetype, count in zip(knowledge_base.ARCHETYPE_GRID, totals[ARCHETYPE_COLUMNS])],
+        'elements': planet_shares(knowledge_base.ELEMENTS, totals[ELEMENT_COLUMNS]),
+        'qualities': planet_shares(knowledge_base.QUALITIES, totals[QUALITY_COLUMNS])
+    }
+
+
+def verify_tables(sample_days=100, seed=42):
+    """
+    ランダムな日について、app の天体計算の結果を calculate_element_distribution などで数えた集計と
+    累積テーブルの差を比較し、一致しない日数を返す
+    """
+    import app
+
+    stats = load_stats()
+    if not stats:
+        raise RuntimeError("母集団の統計テーブルが読み込めません。先に build を実行してください")
+
+    samples_per_day = stats['samples_per_day']
+    total_days = len(stats['cumulative']) - 1
+    rng = np.random.default_rng(seed)
+    mismatched = 0
+    for offset in rng.choice(total_days, size=min(sample_days, total_days), replace=False).tolist():
+        day = stats['start_date'] + timedelta(days=offset)
+        first = datetime(day.year, day.month, day.day) + timedelta(seconds=86400 // samples_per_day // 2)
+        records = [(first + timedelta(seconds=86400 // samples_per_day * i), '東京都') for i in range(samples_per_day)]
+        expected = np.zeros(COLUMN_COUNT, dtype=np.int64)
+        for result in app.calculate_celestial_positions_batch(records):
+            positions = result['celestial_positions']
+            archetype = knowledge_base.archetype_index(positions['太陽']['element'], positions['月']['element'])
+            expected[archetype] += 1
+            elements = app.calculate_element_distribution(positions)
+            qualities = app.calculate_quality_distribution({
+                name: {'quality': knowledge_base.sign_quality(position['zodiac'])} for name, position in positions.items()
+            })
+            expected[ELEMENT_COLUMNS] += [elements[name] for name in knowledge_base.ELEMENTS]
+            expected[QUALITY_COLUMNS] += [qualities[name] for name in knowledge_base.QUALITIES]
+        if not np.array_equal(expected, date_range_totals(stats, day, day)):
+            mismatched += 1
+            print(f"{day.isoformat()} の集計が一致しません")
+    return mismatched
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        print(f"母集団の統計テーブルを生成しました: {build_tables()}")
+    elif command == 'verify':
+        print(f"一致しない日数: {verify_tables()}")
+    else:
+        print("使い方: python population_stats.py [build|verify]")
+        sys.exit(1)
@@ -0,0 +1,150 @@
+"""
+詳細レポートのバックグラウンド生成キュー
+
+リクエストを処理するワーカーを生成処理で塞がないよう、レポート生成を上限付きのスレッドプールで実行する。
+ジョブごとに章単位の進捗を記録し、キューの長さと待ち時間の統計を返す。
+ジョブの状態はプロセス内に保持する（gunicorn の各ワーカーはそれぞれ自分のジョブだけを知っている）。
+"""
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ReportJob:
+    """1件のレポート生成ジョブの状態"""
+
+    def __init__(self, chapters):
+        self.id = secrets.token_urlsafe(16)
+        self.status = 'queued'
+        self.chapters = list(chapters)
+        self.completed_chapters = []
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def chapter_done(self, chapter):
+        """章の生成完了を記録"""
+        self.completed_chapters.append(chapter)
+
+    def to_dict(self):
+        """ステータス表示用の辞書（生成結果そのものは含めない）"""
+        waited_until = self.started_at or time.time()
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'chapters': self.chapters,
+            'completed_chapters': list(self.completed_chapters),
+            'progress': round(len(self.completed_chapters) / len(self.chapters), 4) if self.chapters else 0.0,
+            'wait_seconds': round(waited_until - self.enqueued_at, 3),
+            'run_seconds': round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+            'error': self.error
+        }
+
+
+class ReportJobQueue:
+    """
+    上限付きのレポート生成キュー（スレッドセーフ）
+    待ち状態のジョブが max_queued 件に達すると submit は None を返す
+    完了したジョブは result_ttl 秒のあいだ結果を保持する（max_finished 件を超えると完了の古いものから削除）
+    """
+
+    def __init__(self, workers, max_queued, result_ttl=3600, max_finished=256):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(0, int(max_queued))
+        self.result_ttl = result_ttl
+        self.max_finished = max(0, int(max_finished))
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_executor(self):
+        # gunicorn の --preload で fork される前にスレッドを作らないよう、最初の投入時に生成する
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-job')
+        return self._executor
+
+    def submit(self, chapters, task, *args):
+        """
+        ジョブを投入して ReportJob を返す（キューが満杯なら None）
+        task(job, *args) は章ごとに job.chapter_done を呼び、生成結果を返す
+        """
+        job = ReportJob(chapters)
+        with self._lock:
+            self._purge_finished()
+            if self.queued >= self.max_queued:
+                self.rejected += 1
+                return None
+            self._jobs[job.id] = job
+            self.queued += 1
+            executor = self._get_executor()
+        executor.submit(self._run, job, task, args)
+        return job
+
+    def _run(self, job, task, args):
+        with self._lock:
+            job.started_at = time.time()
+            job.status = 'running'
+            wait = job.started_at - job.enqueued_at
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            result = task(job, *args)
+        except Exception as e:
+            print(f"レポート生成ジョブのエラー: {e}")
+            with self._lock:
+                job.error = str(e)
+                job.status = 'failed'
+                job.finished_at = time.time()
+                self.running -= 1
+                self.failed += 1
+            return
+        with self._lock:
+            job.result = result
+            job.status = 'done'
+            job.finished_at = time.time()
+            self.running -= 1
+            self.completed += 1
+            self._purge_finished()
+
+    def _purge_finished(self):
+        """保持期間を過ぎた完了ジョブと、保持件数の上限を超えた古い完了ジョブを削除（ロック取得済みで呼ぶ）"""
+        cutoff = time.time() - self.result_ttl
+        finished = sorted((job for job in self._jobs.values() if job.finished_at is not None),
+                          key=lambda job: job.finished_at)
+        excess = len(finished) - self.max_finished
+        for index, job in enumerate(finished):
+            if index < excess or job.finished_at < cutoff:
+                del self._jobs[job.id]
+
+    def get(self, job_id):
+        """ジョブIDに対応する ReportJob を返す（見つからない場合は None）"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """キューの長さ・実行中の件数・待ち時間などの統計を返す"""
+        with self._lock:
+            started = self.completed + self.failed + self.running
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'average_wait_seconds': round(self.total_wait / started, 3) if started else 0.0,
+                'max_wait_seconds': round(self.max_wait, 3)
+            }
@@ -0,0 +1,106 @@
+"""
+生成済みレポートの永続ストア（SQLite）
+
+レポートの入力（名前・天体データ・アーキタイプ）から求めたハッシュをレポートIDとし、
+描画済みの HTML を gzip 圧縮して保存する。同じ入力のレポートは再生成せずに返す。
+保存量の合計が上限を超えると、最後に参照された時刻が古いものから削除する。
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# レポートの文面やテンプレートを変更したら上げる（古い保存済みレポートを使わないようにする）
+REPORT_FORMAT_VERSION = 2
+
+
+def report_id_for(secret, **inputs):
+    """
+    レポートの入力から決定的なレポートIDを求める
+    秘密鍵付きのハッシュにして、名前と出生データを知っていてもIDを推測できないようにする
+    """
+    canonical = json.dumps({'version': REPORT_FORMAT_VERSION, **inputs},
+                           sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hmac.new(secret.encode('utf-8'), canonical.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+
+class ReportStore:
+    """
+    SQLite ファイルのレポートストア
+    接続はスレッドごとに初回利用時に開く（gunicorn の fork 後は --preload で親プロセスの接続を引き継いでも各ワーカーで開き直す）
+    """
+
+    def __init__(self, path, max_bytes, compress_level=6):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS reports ('
+                'id TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS reports_accessed ON reports (accessed)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # fork 前に開いた接続は子プロセスで使わない
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_compressed(self, report_id):
+        """gzip 圧縮された HTML を返す（存在しない場合は None）"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT body FROM reports WHERE id = ?', (report_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE reports SET accessed = ? WHERE id = ?', (time.time(), report_id))
+        return bytes(row[0])
+
+    def get(self, report_id):
+        """HTML を文字列で返す（存在しない場合は None）"""
+        body = self.get_compressed(report_id)
+        return gzip.decompress(body).decode('utf-8') if body is not None else None
+
+    def put(self, report_id, html):
+        """HTML を圧縮して保存し、容量の上限を超えた分を削除"""
+        body = gzip.compress(html.encode('utf-8'), compresslevel=self.compress_level, mtime=0)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO reports (id, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (report_id, body, len(body), now, now)
+            )
+        self.evict()
+
+    def evict(self):
+        """保存量が上限を超えていれば、参照が古い順に削除して削除件数を返す"""
+        removed = 0
+        with self._connect() as conn:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM reports').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            for report_id, size in conn.execute(
+                    'SELECT id, size FROM reports ORDER BY accessed').fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute('DELETE FROM reports WHERE id = ?', (report_id,))
+                total -= size
+                removed += 1
+        return removed
+
+    def stats(self):
+        """保存件数と合計サイズを返す"""
+        count, total = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reports').fetchone()
+        return {'reports': count, 'bytes': total, 'max_bytes': self.max_bytes}
@@ -0,0 +1,161 @@
+"""
+サビアンシンボルのコンパイル済みバイナリストア
+
+sabian_symbols.json をオフセット表と UTF-8 文字列領域からなるバイナリファイルに変換し、
+実行時は mmap で開いて必要な文字列だけを都度デコードする。
+gunicorn の各ワーカーは同じファイルのページを共有し、起動時の JSON パースも発生しない。
+
+    python sabian_store.py build    # sabian_symbols.json からバイナリを生成
+
+ファイル形式（リトルエンディアン）:
+    ヘッダ      : マジック 'SABN'、バージョン、星座数、度数スロット数、文字列領域の開始位置
+    星座テーブル : 星座ごとに sign_id / sign_ja / theme_overview の（オフセット, 長さ）
+    度数テーブル : 黄経0-359度ごとに 星座番号（欠落は -1）、度数、title / keyword の（オフセット, 長さ）
+    文字列領域   : UTF-8 文字列を連結したもの
+"""
+import mmap
+import os
+import struct
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(BASE_DIR, 'sabian_symbols.json')
+STORE_PATH = os.path.join(BASE_DIR, 'sabian_symbols.bin')
+
+MAGIC = b'SABN'
+VERSION = 1
+SLOT_COUNT = 360
+
+HEADER = struct.Struct('<4sHHII')
+SIGN_ENTRY = struct.Struct('<6I')
+SLOT_ENTRY = struct.Struct('<hh4I')
+
+
+class SabianStore:
+    """
+    mmap したバイナリストアへの読み取り専用アクセス
+    store[黄経の絶対度数] で app.build_sabian_index と同じ形式の辞書（欠落は None）を返す
+    """
+
+    def __init__(self, path=STORE_PATH):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, sign_count, slot_count, blob_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or slot_count != SLOT_COUNT:
+            self._mm.close()
+            raise ValueError(f"サビアンシンボルのストア形式が不正です: {path}")
+        self._sign_count = sign_count
+        self._slots_offset = HEADER.size + sign_count * SIGN_ENTRY.size
+        self._blob_offset = blob_offset
+
+    def _string(self, offset, length):
+        start = self._blob_offset + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def _sign(self, sign_number):
+        return SIGN_ENTRY.unpack_from(self._mm, HEADER.size + sign_number * SIGN_ENTRY.size)
+
+    def __len__(self):
+        return SLOT_COUNT
+
+    def __getitem__(self, slot):
+        if not 0 <= slot < SLOT_COUNT:
+            raise IndexError(slot)
+        sign_number, degree, title_off, title_len, keyword_off, keyword_len = \
+            SLOT_ENTRY.unpack_from(self._mm, self._slots_offset + slot * SLOT_ENTRY.size)
+        if sign_number < 0:
+            return None
+        _, _, sign_ja_off, sign_ja_len, _, _ = self._sign(sign_number)
+        return {
+            'sign': self._string(sign_ja_off, sign_ja_len),
+            'degree': degree,
+            'title': self._string(title_off, title_len),
+            'keyword': self._string(keyword_off, keyword_len)
+        }
+
+    def theme_overview(self, sign_ja):
+        """星座名（日本語）に対応するテーマ概要を返す（見つからない場合は None）"""
+        for sign_number in range(self._sign_count):
+            _, _, sign_ja_off, sign_ja_len, theme_off, theme_len = self._sign(sign_number)
+            if self._string(sign_ja_off, sign_ja_len) == sign_ja:
+                return self._string(theme_off, theme_len) if theme_len else None
+        return None
+
+
+def compile_store(symbols, index, path=STORE_PATH):
+    """
+    サビアンシンボル（JSON の内容）と360度インデックスからバイナリストアを書き出す
+    index は app.build_sabian_index で検証済みのものを渡す
+    """
+    blob = bytearray()
+    string_refs = {}
+
+    def add_string(text):
+        if text not in string_refs:
+            data = (text or '').encode('utf-8')
+            string_refs[text] = (len(blob), len(data))
+            blob.extend(data)
+        return string_refs[text]
+
+    sign_entries = bytearray()
+    sign_numbers = {}
+    for sign_number, sign_data in enumerate(symbols):
+        sign_numbers[sign_data['sign_ja']] = sign_number
+        sign_entries.extend(SIGN_ENTRY.pack(
+            *add_string(sign_data['sign_id']),
+            *add_string(sign_data['sign_ja']),
+            *add_string(sign_data.get('theme_overview', ''))
+        ))
+
+    slot_entries = bytearray()
+    for entry in index:
+        if entry is None:
+            slot_entries.extend(SLOT_ENTRY.pack(-1, 0, 0, 0, 0, 0))
+        else:
+            slot_entries.extend(SLOT_ENTRY.pack(
+                sign_numbers[entry['sign']], entry['degree'],
+                *add_string(entry['title']),
+                *add_string(entry['keyword'])
+            ))
+
+    blob_offset = HEADER.size + len(sign_entries) + len(slot_entries)
+    header = HEADER.pack(MAGIC, VERSION, len(symbols), SLOT_COUNT, blob_offset)
+
+    # 書き込み途中のファイルを他のワーカーが開かないよう、一時ファイルから置き換える
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header + sign_entries + slot_entries + blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_store(path=STORE_PATH, json_path=JSON_PATH):
+    """
+    バイナリストアを開く
+    ファイルがない、形式が不正、または JSON の方が新しい場合は None を返す（JSON から読み込む）
+    """
+    try:
+        if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(path):
+            print("サビアンシンボルのストアが JSON より古いため使用しません（再ビルドしてください）")
+            return None
+        return SabianStore(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"サビアンシンボルのストア読み込みエラー: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        import json
+        from app import build_sabian_index
+
+        with open(JSON_PATH, 'r', encoding='utf-8') as f:
+            symbols = json.load(f)
+        path = compile_store(symbols, build_sabian_index(symbols))
+        print(f"サビアンシンボルのストアを生成しました: {path} ({os.path.getsize(path):,} bytes)")
+    else:
+        print("使い方: python sabian_store.py build")
+        sys.exit(1)
@@ -0,0 +1,199 @@
+"""
+サーバー側セッションストア
+
+セッションの中身（天体データなど）をサーバー側に保存し、Cookie には推測できないセッションIDだけを載せる。
+Flask の SessionInterface として app.session_interface に設定して使う。
+
+    MemorySessionStore  : プロセス内メモリ（既定。gunicorn のワーカーが1つの場合向け）
+    SQLiteSessionStore  : SQLite ファイル（複数ワーカー・再起動後も共有）
+
+どちらのストアも有効期限（TTL）を過ぎたセッションを読み込み時に無視し、
+一定間隔ごとにまとめて削除する。
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+# 期限切れセッションをまとめて削除する間隔（秒）
+CLEANUP_INTERVAL = 300
+
+
+class MemorySessionStore:
+    """プロセス内メモリのセッションストア（スレッドセーフ）"""
+
+    def __init__(self, ttl, cleanup_interval=CLEANUP_INTERVAL):
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._items = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = time.time()
+
+    def load(self, sid):
+        """セッションIDに対応するデータを返す（存在しないか期限切れなら None）"""
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None:
+                return None
+            expires, data = item
+            if expires <= time.time():
+                del self._items[sid]
+                return None
+            return dict(data)
+
+    def save(self, sid, data):
+        """データを保存し、有効期限を更新"""
+        now = time.time()
+        with self._lock:
+            self._items[sid] = (now + self.ttl, dict(data))
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self.cleanup()
+
+    def delete(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def cleanup(self):
+        """期限切れのセッションを削除し、削除件数を返す"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (expires, _) in self._items.items() if expires <= now]
+            for sid in expired:
+                del self._items[sid]
+            self._last_cleanup = now
+        return len(expired)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteSessionStore:
+    """
+    SQLite ファイルのセッションストア
+    接続はスレッドごとに初回利用時に開く（gunicorn の fork 後は --preload で親プロセスの接続を引き継いでも各ワーカーで開き直す）
+    """
+
+    def __init__(self, path, ttl, cleanup_interval=CLEANUP_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self.serializer = TaggedJSONSerializer()
+        self._local = threading.local()
+        self._last_cleanup = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # fork 前に開いた接続は子プロセスで使わない
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            # 読み込みと書き込みが互いを待たないよう WAL モードにする
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, sid):
+        """セッションIDに対応するデータを返す（存在しないか期限切れなら None）"""
+        row = self._connect().execute(
+            'SELECT data FROM sessions WHERE sid = ? AND expires > ?', (sid, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.serializer.loads(row[0])
+        except Exception as e:
+            print(f"セッションデータの読み込みエラー: {e}")
+            return None
+
+    def save(self, sid, data):
+        """データを保存し、有効期限を更新"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)',
+                (sid, self.serializer.dumps(dict(data)), now + self.ttl)
+            )
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self.cleanup()
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def cleanup(self):
+        """期限切れのセッションを削除し、削除件数を返す"""
+        now = time.time()
+        self._last_cleanup = now
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM sessions WHERE expires <= ?', (now,)).rowcount
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+
+class ServerSideSession(SecureCookieSession):
+    """セッションIDを持つセッション（変更・アクセスの追跡は SecureCookieSession と同じ）"""
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = sid is None
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Cookie にはセッションIDだけを保存し、データは store に保存する SessionInterface"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # 空になったセッションはストアと Cookie の両方から削除
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(
+                    name, domain=domain, path=path,
+                    secure=secure, samesite=samesite, httponly=httponly
+                )
+            return
+
+        # 変更がなければストアへの書き込みも Cookie の再送もしない
+        if not session.modified:
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        self.store.save(session.sid, session)
+        response.set_cookie(
+            name, session.sid, expires=self.get_expiration_time(app, session),
+            httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite
+        )
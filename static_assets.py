@@ -0,0 +1,204 @@
+"""
+CSS・JavaScript の結合・圧縮と、内容のハッシュを含むファイル名での配信
+
+テンプレートごとに読み込んでいた複数のスタイルシートを1つのバンドルにまとめて最小化し、
+内容のハッシュを含むファイル名（report.3f2a9c1e.css など）で static/dist/ に書き出す。
+gzip と brotli で圧縮したファイルも同時に作り、/assets/ から受け付ける形式に合わせて返す。
+ファイル名は内容が変わると変わるため、1年間の immutable キャッシュを指定できる。
+
+    python static_assets.py build
+
+テンプレートでは asset_urls('report.css') でバンドルの URL の一覧を取得する。
+ビルドしていない場合や元のファイルの方が新しい場合は、元のファイルの URL をそのまま返す。
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from flask import abort, request, send_from_directory, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# バンドル名 → 結合する static/ 以下のファイル（テンプレートの <link> の順）
+BUNDLES = {
+    'base.css': ['css/style_unified.css'],
+    'report.css': ['css/style_unified.css', 'css/detailed_report_unified.css'],
+    'summary.css': ['css/style_unified.css', 'css/result_unified.css'],
+    'result.css': ['css/style.css', 'css/result.css'],
+    'main.js': ['js/main.js'],
+}
+
+# ハッシュ付きファイルのキャッシュ期間（秒）
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# 圧縮形式 → 圧縮したファイルの拡張子（優先する順）
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+# 文字列リテラルとコメント（最小化では文字列の中を変更しない）
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+
+def minify_css(source):
+    """コメントと不要な空白を取り除く（文字列の中とセレクタの空白の意味は変えない）"""
+    parts = []
+    for segment, string in _split_css_strings(source):
+        if string:
+            parts.append(segment)
+            continue
+        segment = re.sub(r'\s+', ' ', segment)
+        segment = re.sub(r'\s*([{};,])\s*', r'\1', segment)
+        segment = re.sub(r':\s+', ':', segment)
+        parts.append(segment)
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def _split_css_strings(source):
+    """CSS を (部分, 文字列リテラルかどうか) に分け、コメントは空白に置き換える"""
+    text = []
+    position = 0
+    for match in _CSS_TOKENS.finditer(source):
+        text.append(source[position:match.start()])
+        position = match.end()
+        if match.group(1):
+            yield ''.join(text), False
+            yield match.group(1), True
+            text = []
+        else:
+            text.append(' ')
+    text.append(source[position:])
+    yield ''.join(text), False
+
+
+def minify_js(source):
+    """
+    行頭の空白・空行・行全体のコメントを取り除く（改行は残し、自動セミコロン挿入の解釈を変えない）
+    複数行のテンプレートリテラルの中の行はそのまま残す
+    """
+    lines = []
+    in_template = False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        # エスケープされていないバッククォートが奇数個ならテンプレートリテラルの内外が切り替わる
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+def build_bundle(name, sources, static_dir=STATIC_DIR):
+    """バンドルの元のファイルを結合して最小化した内容を返す"""
+    texts = []
+    for source in sources:
+        with open(os.path.join(static_dir, source), 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(text) for text in texts)
+    return ''.join(minify_js(text) for text in texts)
+
+
+def build(bundles=BUNDLES, dist_dir=DIST_DIR):
+    """全バンドルをハッシュ付きのファイル名で書き出し、gzip・brotli 版とマニフェストを作る"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli が見つかりません（gzip 版だけを作成します）")
+
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for name, sources in bundles.items():
+        content = build_bundle(name, sources).encode('utf-8')
+        stem, ext = os.path.splitext(name)
+        filename = f'{stem}.{hashlib.sha256(content).hexdigest()[:8]}{ext}'
+        path = os.path.join(dist_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(content)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+        manifest[name] = filename
+
+    # 以前のビルドのファイルは削除しない（保存済みのレポートやキャッシュ済みの HTML が参照しているため）
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(path=MANIFEST_PATH, bundles=BUNDLES, static_dir=STATIC_DIR):
+    """
+    マニフェストを読み込む
+    ファイルがない場合や元のファイルの方が新しい場合は空の辞書を返す（元のファイルを配信する）
+    """
+    try:
+        built = os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"静的ファイルのマニフェスト読み込みエラー: {e}")
+        return {}
+    sources = {source for files in bundles.values() for source in files}
+    if any(os.path.getmtime(os.path.join(static_dir, source)) > built for source in sources):
+        print("静的ファイルのバンドルが元のファイルより古いため使用しません（再ビルドしてください）")
+        return {}
+    return manifest
+
+
+def send_asset(filename, dist_dir=DIST_DIR):
+    """ハッシュ付きファイルを返す（クライアントが受け付ければ圧縮済みのファイルを返す）"""
+    mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+    if mimetype is None or not os.path.isfile(os.path.join(dist_dir, filename)):
+        abort(404)
+    encoding = None
+    for candidate, ext in PRECOMPRESSED:
+        if request.accept_encodings[candidate] and os.path.isfile(os.path.join(dist_dir, filename + ext)):
+            encoding = candidate
+            filename += ext
+            break
+    response = send_from_directory(dist_dir, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    response.cache_control.public = True
+    return response
+
+
+def init_app(app, bundles=BUNDLES):
+    """/assets/ のルートとテンプレート用の asset_urls を登録"""
+    manifest = load_manifest(bundles=bundles)
+
+    def asset_urls(name):
+        """バンドルの URL の一覧（ビルド済みならハッシュ付きファイル1つ、なければ元のファイル）"""
+        if name in manifest:
+            return [url_for('asset', filename=manifest[name])]
+        return [url_for('static', filename=source) for source in bundles[name]]
+
+    app.add_url_rule('/assets/<path:filename>', 'asset', send_asset)
+    app.jinja_env.globals['asset_urls'] = asset_urls
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        for name, filename in build().items():
+            sizes = [os.path.getsize(os.path.join(DIST_DIR, filename + ext))
+                     for ext in ('', '.gz', '.br') if os.path.exists(os.path.join(DIST_DIR, filename + ext))]
+            print(f"{name:12s} → {filename}（{' / '.join(f'{size:,}' for size in sizes)} bytes）")
+    else:
+        print("使い方: python static_assets.py build")
+        sys.exit(1)
@@ -0,0 +1,268 @@
+"""
+相性（シナストリー）の検索
+
+多数の出生図（社員名簿など）を索引に登録しておき、1つの出生図と相性の良い上位 k 件を返す。
+相性の点数は、16原型の組み合わせ・四元素のバランス・2人の天体間のアスペクトの加重和（0〜1）。
+
+索引は出生図を16原型ごとのバケットに分け、バケットごとに天体別の黄経を並べ替えた配列を持つ。
+- 原型の組み合わせの点数はバケット単位で決まるため、点数の上限の高いバケットから調べ、
+  上限が現在の k 件目の点数に届かないバケットは調べずに終える
+- 2人の天体間のアスペクトは、検索する出生図の各天体から「アスペクトの角度 ± オーブ」の範囲を
+  並べ替えた黄経の配列で二分探索し、範囲に入る出生図だけに加点する（全員との全天体ペアの比較はしない）
+
+索引は出生データの一覧からファイルに書き出し、アプリは起動後に読み込んで使う:
+    python synastry.py build members.csv     # 列は bulk_reports.py と同じ（id 列があれば ID に使う）
+
+    index = synastry.load_index()
+    matches = index.top_matches(result['celestial_positions'], k=10)   # calculate_celestial_positions の結果
+"""
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+import aspects
+import knowledge_base
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'synastry_index.npz')
+
+# 天体の日本語名（calculate_celestial_positions のキー）。黄経の配列の列はこの順
+PLANETS = tuple(knowledge_base.PLANET_NAMES_EN)
+PLANET_COUNT = len(PLANETS)
+ELEMENT_COUNT = len(knowledge_base.ELEMENTS)
+ARCHETYPE_COUNT = ELEMENT_COUNT * ELEMENT_COUNT
+
+# 相性の点数の内訳の重み（合計 1）
+SCORE_WEIGHTS = {'archetype': 0.4, 'element': 0.3, 'aspect': 0.3}
+
+SIGN_ELEMENT_INDEX = np.array(knowledge_base.SIGN_ELEMENTS)
+ELEMENT_COMPATIBILITY = np.array(knowledge_base.ELEMENT_COMPATIBILITY)
+
+
+def archetype_pairing_matrix(compatibility=ELEMENT_COMPATIBILITY):
+    """
+    16原型どうしの相性（16 × 16、インデックスは knowledge_base.archetype_index）
+    互いの太陽と月、太陽どうしの四元素の相性の平均
+    """
+    sun, moon = np.divmod(np.arange(ARCHETYPE_COUNT), ELEMENT_COUNT)
+    return (compatibility[sun[:, None], moon[None, :]]
+            + compatibility[moon[:, None], sun[None, :]]
+            + compatibility[sun[:, None], sun[None, :]]) / 3
+
+
+ARCHETYPE_PAIRING = archetype_pairing_matrix()
+
+
+def aspect_windows(orbs=None):
+    """
+    2人の天体間のアスペクトを探す範囲（相手の黄経 - 自分の黄経 の中心角度, オーブ, 重み）の配列
+    0度と180度以外のアスペクトは両方向（+角度と -角度）の範囲を持つ
+    """
+    limits = aspects.orb_limits(orbs)
+    centers, widths, weights = [], [], []
+    for key, angle, orb in zip(aspects.ASPECT_KEYS, aspects.ASPECT_ANGLES, limits):
+        for center in sorted({angle % 360.0, -angle % 360.0}):
+            centers.append(center)
+            widths.append(orb)
+            weights.append(knowledge_base.SYNASTRY_ASPECT_WEIGHTS[key])
+    return np.array(centers), np.array(widths), np.array(weights)
+
+
+def chart_longitudes(celestial_positions):
+    """calculate_celestial_positions の天体データから7天体の黄経の配列を作る"""
+    return np.array([celestial_positions[planet]['longitude_deg'] for planet in PLANETS], dtype=float)
+
+
+class _Bucket:
+    """1つの原型に属する出生図（索引の行番号、四元素の数、天体別に並べ替えた黄経とその並び順）"""
+
+    def __init__(self, rows, longitudes, element_counts):
+        self.rows = rows
+        self.element_counts = element_counts
+        self.order = np.argsort(longitudes, axis=0, kind='stable').T
+        self.sorted_longitudes = np.take_along_axis(longitudes, self.order.T, axis=0).T
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class ChartIndex:
+    """
+    相性検索の索引（読み取り専用。作成後に出生図を追加する場合は作り直す）
+    ids: 出生図の ID の一覧、longitudes: (出生図の数, 7) の黄経の配列（列は PLANETS の順）
+    """
+
+    def __init__(self, ids, longitudes, orbs=None):
+        self.ids = [str(chart_id) for chart_id in ids]
+        self.longitudes = np.asarray(longitudes, dtype=float).reshape(-1, PLANET_COUNT) % 360.0
+        if len(self.ids) != len(self.longitudes):
+            raise ValueError('ids と longitudes の件数が一致しません')
+        # ID が重複すると exclude でどの出生図を除くか決まらず、検索結果でも区別できない
+        if len(set(self.ids)) != len(self.ids):
+            duplicates = sorted(chart_id for chart_id, count in Counter(self.ids).items() if count > 1)
+            raise ValueError(f"ID が重複しています: {', '.join(duplicates[:10])}")
+        self._rows_by_id = {chart_id: row for row, chart_id in enumerate(self.ids)}
+        self._windows = aspect_windows(orbs)
+
+        element_indices = SIGN_ELEMENT_INDEX[(self.longitudes // 30).astype(int)]
+        self.element_counts = (element_indices[..., None] == np.arange(ELEMENT_COUNT)).sum(axis=1)
+        self.archetypes = element_indices[:, 0] * ELEMENT_COUNT + element_indices[:, 1]
+        self.buckets = []
+        for archetype in range(ARCHETYPE_COUNT):
+            rows = np.flatnonzero(self.archetypes == archetype)
+            self.buckets.append(_Bucket(rows, self.longitudes[rows], self.element_counts[rows]))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_charts(cls, charts, orbs=None):
+        """(ID, calculate_celestial_positions の天体データ) の一覧から索引を作る"""
+        ids, rows = [], []
+        for chart_id, celestial_positions in charts:
+            ids.append(chart_id)
+            rows.append(chart_longitudes(celestial_positions))
+        return cls(ids, np.array(rows).reshape(-1, PLANET_COUNT), orbs)
+
+    def save(self, path=INDEX_PATH):
+        """ID と黄経をファイルに保存（バケットと並べ替えは読み込み時に作り直す）"""
+        np.savez_compressed(path, ids=np.array(self.ids, dtype=str), longitudes=self.longitudes)
+        return path
+
+    def _aspect_scores(self, bucket, query):
+        """
+        バケット内の各出生図と検索する出生図の天体間アスペクトの点数（0〜1）
+        天体の組み合わせ（7 × 7）ごとに最も重みの大きいアスペクトを採り、その平均を返す
+        """
+        centers, widths, weights = self._windows
+        size = len(bucket)
+        lows = (query[:, None] + centers - widths) % 360.0
+        highs = (query[:, None] + centers + widths) % 360.0
+        # 天体別の並べ替えた黄経で、検索する天体 × 範囲 ごとの [開始, 終了) を求める（planet, query_planet, window）
+        starts = np.stack([np.searchsorted(bucket.sorted_longitudes[planet], lows, side='left')
+                           for planet in range(PLANET_COUNT)])
+        ends = np.stack([np.searchsorted(bucket.sorted_longitudes[planet], highs, side='right')
+                         for planet in range(PLANET_COUNT)])
+        # 0度をまたぐ範囲は [開始, 末尾) と [先頭, 終了) の2つに分ける
+        wraps = np.broadcast_to(lows > highs, starts.shape)
+        range_starts = np.concatenate((starts.ravel(), np.zeros(wraps.sum(), dtype=starts.dtype)))
+        range_ends = np.concatenate((np.where(wraps, size, ends).ravel(), ends[wraps]))
+        planet_ids, query_planet_ids, window_ids = np.indices(starts.shape)
+        keys = [np.concatenate((ids.ravel(), ids[wraps])) for ids in (planet_ids, query_planet_ids, window_ids)]
+
+        # 範囲に入る出生図を平らに並べ、天体の組み合わせごとに最も重いアスペクトを残す
+        lengths = np.maximum(range_ends - range_starts, 0)
+        offsets = np.repeat(range_starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        planets, query_planets, windows = (np.repeat(ids, lengths) for ids in keys)
+        cells = (query_planets * PLANET_COUNT + planets) * size + bucket.order[planets, offsets]
+        matched_weights = weights[windows]
+        pair_weights = np.zeros(PLANET_COUNT * PLANET_COUNT * size)
+        # 重みの軽い順に書き込み、オーブが重なった組み合わせは重い方で上書きする（ufunc.at より速い）
+        for weight in np.unique(weights):
+            pair_weights[cells[matched_weights == weight]] = weight
+        return pair_weights.reshape(PLANET_COUNT * PLANET_COUNT, size).sum(axis=0) / (PLANET_COUNT * PLANET_COUNT)
+
+    def top_matches(self, celestial_positions, k=10, exclude=None):
+        """
+        相性の点数の高い順に k 件の出生図を返す（exclude に ID を指定するとその出生図を除く）
+        点数の上限（原型の組み合わせ + 四元素とアスペクトの満点）が k 件目に届かないバケットは調べない
+        """
+        query = chart_longitudes(celestial_positions) % 360.0
+        query_elements = SIGN_ELEMENT_INDEX[(query // 30).astype(int)]
+        query_counts = np.bincount(query_elements, minlength=ELEMENT_COUNT)
+        pairing = ARCHETYPE_PAIRING[query_elements[0] * ELEMENT_COUNT + query_elements[1]]
+        upper_bounds = SCORE_WEIGHTS['archetype'] * pairing + SCORE_WEIGHTS['element'] + SCORE_WEIGHTS['aspect']
+        excluded_row = self._rows_by_id.get(exclude) if exclude is not None else None
+
+        # 上位 k 件の (点数, 行番号, 原型・四元素・アスペクトの点数)
+        best = np.empty((0, 5))
+        for archetype in np.argsort(-upper_bounds, kind='stable').tolist():
+            bucket = self.buckets[archetype]
+            if len(best) >= k and upper_bounds[archetype] <= best[-1, 0]:
+                break
+            if not len(bucket):
+                continue
+            element_scores = 1.0 - np.abs(bucket.element_counts - query_counts).sum(axis=1) / (2 * PLANET_COUNT)
+            aspect_scores = self._aspect_scores(bucket, query)
+            scores = (SCORE_WEIGHTS['archetype'] * pairing[archetype]
+                      + SCORE_WEIGHTS['element'] * element_scores
+                      + SCORE_WEIGHTS['aspect'] * aspect_scores)
+            # 足し算の順序による誤差で同点の順位が入れ替わらないよう丸めておく
+            scores = np.round(scores, 12)
+            candidates = np.column_stack((scores, bucket.rows, np.full(len(bucket), pairing[archetype]),
+                                          element_scores, aspect_scores))
+            if excluded_row is not None:
+                candidates = candidates[bucket.rows != excluded_row]
+            merged = np.concatenate((best, candidates))
+            # 点数の高い順（同点は索引の登録順）に k 件を残す
+            best = merged[np.lexsort((merged[:, 1], -merged[:, 0]))[:k]]
+
+        return [{
+            'id': self.ids[int(row)],
+            'score': round(float(score), 4),
+            'archetype': knowledge_base.ARCHETYPE_GRID[int(self.archetypes[int(row)])]['name'],
+            'archetype_score': round(float(archetype_score), 4),
+            'element_score': round(float(element_score), 4),
+            'aspect_score': round(float(aspect_score), 4)
+        } for score, row, archetype_score, element_score, aspect_score in best.tolist()]
+
+
+def load_index(path=INDEX_PATH):
+    """索引のファイルを読み込む（存在しない場合は None）"""
+    try:
+        with np.load(path) as data:
+            return ChartIndex(data['ids'].tolist(), data['longitudes'])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"相性検索の索引の読み込みエラー: {e}")
+        return None
+
+
+def build_index(input_path, output_path=INDEX_PATH):
+    """出生データの CSV / JSONL から天体計算をまとめて行い、索引をファイルに書き出す"""
+    import app
+    from bulk_reports import parse_birth, read_records
+
+    input_format = 'csv' if input_path.lower().endswith('.csv') else 'jsonl'
+    ids, records = [], []
+    seen_ids = set()
+    for line_number, record in read_records(input_path, input_format):
+        # 名前は重複しやすいため ID には使わず、id 列がなければ行番号にする
+        chart_id = str(record.get('id') or line_number)
+        if chart_id in seen_ids:
+            print(f"{line_number}行目を読み飛ばします: ID {chart_id} が重複しています")
+            continue
+        try:
+            birth = datetime(*parse_birth(record))
+            records.append((birth, record['prefecture']))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"{line_number}行目を読み飛ばします: {e}")
+            continue
+        seen_ids.add(chart_id)
+        ids.append(chart_id)
+
+    charts = []
+    for start in range(0, len(records), app.MAX_BATCH_RECORDS):
+        batch = app.calculate_celestial_positions_batch(records[start:start + app.MAX_BATCH_RECORDS])
+        for chart_id, result in zip(ids[start:start + app.MAX_BATCH_RECORDS], batch):
+            if result['success']:
+                charts.append((chart_id, result['celestial_positions']))
+            else:
+                print(f"{chart_id} を読み飛ばします: {result['error']}")
+    index = ChartIndex.from_charts(charts)
+    index.save(output_path)
+    return index
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'build' and len(sys.argv) > 2:
+        output = sys.argv[3] if len(sys.argv) > 3 else INDEX_PATH
+        built = build_index(sys.argv[2], output)
+        print(f"{len(built)}件の出生図を登録しました: {output}")
+    else:
+        print("使い方: python synastry.py build <出生データの CSV / JSONL> [出力先]")
+        sys.exit(1)
@@ -0,0 +1,63 @@
+"""
+Jinja テンプレートのバイトコードキャッシュ
+
+テンプレートをコンパイルした結果（Python のバイトコード）をディレクトリに保存し、
+全ワーカーと再起動後のプロセスで共有する。2回目以降はテンプレートの解析とコンパイルを省略して読み込む。
+キャッシュはテンプレートの内容のチェックサムと Python のバージョンで照合されるため、
+テンプレートを変更すると自動的にコンパイルし直す。
+
+デプロイ時に全テンプレートを事前にコンパイルしておく:
+    python template_cache.py build
+"""
+import os
+import sys
+
+from jinja2 import FileSystemBytecodeCache
+
+# キャッシュの保存先（JINJA_BYTECODE_CACHE_DIR で変更可能）
+CACHE_DIR = os.environ.get(
+    'JINJA_BYTECODE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jinja_cache')
+)
+
+
+def bytecode_cache(directory=CACHE_DIR):
+    """ディレクトリを作成してファイルのバイトコードキャッシュを返す（作成できない場合は None）"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        print(f"テンプレートのキャッシュディレクトリを作成できません（キャッシュなしで続行します）: {e}")
+        return None
+    if not os.access(directory, os.W_OK):
+        # 書き込めないとテンプレートの読み込み時にエラーになるため使わない
+        print(f"テンプレートのキャッシュディレクトリに書き込めません（キャッシュなしで続行します）: {directory}")
+        return None
+    return FileSystemBytecodeCache(directory, '%s.jinja')
+
+
+def compile_templates(env):
+    """全テンプレートを読み込んでコンパイルし（キャッシュがあればそこから読み込む）、テンプレート名の一覧を返す"""
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        from app import app
+
+        if app.jinja_env.bytecode_cache is None:
+            print("バイトコードキャッシュが無効です（USE_JINJA_BYTECODE_CACHE=0）")
+            sys.exit(1)
+        names = compile_templates(app.jinja_env)
+        print(f"{len(names)}件のテンプレートをコンパイルしました: {app.jinja_env.bytecode_cache.directory}")
+    elif command == 'clear':
+        cache = bytecode_cache()
+        if cache is not None:
+            cache.clear()
+            print(f"テンプレートのキャッシュを削除しました: {cache.directory}")
+    else:
+        print("使い方: python template_cache.py [build|clear]")
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""
+リクエスト内の処理段階ごとの所要時間の計測
+
+    with timing.stage('chart'):
+        ...
+
+で囲んだ区間の時間をリクエストごとに集め、Server-Timing ヘッダーと1行の JSON ログに出力する。
+テンプレートの描画時間は Flask のシグナルから自動で計測する。
+init_app で有効にしない限り stage() は何もしないコンテキストマネージャを返すだけなので、
+無効時の負荷はほぼない。
+"""
+import json
+import sys
+import time
+
+from flask import g, has_app_context, request, before_render_template, template_rendered
+
+# init_app で有効にしたときだけ計測する
+ENABLED = False
+
+
+class _NullStage:
+    """計測しないときに返す何もしないコンテキストマネージャ"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'timings', 'start')
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.append((self.name, time.perf_counter() - self.start))
+        return False
+
+
+def stage(name):
+    """name の区間の時間を計測するコンテキストマネージャ（無効時やリクエスト外では何もしない）"""
+    if not ENABLED or not has_app_context():
+        return NULL_STAGE
+    timings = g.get('timings')
+    if timings is None:
+        return NULL_STAGE
+    return _Stage(name, timings)
+
+
+def server_timing_header(timings, total):
+    """Server-Timing ヘッダーの値を組み立てる（ミリ秒）"""
+    metrics = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings]
+    metrics.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(metrics)
+
+
+def init_app(app, header=True, log=False):
+    """計測を有効にし、Server-Timing ヘッダー（header）と JSON ログ（log）の出力を登録する"""
+    global ENABLED
+    if not (header or log):
+        return
+    ENABLED = True
+
+    @app.before_request
+    def start_timing():
+        g.timings = []
+        g.timing_start = time.perf_counter()
+
+    def start_render(sender, template, context, **extra):
+        if g.get('timings') is not None:
+            g.render_start = time.perf_counter()
+
+    def finish_render(sender, template, context, **extra):
+        start = g.pop('render_start', None)
+        if start is not None:
+            g.timings.append((f'render.{template.name.rsplit(".", 1)[0]}', time.perf_counter() - start))
+
+    # weak=False: 関数がこのスコープを抜けても接続を保つ
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    @app.after_request
+    def emit_timing(response):
+        timings = g.get('timings')
+        if timings is None:
+            return response
+        if header:
+            response.headers['Server-Timing'] = server_timing_header(
+                timings, time.perf_counter() - g.timing_start)
+        if log:
+            # ストリーミング中に生成される章も含めるため、送信完了時に出力する
+            start = g.timing_start
+            entry = {'event': 'request_timing', 'method': request.method, 'path': request.path,
+                     'status': response.status_code}
+
+            def write_log():
+                entry['total_ms'] = round((time.perf_counter() - start) * 1000, 3)
+                entry['stages'] = [{'name': name, 'ms': round(seconds * 1000, 3)} for name, seconds in timings]
+                print(json.dumps(entry, ensure_ascii=False), file=sys.stdout, flush=True)
+
+            response.call_on_close(write_log)
+        return response